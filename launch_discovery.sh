@@ -6,14 +6,37 @@ source ~/vllm-env/bin/activate
 # Kill old discovery processes
 pkill -f "discover_channels_10M.py" 2>/dev/null
 pkill -f "discover_related.py" 2>/dev/null
+pkill -f "discovery_engine.py" 2>/dev/null
+pkill -f "ingest_service.py" 2>/dev/null
+pkill -f "channel_rank.py" 2>/dev/null
+pkill -f "feed_watcher.py" 2>/dev/null
 sleep 1
 
-# Channel crawler (the main discovery engine for 10M target)
-nohup python3 -u src/discover_channels_10M.py > /tmp/discover_channels_1.log 2>&1 &
-echo "[discovery] Channel crawler started (PID: $!)"
+# Crawlers stage candidates to append-only files; one merger owns discovery writes
+export INGEST_MODE=staged
+nohup python3 -u src/ingest_service.py > /tmp/ingest_service.log 2>&1 &
+echo "[discovery] Ingest service started (PID: $!)"
 
-# Related video crawler (exponential discovery from existing videos)
-nohup python3 -u src/discover_related.py > /tmp/discover_related.log 2>&1 &
-echo "[discovery] Related crawler started (PID: $!)"
+# Channel authority for the frontier and the worker's claims, re-ranked hourly
+nohup python3 -u src/channel_rank.py --interval 3600 > /tmp/channel_rank.log 2>&1 &
+echo "[discovery] Channel ranker started (PID: $!)"
+
+# New uploads from already-crawled channels, via their RSS feeds
+nohup python3 -u src/feed_watcher.py > /tmp/feed_watcher.log 2>&1 &
+echo "[discovery] Feed watcher started (PID: $!)"
+
+if [ "${DISCOVERY_ENGINE:-async}" = "legacy" ]; then
+    # Channel crawler (the main discovery engine for 10M target)
+    nohup python3 -u src/discover_channels_10M.py > /tmp/discover_channels_1.log 2>&1 &
+    echo "[discovery] Channel crawler started (PID: $!)"
+
+    # Related video crawler (exponential discovery from existing videos)
+    nohup python3 -u src/discover_related.py > /tmp/discover_related.log 2>&1 &
+    echo "[discovery] Related crawler started (PID: $!)"
+else
+    # Channel, playlist, page and search tasks share one queue and concurrency budget
+    nohup python3 -u src/discovery_engine.py > /tmp/discovery_engine.log 2>&1 &
+    echo "[discovery] Discovery engine started (PID: $!)"
+fi
 
 echo "[discovery] All crawlers running"
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+ASR speed/quality benchmark for the worker's decode settings.
+
+Runs a fixed local audio set with reference transcripts through a matrix of
+model x compute type x beam size x speed x VAD x condition_on_previous_text
+x silence trimming, and reports per config:
+- RTF (audio seconds / decode seconds)
+- corpus WER / CER against the references
+- output chars/sec
+
+The set is a directory of audio files with same-stem .txt references
+(lecture01.opus + lecture01.txt), or a JSONL manifest of
+{"audio": path, "text": reference}. Runs on CPU with a small model
+(tiny/base, int8), so config changes can be checked anywhere. Keep clips
+to a few minutes each: CER alignment is quadratic in transcript length.
+
+--json saves results; --baseline compares against a saved run and exits 1
+if WER or RTF regressed past --max-wer-increase / --max-rtf-drop.
+
+Usage:
+    python3 scripts/bench_asr.py --set ~/asr_bench --device cpu --models tiny
+    python3 scripts/bench_asr.py --set ~/asr_bench --models tiny,base --beams 1,5 --speeds 1.0,1.2,1.4 --vad 0,1
+    python3 scripts/bench_asr.py --set ~/asr_bench --device cuda --models distil-large-v3.5 \\
+        --json bench.json --baseline bench_prev.json
+"""
+import argparse, glob, itertools, json, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import asr_metrics
+import audio_prep
+
+AUDIO_EXTS = (".opus", ".webm", ".m4a", ".mp3", ".wav", ".flac", ".ogg")
+
+
+def load_set(path):
+    """[(audio_path, reference_text)] from a directory or a JSONL manifest."""
+    items = []
+    if os.path.isdir(path):
+        for audio in sorted(glob.glob(os.path.join(path, "*"))):
+            ref = os.path.splitext(audio)[0] + ".txt"
+            if audio.endswith(AUDIO_EXTS) and os.path.exists(ref):
+                with open(ref) as f:
+                    items.append((audio, f.read()))
+    else:
+        base = os.path.dirname(os.path.abspath(path))
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    items.append((os.path.join(base, row["audio"]), row["text"]))
+    return items
+
+
+def csv(value, cast=str):
+    return [cast(x) for x in value.split(",") if x != ""]
+
+
+def flag(value):
+    return [x == "1" for x in value.split(",")]
+
+
+def config_key(r):
+    return (r["model"], r["compute_type"], r["beam_size"], r["speed"], r["vad"],
+            r["condition"], r["trim"])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--set", required=True, help="directory of audio + .txt, or manifest.jsonl")
+    ap.add_argument("--device", default="cpu")
+    ap.add_argument("--models", default="tiny")
+    ap.add_argument("--compute-types", default=None, help="default: int8 on cpu, float16 on cuda")
+    ap.add_argument("--beams", default="1")
+    ap.add_argument("--speeds", default="1.0,1.2")
+    ap.add_argument("--vad", default="0", help="0,1")
+    ap.add_argument("--condition", default="0", help="condition_on_previous_text: 0,1")
+    ap.add_argument("--trim", default="0", help="dead-air trimming: 0,1")
+    ap.add_argument("--cpu-threads", type=int, default=0)
+    ap.add_argument("--limit", type=int, default=0, help="only the first N files")
+    ap.add_argument("--json", help="write results here")
+    ap.add_argument("--baseline", help="previous --json output to compare against")
+    ap.add_argument("--max-wer-increase", type=float, default=0.01)
+    ap.add_argument("--max-rtf-drop", type=float, default=0.15, help="fraction")
+    args = ap.parse_args()
+
+    items = load_set(args.set)[:args.limit or None]
+    if not items:
+        sys.exit(f"no audio + reference pairs in {args.set}")
+    compute_types = csv(args.compute_types) if args.compute_types else \
+        ["int8" if args.device == "cpu" else "float16"]
+
+    from faster_whisper import WhisperModel
+
+    pcm_cache = {}
+
+    def pcm_for(path, speed, trim):
+        key = (path, speed, trim)
+        if key not in pcm_cache:
+            pcm = audio_prep.decode_pcm(path, speed=speed)
+            if pcm is not None and trim:
+                pcm = audio_prep.trim_silence(pcm)[0]
+            pcm_cache[key] = pcm
+        return pcm_cache[key]
+
+    refs = [asr_metrics.normalize(text) for _, text in items]
+    ref_words = sum(len(r.split()) for r in refs)
+    ref_chars = sum(len(r.replace(" ", "")) for r in refs)
+    audio_s = {}
+    for path, _ in items:
+        pcm = pcm_for(path, 1.0, False)
+        audio_s[path] = len(pcm) / audio_prep.SAMPLE_RATE if pcm is not None else 0.0
+    total_audio = sum(audio_s.values())
+    print(f"{len(items)} files, {total_audio/60:.1f} min audio, {ref_words:,} reference words\n")
+
+    results = []
+    header = (f"{'model':>20s} {'ctype':>8s} {'beam':>4s} {'speed':>5s} {'vad':>3s} {'cond':>4s} "
+              f"{'trim':>4s} {'decode_s':>9s} {'RTF':>7s} {'WER':>6s} {'CER':>6s} {'chars/s':>8s}")
+    print(header)
+    for model_id, ctype in itertools.product(csv(args.models), compute_types):
+        model = WhisperModel(model_id, device=args.device, compute_type=ctype,
+                             cpu_threads=args.cpu_threads)
+        # warm-up so the first config doesn't pay for lazy init
+        warm = pcm_for(items[0][0], 1.0, False)
+        if warm is not None:
+            list(model.transcribe(warm[:audio_prep.SAMPLE_RATE * 5].astype("float32") / 32768.0,
+                                  beam_size=1)[0])
+        for beam, speed, vad, cond, trim in itertools.product(
+                csv(args.beams, int), csv(args.speeds, float), flag(args.vad),
+                flag(args.condition), flag(args.trim)):
+            decode_s, word_err, char_err, hyp_chars = 0.0, 0, 0, 0
+            for (path, _), ref in zip(items, refs):
+                pcm = pcm_for(path, speed, trim)
+                if pcm is None:
+                    continue
+                t0 = time.time()
+                segments, _ = model.transcribe(
+                    pcm.astype("float32") / 32768.0, beam_size=beam, vad_filter=vad,
+                    word_timestamps=False, condition_on_previous_text=cond)
+                hyp = asr_metrics.normalize(" ".join(s.text for s in segments))
+                decode_s += time.time() - t0
+                word_err += asr_metrics.edit_distance(ref.split(), hyp.split())
+                char_err += asr_metrics.edit_distance(ref.replace(" ", ""), hyp.replace(" ", ""))
+                hyp_chars += len(hyp)
+            row = {"model": model_id, "compute_type": ctype, "beam_size": beam, "speed": speed,
+                   "vad": vad, "condition": cond, "trim": trim, "audio_s": total_audio,
+                   "decode_s": decode_s, "rtf": total_audio / max(decode_s, 1e-9),
+                   "wer": word_err / max(ref_words, 1), "cer": char_err / max(ref_chars, 1),
+                   "chars_per_s": hyp_chars / max(decode_s, 1e-9)}
+            results.append(row)
+            print(f"{model_id:>20s} {ctype:>8s} {beam:4d} {speed:5.2f} {int(vad):3d} {int(cond):4d} "
+                  f"{int(trim):4d} {decode_s:9.1f} {row['rtf']:6.1f}x {row['wer']:6.3f} "
+                  f"{row['cer']:6.3f} {row['chars_per_s']:8.0f}", flush=True)
+        del model
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"set": args.set, "device": args.device, "files": len(items),
+                       "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = {config_key(r): r for r in json.load(f)["results"]}
+        regressed = False
+        print(f"\nvs {args.baseline}:")
+        for r in results:
+            b = base.get(config_key(r))
+            if not b:
+                continue
+            d_wer = r["wer"] - b["wer"]
+            d_rtf = r["rtf"] / max(b["rtf"], 1e-9) - 1
+            bad = d_wer > args.max_wer_increase or d_rtf < -args.max_rtf_drop
+            regressed |= bad
+            print(f"  {'/'.join(str(x) for x in config_key(r)):50s} WER {d_wer:+.3f}  "
+                  f"RTF {d_rtf * 100:+.0f}%{'  REGRESSION' if bad else ''}")
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
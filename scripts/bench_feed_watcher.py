@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Run src/feed_watcher.py against a local stand-in for the uploads feeds.
+
+The server serves Atom feeds (15 latest uploads, ETag + Last-Modified,
+304 on a conditional hit) for --channels synthetic channels. Each channel
+posts on a Poisson schedule: dormant, daily, weekly or monthly. Uploads are
+lectures, clips under MIN_DURATION, Shorts (absent from /videos) or live
+streams (listed without a duration for their first LIVE_S). The /videos
+listing the watcher takes durations from is answered from the same schedule
+instead of yt-dlp. Time is simulated: every --step the clock advances, the
+server shows what has been published by then, and the watcher polls whatever
+it considers due. Everything goes into throwaway channels/videos DBs.
+
+At the end the run checks that every lecture old enough to have been polled
+is in `videos` exactly once and that no clip or Short got in. It reports
+requests, 304s, bytes and listings, plus the detection latency per posting
+class, next to fixed-interval polling.
+
+Usage:
+    python3 scripts/bench_feed_watcher.py
+    python3 scripts/bench_feed_watcher.py --channels 5000 --days 30 --fixed-hours 6
+"""
+import argparse, os, random, shutil, sqlite3, statistics, sys, tempfile, threading
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import discover_channels_10M as channels
+import feed_watcher
+import known_ids
+from http_pool import HTTPPool
+
+CLASSES = {"dormant": None, "daily": 86400, "weekly": 7 * 86400, "monthly": 30 * 86400}
+MIX = {"dormant": 0.2, "daily": 0.3, "weekly": 0.3, "monthly": 0.2}
+UPLOAD_MIX = {"lecture": 0.7, "clip": 0.15, "short": 0.1, "live": 0.05}
+LIVE_S = 3 * 3600
+T0 = 1_700_000_000.0
+HISTORY_S = 180 * 86400
+ALPHABET = known_ids.ALPHABET
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def make_handler(uploads, clock, counters):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def do_GET(self):
+            ch_id = parse_qs(urlsplit(self.path).query).get("channel_id", [""])[0]
+            feed = [u[:3] for u in uploads.get(ch_id, ()) if u[2] <= clock[0]][-15:][::-1]
+            counters["requests"] += 1
+            etag = f'"{feed[0][0]}-{len(feed)}"' if feed else '"empty"'
+            if self.headers.get("If-None-Match") == etag:
+                counters["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = feed_xml(ch_id, feed).encode()
+            counters["bytes"] += len(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/atom+xml; charset=UTF-8")
+            self.send_header("ETag", etag)
+            if feed:
+                self.send_header("Last-Modified", formatdate(feed[0][2], usegmt=True))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def feed_xml(ch_id, feed):
+    entries = "".join(
+        f"<entry><id>yt:video:{vid}</id><yt:videoId>{vid}</yt:videoId>"
+        f"<yt:channelId>{ch_id}</yt:channelId><title>{title}</title>"
+        f"<published>{datetime.fromtimestamp(ts, timezone.utc).isoformat()}</published></entry>"
+        for vid, title, ts in feed)
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+            'xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>{ch_id}</title>{entries}</feed>")
+
+
+def make_uploads(n, horizon, rng):
+    """{channel_id: [(video_id, title, published, duration, kind)]} sorted by time,
+    and each channel's class. Shorts have no duration (they aren't on /videos)."""
+    uploads, kind = {}, {}
+    for i in range(n):
+        ch_id = f"UC{i:022d}"
+        kind[ch_id] = rng.choices(list(MIX), weights=list(MIX.values()))[0]
+        gap = CLASSES[kind[ch_id]]
+        t, ups = T0 - HISTORY_S, []
+        if gap:
+            while True:
+                t += rng.expovariate(1 / gap)
+                if t > T0 + horizon:
+                    break
+                vid = "".join(rng.choices(ALPHABET, k=10)) + rng.choice(ALPHABET[::4])
+                up = rng.choices(list(UPLOAD_MIX), weights=list(UPLOAD_MIX.values()))[0]
+                dur = {"lecture": rng.uniform(900, 7200), "clip": rng.uniform(60, 899),
+                       "short": None, "live": rng.uniform(3600, 10800)}[up]
+                ups.append((vid, f"Lecture {len(ups) + 1}: Topics in Algebra", t, dur, up))
+        else:                            # dormant: a few old uploads, nothing new
+            ups = [("".join(rng.choices(ALPHABET, k=10)) + "A", "Old lecture", T0 - HISTORY_S + k * 86400,
+                    3600.0, "lecture") for k in range(3)]
+        uploads[ch_id] = ups
+    return uploads, kind
+
+
+def make_lister(uploads, clock, counters):
+    """Stand-in for feed_watcher.list_durations: the channel's /videos tab at `clock`."""
+    def list_durations(ch_id, n):
+        counters["listings"] += 1
+        tab = [u for u in uploads.get(ch_id, ()) if u[2] <= clock[0] and u[4] != "short"]
+        return {u[0]: None if u[4] == "live" and clock[0] < u[2] + LIVE_S else u[3]
+                for u in tab[::-1][:n + feed_watcher.LIST_MARGIN]}
+    return list_durations
+
+
+def setup_dbs(tmp, uploads):
+    crawled_at = datetime.fromtimestamp(T0, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    channels.DB_PATH = os.path.join(tmp, "videos.db")
+    channels.CHANNELS_DB = os.path.join(tmp, "channels.db")
+    conn = sqlite3.connect(channels.DB_PATH)
+    conn.execute("""CREATE TABLE videos (
+        video_id TEXT PRIMARY KEY, title TEXT, course TEXT, university TEXT, url TEXT,
+        duration_seconds REAL, status TEXT DEFAULT 'pending', priority INTEGER DEFAULT 5)""")
+    with conn:      # the crawl that made these channels 'crawled' saw everything before T0
+        conn.executemany("INSERT INTO videos (video_id, title, status) VALUES (?, ?, 'completed')",
+                         ((u[0], u[1]) for ups in uploads.values() for u in ups if u[2] <= T0))
+    conn.close()
+    cdb = channels.get_channels_db()
+    with cdb:
+        cdb.executemany("INSERT INTO channels (channel_id, channel_name, status, crawled_at) "
+                        "VALUES (?, ?, 'crawled', ?)",
+                        ((ch, f"Channel {ch[-6:]}", crawled_at) for ch in uploads))
+    feed_watcher.ensure_table(cdb)
+    return cdb
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--channels", type=int, default=2000)
+    ap.add_argument("--days", type=float, default=30)
+    ap.add_argument("--step", type=float, default=900, help="simulated seconds per tick")
+    ap.add_argument("--fixed-hours", type=float, default=6, help="fixed-interval baseline")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    horizon = args.days * 86400
+    uploads, kind = make_uploads(args.channels, horizon, rng)
+    published = {u[0]: (u[2], ch) for ch, ups in uploads.items() for u in ups if u[2] > T0}
+    eligible = {u[0] for ups in uploads.values() for u in ups
+                if u[2] > T0 and u[4] in ("lecture", "live") and u[3] >= channels.MIN_DURATION}
+
+    clock = [T0]
+    counters = {"requests": 0, "not_modified": 0, "bytes": 0, "listings": 0}
+    server = QuietServer(("127.0.0.1", 0), make_handler(uploads, clock, counters))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    feed_watcher.FEED_URL = f"http://127.0.0.1:{server.server_address[1]}/feeds/videos.xml?channel_id={{channel_id}}"
+    feed_watcher.list_durations = make_lister(uploads, clock, counters)
+
+    tmp = tempfile.mkdtemp(prefix="bench_feeds_")
+    stdout = sys.stdout
+    try:
+        cdb = setup_dbs(tmp, uploads)
+        conn = sqlite3.connect(channels.DB_PATH)
+        last_rowid = conn.execute("SELECT MAX(rowid) FROM videos").fetchone()[0]
+        pool = HTTPPool(max_idle_per_host=feed_watcher.THREADS)
+        found = {}
+        sys.stdout = open(os.devnull, "w")          # silence per-call ingest logs
+        while clock[0] < T0 + horizon:
+            clock[0] += args.step
+            feed_watcher.poll_due(cdb, pool, now=clock[0], limit=10 ** 9)
+            for rowid, vid in conn.execute("SELECT rowid, video_id FROM videos WHERE rowid > ?",
+                                           (last_rowid,)):
+                last_rowid = rowid
+                found.setdefault(vid, []).append(clock[0])
+        sys.stdout.close()
+        sys.stdout = stdout
+        pool.close()
+        server.shutdown()
+
+        # every lecture published before the last possible poll must have been found, once;
+        # clips, Shorts and anything unknown must not have been
+        due = {v for v in eligible
+               if published[v][0] <= clock[0] - feed_watcher.MAX_INTERVAL_S - LIVE_S}
+        missing = due - set(found)
+        dupes = [v for v, seen in found.items() if len(seen) > 1]
+        stray = set(found) - eligible
+        polls = counters["requests"]
+        print(f"{args.channels:,} channels, {args.days:.0f} simulated days, "
+              f"{len(published):,} new uploads ({len(eligible):,} lectures >= "
+              f"{channels.MIN_DURATION // 60} min)\n")
+        print(f"feed watcher: {polls:,} requests ({counters['not_modified'] / max(polls, 1):.0%} 304), "
+              f"{counters['bytes'] / 1e6:.1f} MB, {counters['listings']:,} /videos listings, "
+              f"{len(found):,} new videos found")
+        fixed = args.channels * horizon / (args.fixed_hours * 3600)
+        print(f"fixed {args.fixed_hours:g}h polling: {fixed:,.0f} requests, "
+              f"mean latency {args.fixed_hours / 2:.1f}h\n")
+        print(f"{'class':>8s} {'lectures':>8s} {'found':>6s} {'median_h':>9s} {'p90_h':>7s}")
+        for k in CLASSES:
+            lat = sorted((found[v][0] - published[v][0]) / 3600 for v in eligible
+                         if kind[published[v][1]] == k and v in found)
+            n_up = sum(1 for v in eligible if kind[published[v][1]] == k)
+            if lat:
+                print(f"{k:>8s} {n_up:8d} {len(lat):6d} {statistics.median(lat):9.1f} "
+                      f"{lat[int(len(lat) * 0.9)]:7.1f}")
+            else:
+                print(f"{k:>8s} {n_up:8d} {0:6d} {'-':>9s} {'-':>7s}")
+        if missing or dupes or stray:
+            sys.exit(f"missing {len(missing)}, duplicated {len(dupes)}, not eligible {len(stray)}")
+    finally:
+        sys.stdout = stdout
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark discovery ingest: per-row INSERT + IntegrityError (the old
+insert_videos) vs ingest.insert_rows (INSERT OR IGNORE executemany, one
+transaction) vs ingest.ingest_videos (known-ID filter first).
+
+Builds a throwaway DB with --known existing IDs, then feeds --candidates
+synthetic candidates (--dup-rate of them already known) in calls of
+--batch, like discover_channels_10M does per channel/playlist. Each method
+runs on its own copy of the DB; inserted counts must match.
+
+Usage:
+    python3 scripts/bench_ingest.py
+    python3 scripts/bench_ingest.py --candidates 1000000 --dup-rate 0.9 --batch 500
+"""
+import argparse, os, random, shutil, sqlite3, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import ingest
+import known_ids
+
+ALPHABET = known_ids.ALPHABET
+LAST = ALPHABET[::4]        # the 16 chars a real 11th ID char can be
+
+
+def random_ids(n, rng):
+    return ["".join(rng.choices(ALPHABET, k=10)) + rng.choice(LAST) for _ in range(n)]
+
+
+def make_db(path, ids):
+    conn = ingest.connect(path)
+    conn.execute("""CREATE TABLE videos (
+        video_id TEXT PRIMARY KEY, title TEXT, course TEXT, university TEXT, url TEXT,
+        duration_seconds REAL, status TEXT DEFAULT 'pending', priority INTEGER DEFAULT 5,
+        license_risk TEXT)""")
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO videos (video_id, title, status) VALUES (?, '', 'completed')",
+                         ((v,) for v in ids))
+    conn.close()
+
+
+def to_row(v):
+    return (v['id'], v['title'], '', 'bench', v['duration'], 5)
+
+
+def per_row(db_path, videos):
+    """The pre-ingest.py insert_videos()."""
+    conn = ingest.connect(db_path)
+    n = 0
+    for v in videos:
+        try:
+            conn.execute(
+                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
+                (v['id'], v['title'], '', 'bench', f"https://youtube.com/watch?v={v['id']}",
+                 v['duration'], 5))
+            n += 1
+        except sqlite3.IntegrityError:
+            pass
+    conn.commit()
+    conn.close()
+    return n
+
+
+def bulk(db_path, videos):
+    return ingest.ingest_videos(db_path, videos, to_row, filter_known=False)
+
+
+def bulk_filtered(db_path, videos):
+    return ingest.ingest_videos(db_path, videos, to_row)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", type=int, default=1_000_000)
+    ap.add_argument("--dup-rate", type=float, default=0.9)
+    ap.add_argument("--known", type=int, default=0, help="IDs already in the DB (default: = candidates)")
+    ap.add_argument("--batch", type=int, default=500, help="candidates per insert_videos() call")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    known = random_ids(args.known or args.candidates, rng)
+    n_dup = int(args.candidates * args.dup_rate)
+    cand_ids = rng.sample(known, n_dup) + random_ids(args.candidates - n_dup, rng)
+    rng.shuffle(cand_ids)
+    videos = [{'id': v, 'title': 'Lecture', 'duration': 1800} for v in cand_ids]
+    batches = [videos[i:i + args.batch] for i in range(0, len(videos), args.batch)]
+
+    tmp = tempfile.mkdtemp(prefix="bench_ingest_")
+    try:
+        base = os.path.join(tmp, "base.db")
+        make_db(base, known)
+        print(f"{len(known):,} known IDs, {len(videos):,} candidates ({args.dup_rate:.0%} known), "
+              f"{len(batches):,} calls of {args.batch}\n", flush=True)
+        print(f"{'method':>24s} {'seconds':>8s} {'inserted':>9s} {'cand/s':>10s}")
+        results = {}
+        for name, fn in (("per-row + IntegrityError", per_row), ("executemany OR IGNORE", bulk),
+                         ("known-ID filter + bulk", bulk_filtered)):
+            db = os.path.join(tmp, f"{fn.__name__}.db")
+            shutil.copyfile(base, db)
+            if fn is bulk_filtered:
+                t0 = time.time()
+                known_ids.shared(db)
+                load_s = time.time() - t0
+            stdout, sys.stdout = sys.stdout, open(os.devnull, "w")   # silence per-call drop logs
+            try:
+                t0 = time.time()
+                n = sum(fn(db, b) for b in batches)
+                dt = time.time() - t0
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            results[name] = n
+            print(f"{name:>24s} {dt:8.2f} {n:9,d} {len(videos) / dt:10,.0f}", flush=True)
+        print(f"\n(known-ID index load, once per process: {load_s:.2f}s)")
+        if len(set(results.values())) != 1:
+            sys.exit(f"inserted counts differ: {results}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Exercise src/range_downloader.py against a local throttled HTTP server.
+
+The server serves a synthetic audio blob with Range support, HTTP/1.1
+keep-alive, a per-response rate cap (like googlevideo throttling) and
+random mid-body connection drops. Each run checks the sha256 of the
+downloaded file and reports throughput for 1 vs N connections.
+
+--collapse-after-mb simulates throttling: once that much has been served the
+server drops to --collapse-kbps, and the run checks that the downloader
+gives up with Throttled within --min-rate-window seconds.
+
+Usage:
+    python3 scripts/bench_ranged_download.py
+    python3 scripts/bench_ranged_download.py --size-mb 40 --rate-kbps 2000 --drop 0.05 --conns 1,4,8
+"""
+import argparse, hashlib, os, random, re, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import range_downloader
+from http_pool import HTTPPool
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # client hung up mid-body (aborted/throttled download) — expected
+
+
+def make_handler(blob, rate_bps, drop_prob, counters, collapse_after=None, collapse_bps=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def setup(self):
+            super().setup()
+            counters["connections"] += 1
+
+        def do_GET(self):
+            counters["requests"] += 1
+            start, end = 0, len(blob) - 1
+            m = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if m:
+                start = int(m.group(1))
+                end = min(int(m.group(2)) if m.group(2) else end, len(blob) - 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(blob)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "audio/webm")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+
+            pos, step = start, 16 << 10
+            drop_at = None
+            if end - start > step and random.random() < drop_prob:
+                drop_at = random.randint(start + step, end)
+            t0 = time.time()
+            while pos <= end:
+                if drop_at and pos >= drop_at:
+                    counters["drops"] += 1
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    return
+                n = min(step, end - pos + 1)
+                self.wfile.write(blob[pos:pos + n])
+                pos += n
+                counters["served"] += n
+                if collapse_after is not None and counters["served"] > collapse_after:
+                    time.sleep(n / collapse_bps)
+                    continue
+                # per-response rate cap
+                ahead = (pos - start) / rate_bps - (time.time() - t0)
+                if ahead > 0:
+                    time.sleep(ahead)
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size-mb", type=float, default=20)
+    ap.add_argument("--rate-kbps", type=float, default=4000, help="per-response cap")
+    ap.add_argument("--drop", type=float, default=0.02, help="probability a response dies mid-body")
+    ap.add_argument("--conns", default="1,4,8")
+    ap.add_argument("--chunk-kb", type=int, default=1024)
+    ap.add_argument("--collapse-after-mb", type=float, default=2)
+    ap.add_argument("--collapse-kbps", type=float, default=40)
+    ap.add_argument("--min-rate-kbps", type=float, default=512)
+    ap.add_argument("--min-rate-window", type=float, default=10)
+    args = ap.parse_args()
+
+    blob = random.Random(0).randbytes(int(args.size_mb * (1 << 20)))
+    want = hashlib.sha256(blob).hexdigest()
+    counters = {"connections": 0, "requests": 0, "drops": 0, "served": 0}
+    server = QuietServer(("127.0.0.1", 0),
+                                 make_handler(blob, args.rate_kbps * 125, args.drop, counters))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/videoplayback?itag=249"
+
+    print(f"{len(blob)/1e6:.1f} MB blob, {args.rate_kbps:.0f} kbit/s per response, "
+          f"{args.drop*100:.0f}% drops, {args.chunk_kb} KiB chunks\n")
+    print(f"{'conns':>5s} {'seconds':>8s} {'MB/s':>7s} {'tcp conns':>9s} {'requests':>8s} {'drops':>5s}  sha256")
+    for n in [int(x) for x in args.conns.split(",")]:
+        for k in counters:
+            counters[k] = 0
+        pool = HTTPPool()
+        with tempfile.TemporaryDirectory() as d:
+            out = os.path.join(d, "audio.webm")
+            t0 = time.time()
+            size = range_downloader.download(url, out, connections=n,
+                                             chunk_bytes=args.chunk_kb << 10, pool=pool)
+            dt = time.time() - t0
+            with open(out, "rb") as f:
+                ok = hashlib.sha256(f.read()).hexdigest() == want
+        pool.close()
+        print(f"{n:5d} {dt:8.1f} {size/1e6/dt:7.2f} {counters['connections']:9d} "
+              f"{counters['requests']:8d} {counters['drops']:5d}  {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            sys.exit(1)
+    server.shutdown()
+
+    # Throttling collapse: expect an early Throttled, not a crawl to the end
+    counters["served"] = 0
+    server = QuietServer(
+        ("127.0.0.1", 0),
+        make_handler(blob, args.rate_kbps * 125, 0, counters,
+                     collapse_after=args.collapse_after_mb * (1 << 20),
+                     collapse_bps=args.collapse_kbps * 125))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/videoplayback?itag=249"
+    pool = HTTPPool(timeout=5)
+    print(f"\ncollapse to {args.collapse_kbps:.0f} kbit/s after {args.collapse_after_mb:.0f} MB, "
+          f"min rate {args.min_rate_kbps:.0f} kbit/s over {args.min_rate_window:.0f}s:")
+    with tempfile.TemporaryDirectory() as d:
+        t0 = time.time()
+        try:
+            range_downloader.download(url, os.path.join(d, "a.webm"), connections=4,
+                                      chunk_bytes=args.chunk_kb << 10, pool=pool,
+                                      min_rate_bps=args.min_rate_kbps * 125,
+                                      rate_window_s=args.min_rate_window)
+            print("  completed without detecting throttling")
+            sys.exit(1)
+        except range_downloader.Throttled as e:
+            print(f"  {e} — gave up after {time.time() - t0:.1f}s "
+                  f"({counters['served'] / 1e6:.1f} MB served)")
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
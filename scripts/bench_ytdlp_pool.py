@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead of a yt-dlp subprocess vs the warm ytdlp_pool workers.
+
+Runs the same metadata lookup (fetch_descriptions.py's --dump-json call)
+N times each way, sequentially so only the per-call cost differs, and
+extrapolates the saving to the description backlog. --url benchmarks any
+URL instead of YouTube IDs (e.g. a local file served by http.server) to
+isolate startup cost from network time.
+
+Usage:
+    python3 scripts/bench_ytdlp_pool.py --calls 20
+    python3 scripts/bench_ytdlp_pool.py --url http://127.0.0.1:8000/a.wav --calls 50
+"""
+import argparse, os, sqlite3, statistics, subprocess, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import ytdlp_pool
+
+DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
+ARGS = ["--dump-json", "--no-download", "--no-warnings", "--quiet", "--socket-timeout", "10"]
+
+
+def sample_urls(n):
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    rows = conn.execute("SELECT video_id FROM videos WHERE status='completed' "
+                        "ORDER BY RANDOM() LIMIT ?", (n,)).fetchall()
+    backlog = conn.execute("SELECT COUNT(*) FROM videos WHERE (description IS NULL OR description = '') "
+                           "AND status IN ('completed', 'pending')").fetchone()[0]
+    conn.close()
+    return [f"https://youtube.com/watch?v={r[0]}" for r in rows], backlog
+
+
+def timed(fn, urls):
+    times, ok = [], 0
+    for url in urls:
+        t0 = time.time()
+        try:
+            ok += fn(url).returncode == 0
+        except subprocess.TimeoutExpired:
+            pass
+        times.append(time.time() - t0)
+    return times, ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=20)
+    ap.add_argument("--url", help="benchmark this URL instead of sampled videos")
+    ap.add_argument("--ytdlp", default=ytdlp_pool.YTDLP)
+    ap.add_argument("--backlog", type=int, default=0, help="lookups to extrapolate to (default: from DB)")
+    ap.add_argument("--workers", type=int, default=4, help="parallel fetchers sharing the saving")
+    args = ap.parse_args()
+
+    if args.url:
+        urls, backlog = [args.url] * args.calls, 0
+    else:
+        urls, backlog = sample_urls(args.calls)
+    backlog = args.backlog or backlog or 5_000_000
+
+    pool = ytdlp_pool.YtdlpPool(size=1, ytdlp_path=args.ytdlp)
+    t0 = time.time()
+    pool.run([args.ytdlp, "--version"], timeout=60)        # spawn + import, paid once
+    startup = time.time() - t0
+    if pool.broken:
+        sys.exit(f"pool unavailable: {pool.broken}")
+
+    sub_t, sub_ok = timed(lambda u: subprocess.run([args.ytdlp, u] + ARGS, capture_output=True,
+                                                   text=True, timeout=60), urls)
+    pool_t, pool_ok = timed(lambda u: pool.run([args.ytdlp, u] + ARGS, timeout=60), urls)
+    pool.close()
+
+    print(f"{len(urls)} calls each ({'local URL' if args.url else 'sampled videos'})")
+    print(f"{'':>12s} {'mean_s':>8s} {'median_s':>9s} {'ok':>5s}")
+    for name, t, ok in (("subprocess", sub_t, sub_ok), ("pool", pool_t, pool_ok)):
+        print(f"{name:>12s} {statistics.mean(t):8.3f} {statistics.median(t):9.3f} {ok:5d}")
+    saved = statistics.median(sub_t) - statistics.median(pool_t)
+    print(f"\nworker startup (once): {startup:.2f}s")
+    print(f"saved per call: {saved:.3f}s -> {backlog:,} lookups: {saved * backlog / 3600:,.0f} CPU-h, "
+          f"{saved * backlog / 3600 / args.workers:,.0f} h wall at {args.workers} fetchers")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,12 @@ Quality signals:
 - Negative filter: music video, lyric, trailer, reaction, unboxing, prank, ASMR, mukbang
 """
 
-import sqlite3, subprocess, json, os, time, random, re
+import sqlite3, subprocess, json, os, time, random, re, sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+import ingest
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 MIN_DURATION = 900  # 15 minutes
@@ -64,26 +67,13 @@ def get_priority(title):
     return 5
 
 def insert_videos(videos):
-    if not videos: return 0
-    conn = get_db()
-    n = 0
-    for v in videos:
+    def to_row(v):
         title = v.get('title', '')
         duration = v.get('duration', 0)
         if not is_educational(title, duration):
-            continue
-        try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
-                (v['id'], title, v.get('course', ''), v.get('src', ''),
-                 f"https://youtube.com/watch?v={v['id']}", duration, get_priority(title)))
-            n += 1
-        except sqlite3.IntegrityError:
-            pass
-    conn.commit()
-    conn.close()
-    return n
+            return None
+        return (v['id'], title, v.get('course', ''), v.get('src', ''), duration, get_priority(title))
+    return ingest.ingest_videos(DB_PATH, videos, to_row)
 
 def run_ytdlp(args, timeout=300):
     """Run yt-dlp and return parsed JSON entries."""
@@ -2,9 +2,12 @@
 """Aggressive discovery to reach 1M+ videos. Runs alongside scale_to_1M.py.
 Focuses on high-yield playlists, massive channels, and trending educational content."""
 
-import sqlite3, subprocess, json, os, time, random
+import sqlite3, subprocess, json, os, time, random, sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+import ingest
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 
@@ -14,20 +17,9 @@ def get_db():
     return conn
 
 def insert_videos(videos):
-    if not videos: return 0
-    conn = get_db()
-    n = 0
-    for v in videos:
-        try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
-                (v['id'], v.get('title',''), v.get('course',''), v.get('src',''),
-                 f"https://youtube.com/watch?v={v['id']}", v.get('duration',0), v.get('priority',5)))
-            n += 1
-        except sqlite3.IntegrityError: pass
-    conn.commit(); conn.close()
-    return n
+    return ingest.ingest_videos(DB_PATH, videos, lambda v: (
+        v['id'], v.get('title',''), v.get('course',''), v.get('src',''),
+        v.get('duration',0), v.get('priority',5)))
 
 def yt_search(query, max_results=500):
     videos = []
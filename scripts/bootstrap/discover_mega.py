@@ -7,9 +7,12 @@ Focuses on areas the other scripts miss:
 4. Niche academic fields
 5. Historical/archived lectures
 """
-import sqlite3, subprocess, json, os, time, random, re
+import sqlite3, subprocess, json, os, time, random, re, sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+import ingest
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 MIN_DURATION = 900
@@ -20,20 +23,9 @@ def get_db():
     return conn
 
 def insert_videos(videos, source="mega"):
-    if not videos: return 0
-    conn = get_db()
-    n = 0
-    for v in videos:
-        try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
-                (v['id'], v.get('title','')[:500], v.get('course', source), v.get('src',''),
-                 f"https://youtube.com/watch?v={v['id']}", v.get('duration',0), v.get('priority',5)))
-            n += 1
-        except sqlite3.IntegrityError: pass
-    conn.commit(); conn.close()
-    return n
+    return ingest.ingest_videos(DB_PATH, videos, lambda v: (
+        v['id'], v.get('title','')[:500], v.get('course', source), v.get('src',''),
+        v.get('duration',0), v.get('priority',5)))
 
 def yt_search(query, max_results=200):
     """Search YouTube via yt-dlp, filter ≥15min."""
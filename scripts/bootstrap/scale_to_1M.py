@@ -6,6 +6,9 @@ import sqlite3, subprocess, json, os, sys, time, random, itertools
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+import ingest
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 
@@ -15,25 +18,10 @@ def get_db():
     return conn
 
 def insert_videos(videos):
-    """Bulk insert, skip duplicates via UNIQUE constraint."""
-    if not videos:
-        return 0
-    conn = get_db()
-    inserted = 0
-    for v in videos:
-        try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?) ",
-                (v['id'], v.get('title',''), v.get('course',''), v.get('university',''),
-                 f"https://youtube.com/watch?v={v['id']}", v.get('duration', 0), v.get('priority', 5))
-            )
-            inserted += 1
-        except sqlite3.IntegrityError:
-            pass
-    conn.commit()
-    conn.close()
-    return inserted
+    """Bulk insert, skip duplicates via INSERT OR IGNORE."""
+    return ingest.ingest_videos(DB_PATH, videos, lambda v: (
+        v['id'], v.get('title',''), v.get('course',''), v.get('university',''),
+        v.get('duration', 0), v.get('priority', 5)))
 
 def search_youtube(query, max_results=500):
     """Search YouTube via yt-dlp, return video metadata."""
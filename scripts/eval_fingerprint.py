@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Calibrate re-upload dedup: pairwise fingerprint similarity of local audio files.
+
+Fingerprints the same excerpt the worker uses (FINGERPRINT_S from the middle
+of the file, 1.0x) and prints the similarity matrix plus the best match per
+file. Known re-uploads should clear DUP_MIN_SIMILARITY; everything else
+should stay near 1/256.
+
+Usage:
+    python3 scripts/eval_fingerprint.py ~/eval_audio/*.opus
+    python3 scripts/eval_fingerprint.py --excerpt 300 a.opus a_mirror.m4a b.opus
+"""
+import argparse, os, subprocess, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import audio_prep
+import fingerprint
+
+
+def duration(path):
+    try:
+        out = subprocess.run(["ffprobe", "-v", "quiet", "-show_entries", "format=duration",
+                              "-of", "default=noprint_wrappers=1:nokey=1", path],
+                             capture_output=True, text=True, timeout=10).stdout
+        return float(out.strip())
+    except (ValueError, subprocess.SubprocessError):
+        return 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--excerpt", type=float, default=600)
+    ap.add_argument("--threshold", type=float, default=0.05)
+    args = ap.parse_args()
+
+    names, sketches = [], []
+    for path in args.files:
+        dur = duration(path)
+        t0 = time.time()
+        pcm = audio_prep.decode_pcm(path, start=max(dur / 2 - args.excerpt / 2, 0),
+                                    duration=args.excerpt)
+        if pcm is None:
+            print(f"  skip {path}: decode failed")
+            continue
+        sk = fingerprint.fingerprint(pcm)
+        print(f"{os.path.basename(path)[:50]:50s} {dur/60:6.1f}min  {len(sk)} values  "
+              f"{time.time() - t0:.1f}s", flush=True)
+        names.append(os.path.basename(path)[:12])
+        sketches.append(sk)
+
+    print("\n" + " " * 13 + " ".join(f"{n:>12s}" for n in names))
+    for i, a in enumerate(sketches):
+        sims = [fingerprint.similarity(a, b) if i != j else float("nan")
+                for j, b in enumerate(sketches)]
+        print(f"{names[i]:>12s} " + " ".join(f"{s:12.3f}" for s in sims))
+
+    print()
+    for i, a in enumerate(sketches):
+        best = max(((fingerprint.similarity(a, b), names[j]) for j, b in enumerate(sketches)
+                    if j != i), default=(0.0, "-"))
+        flag = "DUPLICATE" if best[0] >= args.threshold else ""
+        print(f"{names[i]:>12s} -> {best[1]:>12s} {best[0]:.3f} {flag}")
+
+
+if __name__ == "__main__":
+    main()
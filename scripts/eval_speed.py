@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Evaluate adaptive atempo: GPU time saved vs transcript quality.
+
+For each local audio file, transcribes at 1.0x (reference) and at a fixed
+list of speeds plus the adaptive choice, then reports:
+- decode time + realtime factor per speed
+- WER of each sped-up transcript vs the 1.0x transcript (quality proxy)
+- words/sec estimate from the envelope probe and the speed it picked
+
+Usage:
+    python3 scripts/eval_speed.py ~/eval_audio/*.mp3
+    python3 scripts/eval_speed.py --device cpu --model tiny --speeds 1.2,1.4,1.6 a.mp3 b.mp3
+"""
+import argparse, os, sys, time, json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import audio_prep
+import asr_metrics
+
+
+def transcribe(model, pcm, beam_size):
+    audio = pcm.astype("float32") / 32768.0
+    t0 = time.time()
+    segments, _ = model.transcribe(audio, beam_size=beam_size, vad_filter=False,
+                                   word_timestamps=False, condition_on_previous_text=False)
+    text = " ".join(s.text for s in segments).strip()
+    return text, time.time() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--model", default="distil-large-v3.5")
+    ap.add_argument("--device", default="cuda")
+    ap.add_argument("--compute-type", default=None)
+    ap.add_argument("--beam-size", type=int, default=1)
+    ap.add_argument("--speeds", default="1.2,1.4,1.6")
+    ap.add_argument("--target-wps", type=float, default=3.0)
+    ap.add_argument("--min-speed", type=float, default=1.0)
+    ap.add_argument("--max-speed", type=float, default=1.6)
+    ap.add_argument("--json", help="write per-file results here")
+    args = ap.parse_args()
+
+    from faster_whisper import WhisperModel
+    compute_type = args.compute_type or ("float16" if args.device == "cuda" else "int8")
+    model = WhisperModel(args.model, device=args.device, compute_type=compute_type)
+    fixed = [float(x) for x in args.speeds.split(",") if x]
+
+    results = []
+    totals = {}
+    for path in args.files:
+        base = audio_prep.decode_pcm(path)
+        if base is None:
+            print(f"  skip {path}: decode failed")
+            continue
+        audio_s = len(base) / audio_prep.SAMPLE_RATE
+        wps = audio_prep.estimate_wps(base[:audio_prep.SAMPLE_RATE * 90])
+        adaptive = audio_prep.choose_speed(wps, args.target_wps, args.min_speed, args.max_speed)
+
+        ref, ref_s = transcribe(model, base, args.beam_size)
+        row = {"file": os.path.basename(path), "audio_s": audio_s, "wps_probe": wps,
+               "wps_ref": len(ref.split()) / max(audio_s, 1), "adaptive_speed": adaptive,
+               "runs": {"1.0": {"decode_s": ref_s, "wer_vs_1x": 0.0}}}
+        for label, speed in [(str(s), s) for s in fixed] + [("adaptive", adaptive)]:
+            pcm = audio_prep.decode_pcm(path, speed=speed)
+            hyp, dec_s = transcribe(model, pcm, args.beam_size)
+            row["runs"][label] = {"speed": speed, "decode_s": dec_s,
+                                  "wer_vs_1x": asr_metrics.wer(ref, hyp)}
+        for label, r in row["runs"].items():
+            t = totals.setdefault(label, {"decode_s": 0.0, "wer_w": 0.0})
+            t["decode_s"] += r["decode_s"]
+            t["wer_w"] += r["wer_vs_1x"] * audio_s
+        totals.setdefault("_audio_s", 0.0)
+        totals["_audio_s"] += audio_s
+        results.append(row)
+        print(f"{row['file'][:40]:40s} {audio_s/60:6.1f}min wps(probe/ref)="
+              f"{(wps or 0):.2f}/{row['wps_ref']:.2f} -> {adaptive:.2f}x | " +
+              " | ".join(f"{k}: {v['decode_s']:.1f}s wer={v['wer_vs_1x']:.3f}"
+                         for k, v in row["runs"].items()), flush=True)
+
+    if not results:
+        return
+    audio_total = totals.pop("_audio_s")
+    base_s = totals["1.0"]["decode_s"]
+    print(f"\n{'speed':>10s} {'decode_s':>10s} {'RTF':>8s} {'GPU saved':>10s} {'WER vs 1x':>10s}")
+    for label, t in totals.items():
+        print(f"{label:>10s} {t['decode_s']:10.1f} {audio_total / max(t['decode_s'], 1e-9):7.0f}x "
+              f"{(1 - t['decode_s'] / base_s) * 100:9.1f}% {t['wer_w'] / audio_total:10.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
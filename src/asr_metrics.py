@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Transcript quality metrics: WER / CER without external deps.
+
+Levenshtein distance is computed row-by-row with numpy; the in-row deletion
+pass is a cumulative min, so a 10K x 10K word alignment takes ~1s. Cost is
+len(ref) x len(hyp), so `limit` scores only a leading span of long texts.
+"""
+import re
+import unicodedata
+import numpy as np
+
+_PUNCT = re.compile(r"[^\w\s']", re.UNICODE)
+
+
+def normalize(text):
+    """Lowercase, strip punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return " ".join(_PUNCT.sub(" ", text).split())
+
+
+def edit_distance(ref, hyp):
+    """Levenshtein distance between two token sequences (lists or strings)."""
+    if not ref:
+        return len(hyp)
+    if not hyp:
+        return len(ref)
+    vocab = {}
+    r = np.array([vocab.setdefault(t, len(vocab)) for t in ref], dtype=np.int64)
+    h = np.array([vocab.setdefault(t, len(vocab)) for t in hyp], dtype=np.int64)
+    ar = np.arange(len(h) + 1, dtype=np.int64)
+    row = ar.copy()
+    for i, tok in enumerate(r, 1):
+        sub = row[:-1] + (h != tok)
+        new = np.empty_like(row)
+        new[0] = i
+        new[1:] = np.minimum(sub, row[1:] + 1)
+        # insertions: new[j] = min_k<=j (new[k] + j - k)
+        row = np.minimum.accumulate(new - ar) + ar
+    return int(row[-1])
+
+
+def leading_span(ref, hyp, limit):
+    """First `limit` tokens of ref and the proportional share of hyp.
+
+    Both sides cover about the same stretch of audio; the cut edges add an
+    error of at most the length drift between them."""
+    if not limit or len(ref) <= limit:
+        return ref, hyp
+    return ref[:limit], hyp[:round(limit * len(hyp) / len(ref))]
+
+
+def wer(ref, hyp, limit=None):
+    ref_w, hyp_w = leading_span(normalize(ref).split(), normalize(hyp).split(), limit)
+    return edit_distance(ref_w, hyp_w) / max(len(ref_w), 1)
+
+
+def cer(ref, hyp, limit=None):
+    ref_c, hyp_c = leading_span(normalize(ref).replace(" ", ""), normalize(hyp).replace(" ", ""), limit)
+    return edit_distance(ref_c, hyp_c) / max(len(ref_c), 1)
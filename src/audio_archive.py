@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Content-addressed local store of downloaded audio, so re-runs skip YouTube.
+
+Files live under root/ab/cd/<sha256>.<ext> (identical bytes are stored
+once); the index is the `audio_archive` table in the main SQLite DB, keyed
+by video_id. The store is kept under a byte budget: eviction removes the
+lowest `rank` first (worker: 2 = green license, 1 = high priority, 0 = rest),
+least recently used within a rank.
+
+Files are hard-linked in and out when the temp dir is on the same
+filesystem, so archiving costs no extra I/O.
+
+    python3 src/audio_archive.py        # usage summary
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+
+DEFAULT_ROOT = os.path.expanduser("~/academic_transcriptions/audio_archive")
+HASH_BLOCK = 1 << 20
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    tmp = f"{dst}.tmp{os.getpid()}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class AudioArchive:
+    def __init__(self, db_path, root=DEFAULT_ROOT, budget_bytes=500 << 30):
+        self.db_path = db_path
+        self.root = root
+        self.budget_bytes = budget_bytes
+        os.makedirs(root, exist_ok=True)
+        conn = self._db()
+        conn.execute("""CREATE TABLE IF NOT EXISTS audio_archive (
+            video_id TEXT PRIMARY KEY,
+            sha256 TEXT,
+            ext TEXT,
+            bytes INTEGER,
+            duration REAL,
+            format TEXT,
+            rank INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            last_used REAL
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_audio_archive_sha ON audio_archive(sha256)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_audio_archive_evict ON audio_archive(rank, last_used)")
+        conn.commit()
+        conn.close()
+
+    def _db(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def path_for(self, sha, ext):
+        return os.path.join(self.root, sha[:2], sha[2:4], f"{sha}.{ext}")
+
+    def get(self, video_id):
+        """Index row as a dict (with "path"), or None. Drops rows whose file is gone."""
+        conn = self._db()
+        try:
+            row = conn.execute(
+                "SELECT sha256, ext, bytes, duration, format FROM audio_archive WHERE video_id=?",
+                (video_id,)).fetchone()
+            if not row:
+                return None
+            path = self.path_for(row[0], row[1])
+            if not os.path.exists(path):
+                conn.execute("DELETE FROM audio_archive WHERE video_id=?", (video_id,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE audio_archive SET last_used=? WHERE video_id=?",
+                         (time.time(), video_id))
+            conn.commit()
+            return {"path": path, "sha256": row[0], "bytes": row[2], "duration": row[3],
+                    "format": row[4]}
+        finally:
+            conn.close()
+
+    def checkout(self, video_id, dest_dir):
+        """Link/copy an archived file into dest_dir. Returns (path, entry) or None.
+
+        The caller owns the returned path and may delete it.
+        """
+        entry = self.get(video_id)
+        if not entry:
+            return None
+        dst = os.path.join(dest_dir, f"{video_id}{os.path.splitext(entry['path'])[1]}")
+        _link_or_copy(entry["path"], dst)
+        return dst, entry
+
+    def put(self, video_id, path, duration, fmt, rank=0):
+        """Archive a file for video_id, then evict down to the budget. Returns the sha256."""
+        sha = sha256_file(path)
+        ext = os.path.splitext(path)[1].lstrip(".") or "bin"
+        dst = self.path_for(sha, ext)
+        if not os.path.exists(dst):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            _link_or_copy(path, dst)
+        conn = self._db()
+        conn.execute(
+            "INSERT OR REPLACE INTO audio_archive "
+            "(video_id, sha256, ext, bytes, duration, format, rank, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (video_id, sha, ext, os.path.getsize(dst), duration, fmt, rank, time.time()))
+        conn.commit()
+        conn.close()
+        self.evict()
+        return sha
+
+    def usage(self, conn=None):
+        own = conn is None
+        conn = conn or self._db()
+        total = conn.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM "
+            "(SELECT sha256, MAX(bytes) AS bytes FROM audio_archive GROUP BY sha256)").fetchone()[0]
+        if own:
+            conn.close()
+        return total
+
+    def evict(self):
+        """Delete lowest-rank, least recently used entries until under budget. Returns bytes freed."""
+        conn = self._db()
+        freed = 0
+        try:
+            total = self.usage(conn)
+            if total <= self.budget_bytes:
+                return 0
+            rows = conn.execute(
+                "SELECT video_id, sha256, ext, bytes FROM audio_archive "
+                "ORDER BY rank, last_used").fetchall()
+            for video_id, sha, ext, size in rows:
+                if total - freed <= self.budget_bytes:
+                    break
+                conn.execute("DELETE FROM audio_archive WHERE video_id=?", (video_id,))
+                still_used = conn.execute("SELECT 1 FROM audio_archive WHERE sha256=? LIMIT 1",
+                                          (sha,)).fetchone()
+                if not still_used:
+                    try:
+                        os.unlink(self.path_for(sha, ext))
+                    except OSError:
+                        pass
+                    freed += size or 0
+            conn.commit()
+            return freed
+        finally:
+            conn.close()
+
+
+def main():
+    db_path = os.environ.get("DB_PATH", os.path.expanduser("~/academic_transcriptions/massive_production.db"))
+    archive = AudioArchive(db_path, os.environ.get("ARCHIVE_DIR", DEFAULT_ROOT))
+    conn = archive._db()
+    print(f"Archive: {archive.root}")
+    for rank, n, size, hours in conn.execute(
+            "SELECT rank, COUNT(*), SUM(bytes), SUM(duration)/3600.0 FROM audio_archive "
+            "GROUP BY rank ORDER BY rank DESC"):
+        print(f"  rank {rank}: {n:,} videos, {(size or 0)/1e9:.1f} GB, {hours or 0:.0f} audio-h")
+    print(f"  total: {archive.usage(conn)/1e9:.1f} GB")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Audio preparation for the GPU worker: PCM decode + dead-air trimming.
+
+Runs in the prefetch threads (CPU), so the GPU only ever sees speech:
+- decode_pcm(): ffmpeg → 16 kHz mono int16 PCM (what Whisper consumes anyway)
+- find_silences(): vectorized frame-energy gap detector (no Silero, no torch)
+- compact(): cut long gaps out of the buffer, return an offset map so
+  segment timestamps can be mapped back to the uncut timeline
+- estimate_wps() / choose_speed(): per-video atempo factor from speech rate
+"""
+import subprocess
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 50          # energy frame size
+SILENCE_DB = -45.0     # frame RMS below this (dBFS) counts as silent
+MIN_SILENCE_S = 3.0    # only cut gaps at least this long
+KEEP_PAD_S = 0.5       # leave this much silence on each side of a cut
+CHUNK_FRAMES = 4096    # frames per float32 block in frame_db (~13 MB at 50 ms)
+
+
+def decode_pcm(path, speed=1.0, start=None, duration=None, timeout=600):
+    """Decode any audio file to 16 kHz mono int16 PCM, optionally sped up via atempo.
+
+    start/duration (seconds, original timeline) decode just a window, e.g. a probe.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-v", "quiet"]
+    if start:
+        cmd += ["-ss", str(start)]
+    if duration:
+        cmd += ["-t", str(duration)]
+    cmd += ["-i", path]
+    if speed and speed != 1.0:
+        cmd += ["-filter:a", f"atempo={speed}"]
+    cmd += ["-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"]
+    r = subprocess.run(cmd, capture_output=True, timeout=timeout)
+    if r.returncode != 0 or not r.stdout:
+        return None
+    return np.frombuffer(r.stdout, dtype=np.int16)
+
+
+def frame_db(pcm, sr=SAMPLE_RATE, frame_ms=FRAME_MS):
+    """Per-frame RMS level in dBFS. Trailing partial frame is dropped.
+
+    Squares are summed CHUNK_FRAMES frames at a time, so a multi-hour buffer
+    never gets a whole-length float copy next to it.
+    """
+    flen = int(sr * frame_ms / 1000)
+    n = len(pcm) // flen
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = pcm[:n * flen].reshape(n, flen)
+    ms = np.empty(n, dtype=np.float64)
+    for i in range(0, n, CHUNK_FRAMES):
+        chunk = frames[i:i + CHUNK_FRAMES].astype(np.float32)
+        ms[i:i + len(chunk)] = np.einsum("ij,ij->i", chunk, chunk) / flen
+    rms = np.sqrt(ms) / 32768.0
+    return (20 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+
+def find_silences(pcm, sr=SAMPLE_RATE, threshold_db=SILENCE_DB,
+                  min_silence_s=MIN_SILENCE_S, frame_ms=FRAME_MS):
+    """Return (n, 2) int64 array of [start, end) sample ranges of long silences."""
+    db = frame_db(pcm, sr, frame_ms)
+    if len(db) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    silent = np.concatenate(([False], db < threshold_db, [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]  # frame indices, end exclusive
+    flen = int(sr * frame_ms / 1000)
+    long_ = (ends - starts) * frame_ms / 1000 >= min_silence_s
+    return np.stack([starts[long_], ends[long_]], axis=1).astype(np.int64) * flen
+
+
+def compact(pcm, silences, sr=SAMPLE_RATE, keep_pad_s=KEEP_PAD_S):
+    """Cut silences out of pcm.
+
+    Returns (compacted_pcm, offset_map) where offset_map is a (k, 2) float64
+    array of [compacted_start_s, source_start_s] for each kept chunk.
+    """
+    pad = int(keep_pad_s * sr)
+    if len(silences):
+        cut = silences + np.array([pad, -pad])
+        cut = cut[cut[:, 1] > cut[:, 0]]
+    else:
+        cut = silences
+    if len(cut) == 0:
+        return pcm, np.zeros((1, 2), dtype=np.float64)
+
+    keep_starts = np.concatenate(([0], cut[:, 1]))
+    keep_ends = np.concatenate((cut[:, 0], [len(pcm)]))
+    lens = keep_ends - keep_starts
+    out = np.concatenate([pcm[s:e] for s, e in zip(keep_starts, keep_ends)])
+    comp_starts = np.concatenate(([0], np.cumsum(lens)[:-1]))
+    offset_map = np.stack([comp_starts, keep_starts], axis=1).astype(np.float64) / sr
+    return out, offset_map
+
+
+def to_source_time(t, offset_map):
+    """Map compacted-timeline seconds (scalar or array) back to the source timeline."""
+    t = np.asarray(t, dtype=np.float64)
+    idx = np.searchsorted(offset_map[:, 0], t, side="right") - 1
+    idx = np.clip(idx, 0, len(offset_map) - 1)
+    return offset_map[idx, 1] + (t - offset_map[idx, 0])
+
+
+def trim_silence(pcm, sr=SAMPLE_RATE, threshold_db=SILENCE_DB,
+                 min_silence_s=MIN_SILENCE_S, keep_pad_s=KEEP_PAD_S):
+    """Detect + cut dead air. Returns (compacted_pcm, offset_map, seconds_removed)."""
+    silences = find_silences(pcm, sr, threshold_db, min_silence_s)
+    out, offset_map = compact(pcm, silences, sr, keep_pad_s)
+    return out, offset_map, (len(pcm) - len(out)) / sr
+
+
+def to_compacted_time(t, offset_map):
+    """Inverse of to_source_time. Times inside a cut gap snap to the next kept chunk."""
+    t = np.asarray(t, dtype=np.float64)
+    idx = np.searchsorted(offset_map[:, 1], t, side="right") - 1
+    idx = np.clip(idx, 0, len(offset_map) - 1)
+    comp = offset_map[idx, 0] + (t - offset_map[idx, 1])
+    nxt = np.minimum(idx + 1, len(offset_map) - 1)
+    chunk_end = np.where(nxt > idx, offset_map[nxt, 0], np.inf)
+    return np.minimum(comp, chunk_end)
+
+
+# === Speech rate ===
+SYLLABLES_PER_WORD = 1.5   # rough cross-language average for lecture speech
+ENV_FRAME_MS = 10
+
+
+def estimate_wps(pcm, sr=SAMPLE_RATE, threshold_db=SILENCE_DB):
+    """Estimate words/sec from the energy envelope (syllable-nucleus peak counting).
+
+    Cheap CPU probe — no model involved. Counts local maxima of the smoothed
+    envelope that rise >= 6 dB above the preceding dip and are >= 100 ms apart,
+    divided by speaking time (pauses >= 300 ms excluded). Returns None if
+    there's too little speech.
+    """
+    db = np.maximum(frame_db(pcm, sr, ENV_FRAME_MS), -90.0)
+    if len(db) < 100:
+        return None
+    env = np.convolve(db, np.ones(5) / 5, mode="same")
+    speech = env > threshold_db + 10
+    # Speaking time = everything except pauses >= 300 ms (inter-syllable dips count)
+    quiet = np.concatenate(([False], ~speech, [False]))
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    gaps = edges[1::2] - edges[0::2]
+    pause_frames = gaps[gaps >= 300 // ENV_FRAME_MS].sum()
+    speech_s = (len(env) - pause_frames) * ENV_FRAME_MS / 1000
+    if speech_s < 10:
+        return None
+    is_peak = (env[1:-1] > env[:-2]) & (env[1:-1] >= env[2:]) & speech[1:-1]
+    peaks = np.flatnonzero(is_peak) + 1
+    if len(peaks) < 2:
+        return None
+    # Prominence: peak vs the minimum between it and the previous peak
+    dips = np.minimum.reduceat(env, np.concatenate(([0], peaks[:-1])))
+    prominent = peaks[env[peaks] - dips >= 6.0]
+    # Enforce >= 100 ms between syllables
+    min_gap = 100 // ENV_FRAME_MS
+    keep = np.concatenate(([True], np.diff(prominent) >= min_gap)) if len(prominent) else prominent
+    syllables = int(np.count_nonzero(keep))
+    return syllables / speech_s / SYLLABLES_PER_WORD
+
+
+def choose_speed(wps, target_wps, lo, hi, step=0.05, default=1.2):
+    """Fastest atempo in [lo, hi] keeping sped-up speech under target_wps."""
+    if not wps or wps <= 0:
+        return default
+    speed = target_wps / wps
+    speed = np.floor(speed / step + 1e-9) * step   # 1.2 / 0.05 is 23.999...
+    return float(round(min(max(speed, lo), hi), 2))
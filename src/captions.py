@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Human-authored caption tracks as a transcript source (no GPU, no audio).
+
+yt-dlp's `-j` info dict lists uploader captions under `subtitles` and
+YouTube's ASR under `automatic_captions`; only the former is used here.
+Tracks are fetched as json3 (or WebVTT when json3 isn't offered) and
+normalized to the worker's segment format: [[start_s, end_s, text], ...].
+"""
+import html
+import json
+import re
+
+PREFERRED_EXTS = ("json3", "vtt")
+MIN_WPS = 0.8       # fewer words/sec than this = partial or placeholder track
+_NOISE = re.compile(r"^\s*[\[\(♪][^\]\)]*[\]\)♪]?\s*$")   # [Music], (applause), ♪
+_VTT_TIME = re.compile(r"(?:(\d+):)?(\d+):(\d+)\.(\d+)\s+-->\s+(?:(\d+):)?(\d+):(\d+)\.(\d+)")
+_TAG = re.compile(r"<[^>]+>")
+
+
+def pick_track(info, lang=None):
+    """Return (lang, ext, url) of a manual track in the video's language, or None.
+
+    lang defaults to the video's declared language; "en" matches "en-US" etc.
+    """
+    subs = info.get("subtitles") or {}
+    lang = (lang or info.get("language") or "").lower()
+    if not lang:
+        return None
+    for key, tracks in subs.items():
+        k = key.lower()
+        if k == "live_chat" or not (k == lang or k.split("-")[0] == lang.split("-")[0]):
+            continue
+        by_ext = {t.get("ext"): t.get("url") for t in tracks or [] if t.get("url")}
+        for ext in PREFERRED_EXTS:
+            if by_ext.get(ext):
+                return key, ext, by_ext[ext]
+    return None
+
+
+def parse_json3(data):
+    segments = []
+    for ev in json.loads(data).get("events", []):
+        text = "".join(s.get("utf8", "") for s in ev.get("segs") or []).replace("\n", " ").strip()
+        if not text or _NOISE.match(text):
+            continue
+        start = ev.get("tStartMs", 0) / 1000
+        segments.append([round(start, 2), round(start + ev.get("dDurationMs", 0) / 1000, 2), text])
+    return segments
+
+
+def _vtt_seconds(h, m, s, frac):
+    return int(h or 0) * 3600 + int(m) * 60 + int(s) + int(frac) / 10 ** len(frac)
+
+
+def parse_vtt(data):
+    segments, cur = [], None
+    for line in data.splitlines():
+        m = _VTT_TIME.search(line)
+        if m:
+            g = m.groups()
+            cur = [round(_vtt_seconds(*g[:4]), 2), round(_vtt_seconds(*g[4:]), 2), []]
+            segments.append(cur)
+        elif cur is not None and line.strip():
+            cur[2].append(html.unescape(_TAG.sub("", line)).strip())
+        else:
+            cur = None
+    out = []
+    for start, end, lines in segments:
+        text = " ".join(l for l in lines if l)
+        if text and not _NOISE.match(text) and (not out or out[-1][2] != text):
+            out.append([start, end, text])
+    return out
+
+
+def fetch_segments(pool, url, ext):
+    """Download and parse one track. Raises on HTTP errors."""
+    with pool.request("GET", url) as resp:
+        body = resp.read().decode("utf-8", "replace")
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status} fetching captions")
+    return parse_json3(body) if ext == "json3" else parse_vtt(body)
+
+
+def to_transcript(segments):
+    return " ".join(" ".join(s[2].split()) for s in segments).strip()
+
+
+def usable(segments, duration_s):
+    """Dense enough to stand in for a Whisper transcript?"""
+    if not segments or not duration_s:
+        return False
+    return len(to_transcript(segments).split()) / duration_s >= MIN_WPS
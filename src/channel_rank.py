@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Channel authority: personalized PageRank over `channel_discoveries`.
+
+Every featured/related-channel link the crawler records is an edge
+from_channel -> to_channel. The edge list is loaded once into int32 arrays
+(channel IDs mapped to dense indices with np.unique) and iterated with
+np.bincount, so millions of edges take seconds, not a Python loop per edge.
+
+The teleport vector is the channels whose videos turned out well: a
+channel's seed weight is its completion rate plus GREEN_WEIGHT times its
+green-license rate, over the videos in massive_production.db with that
+`channel_id` (not `university`: names collide, and most rows carry a
+crawler tag such as 'related' there). Rows ingested before crawlers
+recorded channel_id are backfilled once per run where their university
+or course unambiguously holds a channel ID. Authority then flows along the links
+those channels vouch for; UNIFORM_TELEPORT of the teleport mass goes to
+every channel so one nobody links to yet isn't scored 0. Scores are scaled
+so the mean channel has 1.0.
+
+Written back to:
+  - channels.authority in channels.db: frontier.py tilts its crawl order by it
+  - channel_authority (channel_id, authority) in massive_production.db: the
+    worker claims a share of each batch from the top-AUTHORITY_TOP channels
+
+Usage:
+    python3 src/channel_rank.py                  # rank once
+    python3 src/channel_rank.py --interval 3600  # re-rank every hour
+"""
+import argparse, itertools, os, sqlite3, time
+
+import numpy as np
+
+from discover_channels_10M import get_channels_db
+
+DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
+DAMPING = 0.85
+TOL = 1e-9                 # L1 change per iteration to stop at
+MAX_ITER = 100
+GREEN_WEIGHT = 1.0         # a green-license video counts this much on top of completion
+MIN_VIDEOS = 5             # channels with fewer known videos don't seed
+ID_WIDTH = 24              # 'UC' + 22 chars (even, so rows view as whole uint64 words)
+HASH_MULT = 0x100000001B3
+UNIFORM_TELEPORT = 0.2     # teleport share spread over all channels, so unlinked ones aren't 0
+
+
+def _keys(ids):
+    """64-bit polynomial hash of each fixed-width ID (vectorized over its UCS-4 words;
+    a collision among a few million channel IDs has odds of ~1e-7)."""
+    words = ids.view(np.uint64).reshape(len(ids), -1)        # 2 code points per word
+    key = np.zeros(len(ids), dtype=np.uint64)
+    for col in words.T:
+        key = key * np.uint64(HASH_MULT) + col
+    return key
+
+
+def load_edges(cdb):
+    """(channel IDs, src index array, dst index array) from channel_discoveries.
+
+    IDs are mapped to dense indices through np.unique on 64-bit hashes;
+    np.unique on the strings themselves is several times slower."""
+    rows = cdb.execute("SELECT from_channel, to_channel FROM channel_discoveries").fetchall()
+    names = cdb.execute("SELECT channel_id FROM channels").fetchall()
+    ends = np.fromiter(itertools.chain(itertools.chain.from_iterable(rows), (r[0] for r in names)),
+                       dtype=f"U{ID_WIDTH}", count=2 * len(rows) + len(names))
+    _, first, idx = np.unique(_keys(ends), return_index=True, return_inverse=True)
+    idx = idx[:2 * len(rows)].astype(np.int32)
+    return ends[first], idx[0::2], idx[1::2]
+
+
+def backfill_channel_ids(conn):
+    """Set videos.channel_id where an older row's university or course is a
+    bare channel ID or a 'channel:'/'cc_channel:' tag. Returns rows updated."""
+    is_id = "(length({0}) = 24 AND {0} LIKE 'UC%')"
+    before = conn.total_changes
+    with conn:
+        conn.execute(f"UPDATE videos SET channel_id = university "
+                     f"WHERE channel_id IS NULL AND {is_id.format('university')}")
+        for prefix in ("channel:", "cc_channel:"):
+            tail = f"substr(course, {len(prefix) + 1})"
+            conn.execute(f"UPDATE videos SET channel_id = {tail} WHERE channel_id IS NULL "
+                         f"AND course LIKE '{prefix}%' AND {is_id.format(tail)}")
+    return conn.total_changes - before
+
+
+def seed_weights(conn, ids):
+    """Teleport weight per channel index from its videos' completion and green rates."""
+    rows = conn.execute(
+        "SELECT channel_id, COUNT(*), SUM(status = 'completed'), SUM(license_risk = 'green') "
+        "FROM videos WHERE channel_id IS NOT NULL GROUP BY channel_id").fetchall()
+    index = {ch: i for i, ch in enumerate(ids)}
+    seeds = np.zeros(len(ids))
+    for ch_id, n, done, green in rows:
+        if ch_id in index and n >= MIN_VIDEOS and (done or green):
+            seeds[index[ch_id]] = (done + GREEN_WEIGHT * green) / n
+    return seeds
+
+
+def pagerank(src, dst, n, seeds=None, damping=DAMPING, tol=TOL, max_iter=MAX_ITER):
+    """Personalized PageRank; returns (scores summing to 1, iterations)."""
+    p = np.full(n, 1.0 / n)
+    if seeds is not None and seeds.sum() > 0:
+        p = (1 - UNIFORM_TELEPORT) * seeds / seeds.sum() + UNIFORM_TELEPORT * p
+    out = np.bincount(src, minlength=n).astype(np.float64)
+    dangling = out == 0
+    inv_out = np.divide(1.0, out, out=np.zeros(n), where=~dangling)
+    r = p.copy()
+    for it in range(1, max_iter + 1):
+        spread = np.bincount(dst, weights=(r * inv_out)[src], minlength=n)
+        new = damping * spread + (damping * r[dangling].sum() + 1 - damping) * p
+        delta = np.abs(new - r).sum()
+        r = new
+        if delta < tol:
+            break
+    return r, it
+
+
+def write_back(cdb, conn, ids, scores):
+    with cdb:
+        cdb.executemany("UPDATE channels SET authority=? WHERE channel_id=?",
+                        zip(scores.tolist(), ids.tolist()))
+    if "university" in {r[1] for r in conn.execute("PRAGMA table_info(channel_authority)")}:
+        conn.execute("DROP TABLE channel_authority")      # old name-keyed layout
+    conn.execute("""CREATE TABLE IF NOT EXISTS channel_authority (
+        channel_id TEXT PRIMARY KEY,
+        authority REAL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_channel_authority ON channel_authority(authority)")
+    with conn:
+        conn.execute("DELETE FROM channel_authority")
+        conn.executemany("INSERT OR REPLACE INTO channel_authority VALUES (?, ?)",
+                         zip(ids.tolist(), scores.tolist()))
+
+
+def rank_once(db_path=DB_PATH):
+    cdb = get_channels_db()
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    try:
+        t0 = time.time()
+        ids, src, dst = load_edges(cdb)
+        if not len(ids):
+            print("[rank] no channels yet", flush=True)
+            return
+        seeds = seed_weights(conn, ids)
+        t1 = time.time()
+        scores, iters = pagerank(src, dst, len(ids), seeds)
+        t2 = time.time()
+        scores *= len(ids)                  # mean channel = 1.0
+        write_back(cdb, conn, ids, scores)
+        top = np.argsort(-scores)[:5]
+        print(f"[rank] {len(ids):,} channels, {len(src):,} edges, {int((seeds > 0).sum()):,} seeds | "
+              f"load {t1 - t0:.1f}s, {iters} iterations {t2 - t1:.2f}s, write {time.time() - t2:.1f}s",
+              flush=True)
+        print("[rank] top: " + ", ".join(f"{ids[i]} {scores[i]:.1f}" for i in top), flush=True)
+    finally:
+        cdb.close()
+        conn.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--interval", type=float, default=0, help="re-rank every N seconds (0: once)")
+    args = ap.parse_args()
+    db_path = os.environ.get("DB_PATH", DB_PATH)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        print(f"[rank] backfilled channel_id on {backfill_channel_ids(conn):,} videos", flush=True)
+    finally:
+        conn.close()
+    while True:
+        rank_once(db_path)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Streaming guards over faster-whisper's lazy segment generator.
+
+faster-whisper only decodes the next 30s window when the next segment is
+pulled, so breaking out of the generator stops GPU work immediately.
+
+RepetitionGuard: catches runaway decodes (Whisper looping the same phrase
+over music/noise) via n-gram repetition + zlib compression ratio over a
+sliding window of recent segments.
+
+TimeBudgetGuard: soft per-video time budget derived from audio duration and
+the worker's measured realtime factor. Only fires between segments — a
+decoder hung inside CTranslate2 needs the worker's hard watchdog instead.
+"""
+import time
+import zlib
+from collections import deque
+
+
+class RunawayDecode(Exception):
+    """Raised to abort a transcription. `code` is stored as the video's error."""
+
+    def __init__(self, code, detail=""):
+        super().__init__(f"{code}: {detail}" if detail else code)
+        self.code = code
+        self.detail = detail
+
+
+def ngram_repeat_ratio(words, n=4):
+    """Fraction of n-grams in `words` that are repeats (0 = all unique)."""
+    if len(words) < n + 1:
+        return 0.0
+    grams = [tuple(words[i:i + n]) for i in range(len(words) - n + 1)]
+    return 1.0 - len(set(grams)) / len(grams)
+
+
+def compression_ratio(text):
+    """Same metric Whisper uses per segment; loops compress very well."""
+    b = text.encode("utf-8")
+    if not b:
+        return 0.0
+    return len(b) / len(zlib.compress(b))
+
+
+class RepetitionGuard:
+    """Trip after `patience` consecutive segments whose window looks like a loop."""
+
+    def __init__(self, window=20, ngram=4, max_repeat=0.5, max_compression=4.0,
+                 patience=10, min_words=40):
+        self.texts = deque(maxlen=window)
+        self.ngram = ngram
+        self.max_repeat = max_repeat
+        self.max_compression = max_compression
+        self.patience = patience
+        self.min_words = min_words
+        self.bad_streak = 0
+        self.last_repeat = 0.0
+        self.last_compression = 0.0
+
+    def update(self, text):
+        """Feed one segment's text. Returns True once a sustained loop is detected."""
+        self.texts.append(text.strip())
+        window = " ".join(self.texts)
+        words = window.lower().split()
+        if len(words) < self.min_words:
+            return False
+        self.last_repeat = ngram_repeat_ratio(words, self.ngram)
+        self.last_compression = compression_ratio(window)
+        if self.last_repeat > self.max_repeat or self.last_compression > self.max_compression:
+            self.bad_streak += 1
+        else:
+            self.bad_streak = 0
+        return self.bad_streak >= self.patience
+
+    def check(self, seg):
+        if self.update(seg.text):
+            raise RunawayDecode(
+                "hallucination_loop",
+                f"at {seg.end:.0f}s repeat={self.last_repeat:.2f} "
+                f"compression={self.last_compression:.1f}")
+
+
+def time_budget(audio_s, speed, slack=4.0, min_s=120.0):
+    """Seconds allowed to transcribe `audio_s` seconds at `speed`x realtime."""
+    return min_s + slack * audio_s / max(speed, 1.0)
+
+
+class TimeBudgetGuard:
+    """Abort once wall time since start exceeds `budget_s`."""
+
+    def __init__(self, budget_s, start=None):
+        self.budget_s = budget_s
+        self.deadline = (start or time.time()) + budget_s
+
+    def check(self, seg):
+        if time.time() > self.deadline:
+            raise RunawayDecode(
+                "transcribe_timeout",
+                f"budget {self.budget_s:.0f}s exceeded at {seg.end:.0f}s")
+
+
+def guard_segments(segments, *guards):
+    """Yield segments until a guard trips (guards raise RunawayDecode)."""
+    for seg in segments:
+        for guard in guards:
+            guard.check(seg)
+        yield seg
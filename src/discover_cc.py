@@ -7,9 +7,12 @@ Strategy:
 3. Crawl channels that have high CC rates
 4. Search for CC-licensed educational content
 """
-import sqlite3, subprocess, json, os, time, random, re, sys
+import sqlite3, json, os, time, random, re, sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import ingest
+import ytdlp_pool
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 COOKIE_DIR = os.path.expanduser("~/academic_transcriptions/cookie_pool")
@@ -50,26 +53,13 @@ def is_good(title, duration):
     return True
 
 def insert_videos(videos, source='cc_discovery'):
-    if not videos: return 0
-    conn = get_db()
-    n = 0
-    for v in videos:
+    def to_row(v):
         title = v.get('title', '')
         dur = v.get('duration') or 0
-        vid = v.get('id', '')
-        if not vid or not is_good(title, dur): continue
+        if not is_good(title, dur): return None
         pri = 9 if EDU_BOOST.search(title) else 7  # Higher base priority for CC-adjacent
-        try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
-                (vid, title, v.get('playlist', ''), source,
-                 f"https://youtube.com/watch?v={vid}", dur, pri))
-            n += 1
-        except sqlite3.IntegrityError:
-            pass
-    conn.commit(); conn.close()
-    return n
+        return (v['id'], title, v.get('playlist', ''), source, dur, pri, v.get('channel_id'))
+    return ingest.ingest_videos(DB_PATH, videos, to_row, columns=ingest.CHANNEL_COLUMNS)
 
 def get_cc_seeds(batch_size=100):
     """Get video IDs from GREEN/CC content as seeds."""
@@ -119,7 +109,7 @@ def fetch_related(video_id):
     if cookie: cmd.extend(["--cookies", cookie])
     
     try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        r = ytdlp_pool.run(cmd, timeout=30)
         if r.returncode != 0: return []
         j = json.loads(r.stdout)
         
@@ -143,7 +133,7 @@ def fetch_related(video_id):
         return []
 
 def crawl_channel(channel_id, max_videos=300):
-    """Crawl videos from a channel."""
+    """Crawl videos from a channel, yielding them as yt-dlp lists them."""
     cookie = get_cookie()
     url = f"https://www.youtube.com/channel/{channel_id}/videos"
     cmd = [YTDLP, url,
@@ -153,26 +143,17 @@ def crawl_channel(channel_id, max_videos=300):
            "--playlist-end", str(max_videos)]
     if cookie: cmd.extend(["--cookies", cookie])
     
-    try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
-        videos = []
-        for line in r.stdout.strip().split('\n'):
-            if not line: continue
-            try:
-                j = json.loads(line)
-                videos.append({
-                    'id': j.get('id', ''),
-                    'title': j.get('title', ''),
-                    'duration': j.get('duration') or 0,
-                    'playlist': f'cc_channel:{channel_id}',
-                })
-            except: pass
-        return videos
-    except:
-        return []
+    for j in ytdlp_pool.stream_json(cmd, timeout=180):
+        yield {
+            'id': j.get('id', ''),
+            'title': j.get('title', ''),
+            'duration': j.get('duration') or 0,
+            'playlist': f'cc_channel:{channel_id}',
+            'channel_id': channel_id,
+        }
 
 def yt_search(query, max_results=100):
-    """Search YouTube."""
+    """Search YouTube, yielding results as they arrive."""
     cookie = get_cookie()
     cmd = [YTDLP, f"ytsearch{max_results}:{query}",
            "--dump-json", "--flat-playlist", "--no-download",
@@ -181,23 +162,14 @@ def yt_search(query, max_results=100):
            "--match-filter", f"duration >= {MIN_DURATION}"]
     if cookie: cmd.extend(["--cookies", cookie])
     
-    try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        videos = []
-        for line in r.stdout.strip().split('\n'):
-            if not line: continue
-            try:
-                j = json.loads(line)
-                videos.append({
-                    'id': j.get('id', ''),
-                    'title': j.get('title', ''),
-                    'duration': j.get('duration'),
-                    'playlist': f'cc_search:{query[:50]}',
-                })
-            except: pass
-        return videos
-    except:
-        return []
+    for j in ytdlp_pool.stream_json(cmd, timeout=120):
+        yield {
+            'id': j.get('id', ''),
+            'title': j.get('title', ''),
+            'duration': j.get('duration'),
+            'playlist': f'cc_search:{query[:50]}',
+            'channel_id': j.get('channel_id'),
+        }
 
 # CC-focused search queries
 CC_SEARCHES = [
@@ -271,10 +243,14 @@ def main():
             # These are stored in university field from discovery
             print(f"  Crawling source '{src[:50]}' ({cc_count}/{total} = {pct:.0f}% CC)")
             # Search for more from this source
-            videos = yt_search(f"{src} lecture", 50)
-            n = insert_videos(videos, f'cc_channel_expand:{src[:30]}')
+            try:
+                listed, n = ingest.drain(yt_search(f"{src} lecture", 50), insert_videos,
+                                         f'cc_channel_expand:{src[:30]}')
+            except Exception as e:
+                print(f"    Search error: {e}")
+                listed, n = 0, 0
             round_added += n
-            print(f"    Found {len(videos)} videos, {n} new")
+            print(f"    Found {listed} videos, {n} new")
             time.sleep(random.uniform(2, 5))
         
         # Phase 3: CC-focused searches
@@ -285,10 +261,13 @@ def main():
         queries = random.sample(CC_SEARCHES, min(15, len(CC_SEARCHES)))
         for i, q in enumerate(queries):
             print(f"  [{i+1}/{len(queries)}] Searching: {q}")
-            videos = yt_search(q, 100)
-            n = insert_videos(videos, 'cc_search')
+            try:
+                listed, n = ingest.drain(yt_search(q, 100), insert_videos, 'cc_search')
+            except Exception as e:
+                print(f"    Search error: {e}")
+                listed, n = 0, 0
             round_added += n
-            print(f"    Found {len(videos)} videos, {n} new")
+            print(f"    Found {listed} videos, {n} new")
             time.sleep(random.uniform(3, 8))
         
         total_added += round_added
@@ -11,9 +11,13 @@ Strategy:
 This is the only way to 10x from 1.28M → 10M+.
 """
 
-import sqlite3, subprocess, json, os, time, random, re, sys
+import sqlite3, json, os, time, random, re, sys, itertools
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import frontier
+import ingest
+import ytdlp_pool
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 MIN_DURATION = 900
@@ -47,6 +51,41 @@ REJECT_CHANNELS = re.compile(
     re.IGNORECASE
 )
 
+GATE_SAMPLE = 50           # first page of a catalog the gate sees before the rest is listed
+# (edu ratio of the sample >=, most videos listed): low-ratio channels get a shallow crawl
+CATALOG_CAPS = ((0.6, None), (0.4, 5000), (0.25, 1000), (0.0, 300))
+DEFAULT_REJECTED_CATALOG = 500   # savings estimate until channels.db has fully listed rejects
+
+# Columns added on top of the original channels schema (added lazily, idempotent)
+EXTRA_CHANNEL_COLUMNS = {
+    "authority": "REAL",           # channel_rank.py
+    "listing_seconds": "REAL",     # yt-dlp listing time spent on the channel
+    "listing_bytes": "INTEGER",    # yt-dlp listing output spent on the channel
+    "saved_seconds": "REAL",       # rejected: estimated listing time the sample gate avoided
+    "saved_bytes": "INTEGER",
+}
+
+CHANNEL_SEARCH_QUERIES = [
+    "university lectures", "online courses", "MOOC", "academic talks",
+    "conference presentations", "MIT OpenCourseWare", "NPTEL",
+    "CS lectures", "math lectures", "physics lectures", "biology lectures",
+    "medical lectures", "engineering tutorials", "data science course",
+    "machine learning course", "deep learning lectures",
+    "programming tutorials", "algorithms course",
+    "economics lectures", "history lectures", "philosophy lectures",
+    "chemistry lectures", "astronomy lectures",
+    "курсы лекции университет", "Vorlesung Universität",
+    "cours magistral université", "lezioni università",
+    "wykłady uniwersytet", "강의 대학교", "大学 講義",
+    "IIT lectures", "Stanford online", "Yale courses",
+    "Harvard lectures", "Oxford talks", "Cambridge lectures",
+    "TED-Ed education", "Coursera lectures", "edX courses",
+    "cybersecurity training", "AWS training", "Google tech talks",
+    "PyCon talks", "JSConf talks", "GopherCon", "RustConf",
+    "NeurIPS", "ICML", "CVPR", "ACL conference",
+    "SIGCOMM", "USENIX", "DEF CON talks", "Black Hat",
+]
+
 def get_db():
     conn = sqlite3.connect(DB_PATH, timeout=30)
     conn.execute("PRAGMA journal_mode=WAL")
@@ -64,6 +103,10 @@ def get_channels_db():
         source TEXT DEFAULT 'extracted',
         status TEXT DEFAULT 'pending'
     )""")
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(channels)")}
+    for name, decl in EXTRA_CHANNEL_COLUMNS.items():
+        if name not in cols:
+            conn.execute(f"ALTER TABLE channels ADD COLUMN {name} {decl}")
     conn.execute("""CREATE TABLE IF NOT EXISTS channel_discoveries (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         from_channel TEXT,
@@ -71,37 +114,58 @@ def get_channels_db():
         discovered_at TEXT DEFAULT CURRENT_TIMESTAMP,
         UNIQUE(from_channel, to_channel)
     )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_discoveries_to ON channel_discoveries(to_channel)")
     conn.commit()
     return conn
 
 def insert_videos(videos, source='channel_crawl'):
-    if not videos:
-        return 0
-    conn = get_db()
-    n = 0
-    for v in videos:
+    def to_row(v):
         title = v.get('title', '')
         dur = v.get('duration')
         if dur is not None and dur < MIN_DURATION:
-            continue
+            return None
         if REJECT_PATTERNS.search(title or ''):
-            continue
+            return None
         pri = 8 if EDU_BOOST.search(title) else 5
-        vid = v.get('id', '')
-        if not vid:
-            continue
+        return (v['id'], title, v.get('playlist', ''), source, dur or 0, pri, v.get('channel_id'))
+    return ingest.ingest_videos(DB_PATH, videos, to_row, columns=ingest.CHANNEL_COLUMNS)
+
+
+def extract_channel(video_id):
+    """(channel_id, channel_name) of a video, or (None, None)."""
+    try:
+        r = ytdlp_pool.run(
+            [YTDLP, '--js-runtimes', 'node', '--print', 'channel_id',
+             '--print', 'channel', '--skip-download',
+             f'https://youtube.com/watch?v={video_id}'],
+            timeout=30)
+        lines = r.stdout.strip().split('\n')
+        if len(lines) >= 2 and lines[0].startswith('UC'):
+            return lines[0], lines[1]
+    except:
+        pass
+    return None, None
+
+
+def register_channels(cdb, channels, source, from_channel=None):
+    """Add (channel_id, name) pairs as pending channels. Returns how many were new."""
+    new = 0
+    for ch_id, ch_name in channels:
         try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
-                (vid, title, v.get('playlist', ''), source,
-                 f"https://youtube.com/watch?v={vid}", dur or 0, pri))
-            n += 1
+            cdb.execute(
+                "INSERT INTO channels (channel_id, channel_name, source) VALUES (?, ?, ?)",
+                (ch_id, ch_name, source))
+            new += 1
         except sqlite3.IntegrityError:
             pass
-    conn.commit()
-    conn.close()
-    return n
+        if from_channel:
+            try:
+                cdb.execute(
+                    "INSERT INTO channel_discoveries (from_channel, to_channel) VALUES (?, ?)",
+                    (from_channel, ch_id))
+            except sqlite3.IntegrityError:
+                pass
+    return new
 
 
 def extract_channels_from_db(batch_size=500):
@@ -121,22 +185,8 @@ def extract_channels_from_db(batch_size=500):
     
     new_channels = 0
     
-    def extract_one(video_id):
-        try:
-            r = subprocess.run(
-                [YTDLP, '--js-runtimes', 'node', '--print', 'channel_id',
-                 '--print', 'channel', '--skip-download',
-                 f'https://youtube.com/watch?v={video_id}'],
-                capture_output=True, text=True, timeout=30)
-            lines = r.stdout.strip().split('\n')
-            if len(lines) >= 2 and lines[0].startswith('UC'):
-                return lines[0], lines[1]
-        except:
-            pass
-        return None, None
-    
     with ThreadPoolExecutor(max_workers=8) as pool:
-        futures = {pool.submit(extract_one, r[0]): r[0] for r in rows}
+        futures = {pool.submit(extract_channel, r[0]): r[0] for r in rows}
         for f in as_completed(futures):
             ch_id, ch_name = f.result()
             if ch_id and ch_id not in known:
@@ -155,92 +205,78 @@ def extract_channels_from_db(batch_size=500):
     return new_channels
 
 
-def crawl_channel_full(channel_id, channel_name=""):
-    """Crawl ALL videos from a channel using yt-dlp flat playlist extraction."""
-    try:
-        r = subprocess.run(
-            [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '-J',
-             '--no-warnings', '--extractor-args', 'youtube:approximate_date',
-             f'https://www.youtube.com/channel/{channel_id}/videos'],
-            capture_output=True, text=True, timeout=120)
-        
-        if r.returncode != 0:
-            return [], []
-        
-        data = json.loads(r.stdout)
-        entries = data.get('entries', [])
-        
-        videos = []
-        for e in entries:
-            vid = e.get('id') or e.get('url', '').split('=')[-1]
-            if not vid or len(vid) != 11:
-                continue
-            videos.append({
-                'id': vid,
-                'title': e.get('title', ''),
-                'duration': e.get('duration'),
-                'playlist': channel_name or channel_id,
-            })
-        
-        # Also try to get featured/related channels
-        related_channels = []
-        try:
-            r2 = subprocess.run(
-                [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '-J',
-                 '--no-warnings',
-                 f'https://www.youtube.com/channel/{channel_id}/channels'],
-                capture_output=True, text=True, timeout=60)
-            if r2.returncode == 0:
-                data2 = json.loads(r2.stdout)
-                for e in data2.get('entries', []):
-                    rid = e.get('channel_id') or e.get('id', '')
-                    if rid.startswith('UC'):
-                        related_channels.append((rid, e.get('title', '')))
-        except:
-            pass
-        
-        return videos, related_channels
-    except Exception as ex:
-        print(f"  Error crawling {channel_id}: {ex}")
-        return [], []
+def crawl_channel_full(channel_id, channel_name="", start=1, end=None, stats=None):
+    """Crawl a channel's videos (catalog positions start..end, default all),
+    yielding them as yt-dlp lists them.
+
+    Streamed (--dump-json, not -J) so a catalog that outlasts the timeout
+    keeps everything enumerated so far. `stats` is passed to stream_json.
+    """
+    cmd = [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '--dump-json',
+           '--no-warnings', '--extractor-args', 'youtube:approximate_date']
+    if start > 1:
+        cmd += ['--playlist-start', str(start)]
+    if end:
+        cmd += ['--playlist-end', str(end)]
+    cmd.append(f'https://www.youtube.com/channel/{channel_id}/videos')
+    for e in ytdlp_pool.stream_json(cmd, timeout=120, stats=stats):
+        vid = e.get('id') or e.get('url', '').split('=')[-1]
+        if not vid or len(vid) != 11:
+            continue
+        yield {
+            'id': vid,
+            'title': e.get('title', ''),
+            'duration': e.get('duration'),
+            'playlist': channel_name or channel_id,
+            'channel_id': channel_id,
+        }
 
 
-def crawl_playlist(playlist_id):
-    """Crawl a YouTube playlist."""
+def fetch_related_channels(channel_id):
+    """Featured/related channels listed on a channel's page."""
+    related_channels = []
     try:
-        r = subprocess.run(
+        r2 = ytdlp_pool.run(
             [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '-J',
              '--no-warnings',
-             f'https://www.youtube.com/playlist?list={playlist_id}'],
-            capture_output=True, text=True, timeout=120)
-        
-        if r.returncode != 0:
-            return []
-        
-        data = json.loads(r.stdout)
-        videos = []
-        for e in data.get('entries', []):
-            vid = e.get('id') or e.get('url', '').split('=')[-1]
-            if not vid or len(vid) != 11:
-                continue
-            videos.append({
-                'id': vid,
-                'title': e.get('title', ''),
-                'duration': e.get('duration'),
-            })
-        return videos
+             f'https://www.youtube.com/channel/{channel_id}/channels'],
+            timeout=60)
+        if r2.returncode == 0:
+            data2 = json.loads(r2.stdout)
+            for e in data2.get('entries', []):
+                rid = e.get('channel_id') or e.get('id', '')
+                if rid.startswith('UC'):
+                    related_channels.append((rid, e.get('title', '')))
     except:
-        return []
+        pass
+    return related_channels
+
+
+def crawl_playlist(playlist_id):
+    """Crawl a YouTube playlist, yielding videos as yt-dlp lists them."""
+    cmd = [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '--dump-json',
+           '--no-warnings',
+           f'https://www.youtube.com/playlist?list={playlist_id}']
+    for e in ytdlp_pool.stream_json(cmd, timeout=120):
+        vid = e.get('id') or e.get('url', '').split('=')[-1]
+        if not vid or len(vid) != 11:
+            continue
+        yield {
+            'id': vid,
+            'title': e.get('title', ''),
+            'duration': e.get('duration'),
+            'channel_id': e.get('channel_id'),
+        }
 
 
 def discover_playlists_from_channel(channel_id):
     """Get all playlists from a channel."""
     try:
-        r = subprocess.run(
+        r = ytdlp_pool.run(
             [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '-J',
              '--no-warnings',
              f'https://www.youtube.com/channel/{channel_id}/playlists'],
-            capture_output=True, text=True, timeout=120)
+            timeout=120)
         
         if r.returncode == 0:
             data = json.loads(r.stdout)
@@ -255,6 +291,25 @@ def discover_playlists_from_channel(channel_id):
     return []
 
 
+def name_signal(channel_name):
+    """'reject' / 'edu' / 'plain' from the channel name alone (a frontier arm)."""
+    if REJECT_CHANNELS.search(channel_name or ''):
+        return 'reject'
+    if EDU_BOOST.search(channel_name or ''):
+        return 'edu'
+    return 'plain'
+
+
+def sample_ratios(videos):
+    """(share of educational titles, share of long videos) in the gate sample."""
+    sample = videos[:GATE_SAMPLE]
+    if not sample:
+        return 0.0, 0.0
+    edu_count = sum(1 for v in sample if EDU_BOOST.search(v.get('title', '')))
+    long_count = sum(1 for v in sample if (v.get('duration') or 0) >= MIN_DURATION)
+    return edu_count / len(sample), long_count / len(sample)
+
+
 def is_educational_channel(channel_name, videos):
     """Heuristic: is this channel worth crawling?"""
     if REJECT_CHANNELS.search(channel_name or ''):
@@ -263,16 +318,147 @@ def is_educational_channel(channel_name, videos):
     if not videos:
         return True  # give benefit of doubt, filter at video level
     
-    # Check sample of titles
-    edu_count = sum(1 for v in videos[:50] if EDU_BOOST.search(v.get('title', '')))
-    long_count = sum(1 for v in videos[:50] if (v.get('duration') or 0) >= MIN_DURATION)
+    # At least 20% educational titles OR 30% long videos
+    edu, long = sample_ratios(videos)
+    return edu >= 0.2 or long >= 0.3
+
+
+def catalog_cap(videos):
+    """How deep to list an accepted channel (None: whole catalog), from its sample's edu ratio."""
+    ratio = max(sample_ratios(videos))
+    for min_ratio, cap in CATALOG_CAPS:
+        if ratio >= min_ratio:
+            return cap
+
+
+_rejected_catalog = None
+_entry_cost = [0.0, 0.0]         # last sample's (seconds, bytes) per listed entry
+
+
+def rejected_catalog_size():
+    """Mean catalog size of rejects listed in full (before the sample gate)."""
+    global _rejected_catalog
+    if _rejected_catalog is None:
+        cdb = get_channels_db()
+        avg = cdb.execute("SELECT AVG(video_count) FROM channels WHERE status='rejected' "
+                          "AND video_count > ?", (GATE_SAMPLE,)).fetchone()[0]
+        cdb.close()
+        _rejected_catalog = avg or DEFAULT_REJECTED_CATALOG
+    return _rejected_catalog
+
+
+def estimate_saving(sample, stats):
+    """(seconds, bytes) a full crawl of a rejected channel would have spent beyond the
+    sample: the rest of an average rejected catalog at the sample's per-entry cost,
+    plus the /channels lookup (about one page, like the sample)."""
+    if stats.get('entries'):
+        _entry_cost[:] = [stats['seconds'] / stats['entries'], stats['bytes'] / stats['entries']]
+    per_s, per_bytes = _entry_cost
+    if stats and len(sample) < GATE_SAMPLE:
+        rest = 0                 # the sample was the whole catalog
+    else:
+        rest = max(rejected_catalog_size() - len(sample), 0)
+    page_s = stats.get('seconds') or per_s * GATE_SAMPLE
+    return rest * per_s + page_s, int(rest * per_bytes)
+
+
+def crawl_pending_channel(ch_id, ch_name):
+    """Gate a channel on its first GATE_SAMPLE videos, then list and insert the rest
+    (up to catalog_cap) and register its related channels.
+
+    Rejected channels cost one page and no /channels lookup; the listing they
+    would have cost is estimated into saved_seconds/saved_bytes.
+
+    Returns {'accepted', 'videos' (listed), 'new' (inserted), 'related', 'related_new',
+    'requests' (yt-dlp calls made), 'saved_seconds', 'saved_bytes'}.
+    """
+    res = {'accepted': False, 'videos': 0, 'new': 0, 'related': 0, 'related_new': 0,
+           'requests': 0, 'saved_seconds': 0.0, 'saved_bytes': 0}
+    stats = {}
+    sample = []
+    if not REJECT_CHANNELS.search(ch_name or ''):   # a name reject needs no sample
+        sample = list(crawl_channel_full(ch_id, ch_name, end=GATE_SAMPLE, stats=stats))
+        res['requests'] += 1
     
-    sample = min(len(videos), 50)
-    if sample == 0:
-        return True
+    cdb = get_channels_db()
+    try:
+        if not is_educational_channel(ch_name, sample):
+            res['videos'] = len(sample)
+            res['saved_seconds'], res['saved_bytes'] = estimate_saving(sample, stats)
+            cdb.execute(
+                "UPDATE channels SET status='rejected', video_count=?, listing_seconds=?, "
+                "listing_bytes=?, saved_seconds=?, saved_bytes=?, crawled_at=CURRENT_TIMESTAMP "
+                "WHERE channel_id=?",
+                (res['videos'], stats.get('seconds', 0.0), stats.get('bytes', 0),
+                 res['saved_seconds'], res['saved_bytes'], ch_id))
+            cdb.commit()
+            return res
+        
+        # Accepted: list the rest of the catalog as deep as the sample earns
+        rest = ()
+        cap = catalog_cap(sample)
+        if len(sample) >= GATE_SAMPLE and (cap is None or cap > GATE_SAMPLE):
+            rest = crawl_channel_full(ch_id, ch_name, start=GATE_SAMPLE + 1, end=cap, stats=stats)
+            res['requests'] += 1
+        res['videos'], res['new'] = ingest.drain(itertools.chain(sample, rest), insert_videos,
+                                                 source=ch_name or ch_id)
+        related = fetch_related_channels(ch_id)
+        res['requests'] += 1
+        res['accepted'] = True
+        res['related'] = len(related)
+        res['related_new'] = register_channels(cdb, related, 'related', from_channel=ch_id)
+        
+        # Mark channel as crawled
+        cdb.execute(
+            "UPDATE channels SET status='crawled', video_count=?, edu_video_count=?, "
+            "listing_seconds=?, listing_bytes=?, crawled_at=CURRENT_TIMESTAMP WHERE channel_id=?",
+            (res['videos'], res['new'], stats.get('seconds', 0.0), stats.get('bytes', 0), ch_id))
+        cdb.commit()
+        return res
+    finally:
+        cdb.close()
+
+
+def crawl_channel_playlists(ch_id, source, cap=20):
+    """Crawl up to `cap` playlists of a channel. Returns (playlists found, new videos)."""
+    playlists = discover_playlists_from_channel(ch_id)
+    new = 0
+    for pid, pname in playlists[:cap]:
+        new += crawl_channel_playlist(pid, pname, source)
+    return len(playlists), new
+
+
+def crawl_channel_playlist(pid, pname, source):
+    pl_videos = ({**v, 'playlist': pname} for v in crawl_playlist(pid))
+    return ingest.drain(pl_videos, insert_videos, source=source)[1]
+
+
+def search_channels(query):
+    """Search for lecture videos; register their channels and insert the videos.
+    Returns (new channels, new videos)."""
+    try:
+        r = ytdlp_pool.run(
+            [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '-J',
+             '--no-warnings',
+             f'ytsearch20:{query} full course lecture'],
+            timeout=60)
+        if r.returncode != 0:
+            return 0, 0
+        entries = json.loads(r.stdout).get('entries', [])
+    except:
+        return 0, 0
     
-    # At least 20% educational titles OR 30% long videos
-    return (edu_count / sample >= 0.2) or (long_count / sample >= 0.3)
+    channels = [(e.get('channel_id', ''), e.get('channel', '')) for e in entries]
+    cdb = get_channels_db()
+    ch_new = register_channels(cdb, [c for c in channels if c[0].startswith('UC')], 'search')
+    cdb.commit()
+    cdb.close()
+    
+    # Also insert the videos themselves
+    videos = [{'id': e.get('id', ''), 'title': e.get('title', ''), 'duration': e.get('duration'),
+               'channel_id': e.get('channel_id')}
+              for e in entries if len(e.get('id') or '') == 11]
+    return ch_new, insert_videos(videos, source='channel_search')
 
 
 def main():
@@ -281,6 +467,7 @@ def main():
     print("=" * 60)
     
     cdb = get_channels_db()
+    fr = frontier.Frontier(get_channels_db, name_signal)
     total_start = get_db().execute("SELECT COUNT(*) FROM videos").fetchone()[0]
     print(f"Starting DB size: {total_start:,}")
     
@@ -308,131 +495,47 @@ def main():
                 "SELECT COUNT(*) FROM channels WHERE status='pending'").fetchone()[0]
             print(f"Pending channels after extraction: {pending_channels:,}")
         
-        # Phase 2: Crawl pending channels
+        # Phase 2: Crawl pending channels, best expected yield first
         print(f"\n[Phase 2] Crawling channels...")
-        channels = cdb.execute(
-            "SELECT channel_id, channel_name FROM channels WHERE status='pending' "
-            "ORDER BY RANDOM() LIMIT 100").fetchall()
+        print(f"  Frontier: {fr.describe()}")
+        channels = fr.pick(100)
         
         round_new = 0
         new_channels_found = 0
+        saved_s = saved_bytes = 0
         
         for i, (ch_id, ch_name) in enumerate(channels):
-            videos, related = crawl_channel_full(ch_id, ch_name)
-            
-            # Check if educational
-            if not is_educational_channel(ch_name, videos):
-                cdb.execute(
-                    "UPDATE channels SET status='rejected', video_count=?, crawled_at=CURRENT_TIMESTAMP "
-                    "WHERE channel_id=?", (len(videos), ch_id))
-                cdb.commit()
-                print(f"  [{i+1}/{len(channels)}] {ch_name or ch_id[:12]} — REJECTED ({len(videos)} videos)")
+            res = crawl_pending_channel(ch_id, ch_name)
+            fr.record(ch_id, res['new'], res['requests'])
+            if not res['accepted']:
+                saved_s += res['saved_seconds']
+                saved_bytes += res['saved_bytes']
+                print(f"  [{i+1}/{len(channels)}] {ch_name or ch_id[:12]} — REJECTED "
+                      f"({res['videos']} sampled, ~{res['saved_seconds']:.0f}s listing saved)")
                 continue
-            
-            # Insert videos
-            n = insert_videos(videos, source=ch_name or ch_id)
-            round_new += n
+            round_new += res['new']
+            new_channels_found += res['related_new']
             
             # Also crawl playlists for this channel
-            playlists = discover_playlists_from_channel(ch_id)
-            pl_new = 0
-            for pid, pname in playlists[:20]:  # cap at 20 playlists per channel
-                pl_videos = crawl_playlist(pid)
-                pl_n = insert_videos([{**v, 'playlist': pname} for v in pl_videos], source=ch_name or ch_id)
-                pl_new += pl_n
-            
+            n_playlists, pl_new = crawl_channel_playlists(ch_id, ch_name or ch_id)
             round_new += pl_new
             
-            # Register related channels
-            for rch_id, rch_name in related:
-                try:
-                    cdb.execute(
-                        "INSERT INTO channels (channel_id, channel_name, source) VALUES (?, ?, 'related')",
-                        (rch_id, rch_name))
-                    new_channels_found += 1
-                except sqlite3.IntegrityError:
-                    pass
-                try:
-                    cdb.execute(
-                        "INSERT INTO channel_discoveries (from_channel, to_channel) VALUES (?, ?)",
-                        (ch_id, rch_id))
-                except sqlite3.IntegrityError:
-                    pass
-            
-            # Mark channel as crawled
-            cdb.execute(
-                "UPDATE channels SET status='crawled', video_count=?, edu_video_count=?, "
-                "crawled_at=CURRENT_TIMESTAMP WHERE channel_id=?",
-                (len(videos), n, ch_id))
-            cdb.commit()
-            
-            total_vids = len(videos)
             print(f"  [{i+1}/{len(channels)}] {ch_name or ch_id[:12]:40s} "
-                  f"vids: {total_vids:>5} | +{n + pl_new:>4} new | "
-                  f"playlists: {len(playlists):>3} | related_ch: {len(related):>3}")
+                  f"vids: {res['videos']:>5} | +{res['new'] + pl_new:>4} new | "
+                  f"playlists: {n_playlists:>3} | related_ch: {res['related']:>3}")
             
             # Rate limit slightly
             time.sleep(0.5)
         
         # Phase 3: Search for MORE educational channels directly
         print(f"\n[Phase 3] Searching for educational channels...")
-        channel_search_queries = [
-            "university lectures", "online courses", "MOOC", "academic talks",
-            "conference presentations", "MIT OpenCourseWare", "NPTEL",
-            "CS lectures", "math lectures", "physics lectures", "biology lectures",
-            "medical lectures", "engineering tutorials", "data science course",
-            "machine learning course", "deep learning lectures",
-            "programming tutorials", "algorithms course",
-            "economics lectures", "history lectures", "philosophy lectures",
-            "chemistry lectures", "astronomy lectures",
-            "курсы лекции университет", "Vorlesung Universität",
-            "cours magistral université", "lezioni università",
-            "wykłady uniwersytet", "강의 대학교", "大学 講義",
-            "IIT lectures", "Stanford online", "Yale courses",
-            "Harvard lectures", "Oxford talks", "Cambridge lectures",
-            "TED-Ed education", "Coursera lectures", "edX courses",
-            "cybersecurity training", "AWS training", "Google tech talks",
-            "PyCon talks", "JSConf talks", "GopherCon", "RustConf",
-            "NeurIPS", "ICML", "CVPR", "ACL conference",
-            "SIGCOMM", "USENIX", "DEF CON talks", "Black Hat",
-        ]
+        channel_search_queries = list(CHANNEL_SEARCH_QUERIES)
         random.shuffle(channel_search_queries)
         
         for q in channel_search_queries[:15]:  # 15 per round
-            try:
-                r = subprocess.run(
-                    [YTDLP, '--js-runtimes', 'node', '--flat-playlist', '-J',
-                     '--no-warnings',
-                     f'ytsearch20:{q} full course lecture'],
-                    capture_output=True, text=True, timeout=60)
-                
-                if r.returncode == 0:
-                    data = json.loads(r.stdout)
-                    for e in data.get('entries', []):
-                        ch_id = e.get('channel_id', '')
-                        ch_name = e.get('channel', '')
-                        if ch_id and ch_id.startswith('UC'):
-                            try:
-                                cdb.execute(
-                                    "INSERT INTO channels (channel_id, channel_name, source) "
-                                    "VALUES (?, ?, 'search')", (ch_id, ch_name))
-                                new_channels_found += 1
-                            except sqlite3.IntegrityError:
-                                pass
-                        
-                        # Also insert the video itself
-                        vid = e.get('id', '')
-                        if vid and len(vid) == 11:
-                            insert_videos([{
-                                'id': vid,
-                                'title': e.get('title', ''),
-                                'duration': e.get('duration'),
-                            }], source='channel_search')
-                            round_new += 1
-                
-                cdb.commit()
-            except:
-                pass
+            ch_new, vid_new = search_channels(q)
+            new_channels_found += ch_new
+            round_new += vid_new
             time.sleep(1)
         
         elapsed = time.time() - round_start
@@ -445,6 +548,8 @@ def main():
               f"{elapsed:.0f}s ===")
         print(f"DB: {db_total:,} total | "
               f"Channels: {crawled:,} crawled, {pending:,} pending")
+        print(f"Sample gate: ~{saved_s / 60:.0f} min / {saved_bytes / 1e6:.1f} MB of listing "
+              f"skipped on rejected channels")
         
         if db_total >= 10_000_000:
             print(f"\n🎯 TARGET REACHED: {db_total:,} videos!")
@@ -10,9 +10,12 @@ Uses completed/queued videos as seeds → fetch related → find playlists → c
 This is the key to going from 100K → 1M+ quality educational videos.
 """
 
-import sqlite3, subprocess, json, os, time, random, re
+import sqlite3, json, os, time, random, re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import ingest
+import ytdlp_pool
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 MIN_DURATION = 900  # 15 min
@@ -49,26 +52,14 @@ def is_good(title, duration):
     return True
 
 def insert_videos(videos, source='related'):
-    if not videos: return 0
-    conn = get_db()
-    n = 0
-    for v in videos:
+    def to_row(v):
         title = v.get('title', '')
         dur = v.get('duration', 0)
         if not is_good(title, dur):
-            continue
+            return None
         pri = 8 if EDU_BOOST.search(title) else 5
-        try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
-                (v['id'], title, v.get('course', ''), source,
-                 f"https://youtube.com/watch?v={v['id']}", dur, pri))
-            n += 1
-        except sqlite3.IntegrityError:
-            pass
-    conn.commit(); conn.close()
-    return n
+        return (v['id'], title, v.get('course', ''), source, dur, pri, v.get('channel_id'))
+    return ingest.ingest_videos(DB_PATH, videos, to_row, columns=ingest.CHANNEL_COLUMNS)
 
 def get_seed_ids(batch_size=200):
     """Get seed video IDs from completed and high-priority pending."""
@@ -94,7 +85,7 @@ def fetch_video_page(video_id):
         cmd = [YTDLP, f"https://youtube.com/watch?v={video_id}",
                "--dump-json", "--no-download", "--no-warnings", "--quiet",
                "--socket-timeout", "15"]
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        r = ytdlp_pool.run(cmd, timeout=30)
         if r.returncode != 0:
             return results
         j = json.loads(r.stdout)
@@ -121,85 +112,55 @@ def fetch_video_page(video_id):
     return results
 
 def fetch_related_via_search(video_id, title):
-    """Find related videos by searching for similar content."""
+    """Find related videos by searching for similar content (yields as found)."""
     if not title:
-        return []
+        return
     # Clean title for search - take first meaningful part
     clean = re.sub(r'[|\-–—:]+.*$', '', title).strip()[:60]
     if len(clean) < 10:
         clean = title[:60]
     
-    videos = []
-    try:
-        cmd = [YTDLP, f"ytsearch20:{clean}",
-               "--flat-playlist", "--dump-json", "--no-warnings", "--quiet"]
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        for line in r.stdout.strip().split('\n'):
-            if not line.strip(): continue
-            try:
-                j = json.loads(line)
-                vid = j.get('id', '')
-                if vid and len(vid) == 11 and vid != video_id:
-                    videos.append({
-                        'id': vid,
-                        'title': j.get('title', ''),
-                        'duration': j.get('duration', 0),
-                        'course': clean,
-                    })
-            except:
-                pass
-    except:
-        pass
-    return videos
+    cmd = [YTDLP, f"ytsearch20:{clean}",
+           "--flat-playlist", "--dump-json", "--no-warnings", "--quiet"]
+    for j in ytdlp_pool.stream_json(cmd, timeout=30):
+        vid = j.get('id', '')
+        if vid and len(vid) == 11 and vid != video_id:
+            yield {
+                'id': vid,
+                'title': j.get('title', ''),
+                'duration': j.get('duration', 0),
+                'course': clean,
+                'channel_id': j.get('channel_id'),
+            }
 
 def crawl_playlist(url):
-    """Crawl a full playlist."""
-    videos = []
-    try:
-        cmd = [YTDLP, url, "--flat-playlist", "--dump-json",
-               "--no-warnings", "--quiet", "--playlist-end", "500"]
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        for line in r.stdout.strip().split('\n'):
-            if not line.strip(): continue
-            try:
-                j = json.loads(line)
-                vid = j.get('id', '')
-                if vid and len(vid) == 11:
-                    videos.append({
-                        'id': vid,
-                        'title': j.get('title', ''),
-                        'duration': j.get('duration', 0),
-                    })
-            except:
-                pass
-    except:
-        pass
-    return videos
+    """Crawl a full playlist, yielding videos as yt-dlp lists them."""
+    cmd = [YTDLP, url, "--flat-playlist", "--dump-json",
+           "--no-warnings", "--quiet", "--playlist-end", "500"]
+    for j in ytdlp_pool.stream_json(cmd, timeout=120):
+        vid = j.get('id', '')
+        if vid and len(vid) == 11:
+            yield {
+                'id': vid,
+                'title': j.get('title', ''),
+                'duration': j.get('duration', 0),
+                'channel_id': j.get('channel_id'),
+            }
 
 def crawl_channel(url):
-    """Crawl channel videos ≥15min."""
-    videos = []
-    try:
-        cmd = [YTDLP, url, "--flat-playlist", "--dump-json",
-               "--no-warnings", "--quiet",
-               "--match-filter", f"duration > {MIN_DURATION}"]
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        for line in r.stdout.strip().split('\n'):
-            if not line.strip(): continue
-            try:
-                j = json.loads(line)
-                vid = j.get('id', '')
-                if vid and len(vid) == 11:
-                    videos.append({
-                        'id': vid,
-                        'title': j.get('title', ''),
-                        'duration': j.get('duration', 0),
-                    })
-            except:
-                pass
-    except:
-        pass
-    return videos
+    """Crawl channel videos ≥15min, yielding them as yt-dlp lists them."""
+    cmd = [YTDLP, url, "--flat-playlist", "--dump-json",
+           "--no-warnings", "--quiet",
+           "--match-filter", f"duration > {MIN_DURATION}"]
+    for j in ytdlp_pool.stream_json(cmd, timeout=300):
+        vid = j.get('id', '')
+        if vid and len(vid) == 11:
+            yield {
+                'id': vid,
+                'title': j.get('title', ''),
+                'duration': j.get('duration', 0),
+                'channel_id': j.get('channel_id'),
+            }
 
 def current_stats():
     c = get_db()
@@ -263,15 +224,15 @@ def main():
         conn.close()
         
         with ThreadPoolExecutor(max_workers=6) as pool:
-            futures = {pool.submit(fetch_related_via_search, vid, title): vid 
+            futures = {pool.submit(ingest.drain, fetch_related_via_search(vid, title),
+                                   insert_videos, source='related'): vid
                       for vid, title in seed_titles.items()}
             for f in as_completed(futures):
                 vid = futures[f]
                 explored.add(vid)
                 try:
-                    related = f.result()
-                    if related:
-                        n = insert_videos(related, source='related')
+                    listed, n = f.result()
+                    if listed:
                         total_new += n
                         if n >= 3:
                             t, e = current_stats()
@@ -307,18 +268,18 @@ def main():
             playlists_found -= set(pl_batch)
             
             with ThreadPoolExecutor(max_workers=4) as pool:
-                futures = {pool.submit(crawl_playlist, pl): pl for pl in pl_batch}
+                futures = {pool.submit(ingest.drain, crawl_playlist(pl), insert_videos,
+                                       source='playlist'): pl for pl in pl_batch}
                 for f in as_completed(futures):
                     pl = futures[f]
                     try:
-                        vids = f.result()
-                        if vids:
-                            n = insert_videos(vids, source=f'playlist')
+                        listed, n = f.result()
+                        if listed:
                             total_new += n
                             if n > 0:
                                 t, e = current_stats()
                                 pl_short = pl.split('list=')[-1][:20] if 'list=' in pl else pl[-30:]
-                                print(f"    PL:{pl_short:20s} +{n:4d} ({len(vids)} in playlist, edu: {e})")
+                                print(f"    PL:{pl_short:20s} +{n:4d} ({listed} in playlist, edu: {e})")
                     except:
                         pass
         
@@ -329,13 +290,13 @@ def main():
             print(f"\n  [Crawling {len(ch_batch)} channels]")
             
             with ThreadPoolExecutor(max_workers=3) as pool:
-                futures = {pool.submit(crawl_channel, ch): ch for ch in ch_batch}
+                futures = {pool.submit(ingest.drain, crawl_channel(ch), insert_videos,
+                                       source='channel_crawl'): ch for ch in ch_batch}
                 for f in as_completed(futures):
                     ch = futures[f]
                     try:
-                        vids = f.result()
-                        if vids:
-                            n = insert_videos(vids, source='channel_crawl')
+                        listed, n = f.result()
+                        if listed:
                             total_new += n
                             if n > 0:
                                 t, e = current_stats()
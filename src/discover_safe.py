@@ -10,9 +10,12 @@ Strategy:
 4. Search for university OCW playlists globally
 """
 
-import sqlite3, subprocess, json, os, time, random, re, sys
+import sqlite3, os, time, random, re, sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import ingest
+import ytdlp_pool
+
 DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 MIN_DURATION = 900
@@ -224,33 +227,18 @@ def get_priority(title):
     return 5
 
 def insert_videos(videos, source='safe_discovery'):
-    if not videos:
-        return 0
-    conn = get_db()
-    n = 0
-    for v in videos:
+    def to_row(v):
         title = v.get('title', '')
         dur = v.get('duration') or 0
-        vid = v.get('id', '')
-        if not vid or not is_good(title, dur):
-            continue
-        pri = get_priority(title)
-        try:
-            conn.execute(
-                "INSERT INTO videos (video_id, title, course, university, url, duration_seconds, status, priority, license_risk) "
-                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)",
-                (vid, title, v.get('playlist', ''), source,
-                 f"https://youtube.com/watch?v={vid}", dur, pri,
-                 v.get('license', 'yellow')))
-            n += 1
-        except sqlite3.IntegrityError:
-            pass
-    conn.commit()
-    conn.close()
-    return n
+        if not is_good(title, dur):
+            return None
+        return (v['id'], title, v.get('playlist', ''), source, dur, get_priority(title),
+                v.get('channel_id'), v.get('license', 'yellow'))
+    return ingest.ingest_videos(DB_PATH, videos, to_row,
+                                columns=ingest.CHANNEL_COLUMNS + ('license_risk',))
 
 def yt_search(query, max_results=200):
-    """Search YouTube with optional CC filter."""
+    """Search YouTube with optional CC filter, yielding results as they arrive."""
     cmd = [YTDLP,
            f"ytsearch{max_results}:{query}",
            "--dump-json", "--flat-playlist", "--no-download",
@@ -258,30 +246,18 @@ def yt_search(query, max_results=200):
            "--js-runtimes", "node",
            "--socket-timeout", "15",
            "--match-filter", f"duration >= {MIN_DURATION}"]
-    try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        videos = []
-        for line in r.stdout.strip().split('\n'):
-            if not line:
-                continue
-            try:
-                j = json.loads(line)
-                videos.append({
-                    'id': j.get('id', ''),
-                    'title': j.get('title', ''),
-                    'duration': j.get('duration'),
-                    'playlist': query[:100],
-                    'license': 'yellow'
-                })
-            except json.JSONDecodeError:
-                pass
-        return videos
-    except (subprocess.TimeoutExpired, Exception) as e:
-        print(f"  Search error for '{query}': {e}")
-        return []
+    for j in ytdlp_pool.stream_json(cmd, timeout=120):
+        yield {
+            'id': j.get('id', ''),
+            'title': j.get('title', ''),
+            'duration': j.get('duration'),
+            'playlist': query[:100],
+            'channel_id': j.get('channel_id'),
+            'license': 'yellow'
+        }
 
 def crawl_channel(channel_id, max_videos=500):
-    """Crawl all videos from a channel."""
+    """Crawl all videos from a channel, yielding them as yt-dlp lists them."""
     url = f"https://www.youtube.com/channel/{channel_id}/videos"
     cmd = [YTDLP, url,
            "--dump-json", "--flat-playlist", "--no-download",
@@ -289,58 +265,33 @@ def crawl_channel(channel_id, max_videos=500):
            "--js-runtimes", "node",
            "--socket-timeout", "20",
            "--playlist-end", str(max_videos)]
-    try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
-        videos = []
-        for line in r.stdout.strip().split('\n'):
-            if not line:
-                continue
-            try:
-                j = json.loads(line)
-                dur = j.get('duration') or 0
-                videos.append({
-                    'id': j.get('id', ''),
-                    'title': j.get('title', ''),
-                    'duration': dur,
-                    'playlist': f"channel:{channel_id}",
-                    'license': 'green'  # Known safe channels
-                })
-            except json.JSONDecodeError:
-                pass
-        return videos
-    except (subprocess.TimeoutExpired, Exception) as e:
-        print(f"  Channel crawl error for {channel_id}: {e}")
-        return []
+    for j in ytdlp_pool.stream_json(cmd, timeout=180):
+        yield {
+            'id': j.get('id', ''),
+            'title': j.get('title', ''),
+            'duration': j.get('duration') or 0,
+            'playlist': f"channel:{channel_id}",
+            'channel_id': channel_id,
+            'license': 'green'  # Known safe channels
+        }
 
 def crawl_playlist(playlist_id, source='safe_playlist'):
-    """Crawl a YouTube playlist."""
+    """Crawl a YouTube playlist, yielding videos as yt-dlp lists them."""
     url = f"https://www.youtube.com/playlist?list={playlist_id}"
     cmd = [YTDLP, url,
            "--dump-json", "--flat-playlist", "--no-download",
            "--no-warnings", "--quiet",
            "--js-runtimes", "node",
            "--socket-timeout", "20"]
-    try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        videos = []
-        for line in r.stdout.strip().split('\n'):
-            if not line:
-                continue
-            try:
-                j = json.loads(line)
-                videos.append({
-                    'id': j.get('id', ''),
-                    'title': j.get('title', ''),
-                    'duration': j.get('duration') or 0,
-                    'playlist': playlist_id,
-                    'license': 'green'
-                })
-            except json.JSONDecodeError:
-                pass
-        return videos
-    except (subprocess.TimeoutExpired, Exception) as e:
-        print(f"  Playlist crawl error: {e}")
-        return []
+    for j in ytdlp_pool.stream_json(cmd, timeout=120):
+        yield {
+            'id': j.get('id', ''),
+            'title': j.get('title', ''),
+            'duration': j.get('duration') or 0,
+            'playlist': playlist_id,
+            'channel_id': j.get('channel_id'),
+            'license': 'green'
+        }
 
 def discover_green_channels():
     """Find channels from existing GREEN videos."""
@@ -370,10 +321,13 @@ def main():
         random.shuffle(SAFE_CHANNELS)
         for i, ch_id in enumerate(SAFE_CHANNELS):
             print(f"  [{i+1}/{len(SAFE_CHANNELS)}] Crawling channel {ch_id}...")
-            videos = crawl_channel(ch_id)
-            n = insert_videos(videos, source='safe_channel')
+            try:
+                listed, n = ingest.drain(crawl_channel(ch_id), insert_videos, source='safe_channel')
+            except Exception as e:
+                print(f"  Channel crawl error for {ch_id}: {e}")
+                listed, n = 0, 0
             round_added += n
-            print(f"    Found {len(videos)} videos, {n} new")
+            print(f"    Found {listed} videos, {n} new")
             time.sleep(random.uniform(2, 5))
         
         # Phase 2: Educational search queries
@@ -384,10 +338,13 @@ def main():
         queries = random.sample(SAFE_QUERIES, min(30, len(SAFE_QUERIES)))
         for i, q in enumerate(queries):
             print(f"  [{i+1}/{len(queries)}] Searching: {q}")
-            videos = yt_search(q)
-            n = insert_videos(videos, source='safe_search')
+            try:
+                listed, n = ingest.drain(yt_search(q), insert_videos, source='safe_search')
+            except Exception as e:
+                print(f"  Search error for '{q}': {e}")
+                listed, n = 0, 0
             round_added += n
-            print(f"    Found {len(videos)} videos, {n} new")
+            print(f"    Found {listed} videos, {n} new")
             time.sleep(random.uniform(3, 8))
         
         # Phase 3: Discover channels from existing GREEN content
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Asyncio discovery engine: one prioritized task graph, one concurrency budget.
+
+discover_channels_10M.py crawls its channels one after another (catalog,
+related channels, then up to 20 playlists, sleeping between them) and
+discover_related.py opens a fresh thread pool for each step of each round,
+so most of the time the network is idle behind the slowest listing. Here
+every unit of work is a task on one priority queue:
+
+    playlist  crawl one playlist                        (highest priority)
+    channel   gate + crawl a pending channel, then enqueue its playlists
+    page      scrape a seed video page, enqueue its playlists and channel
+    related   related-video search for a seed
+    search    channel search query
+    extract   look up the channel of a sampled video    (lowest priority)
+
+CONCURRENCY workers pull from the queue, and a task's result enqueues the
+tasks it unlocks, so the playlists of one channel run while the next
+channel's catalog is still listing. Each task takes one token per yt-dlp
+call from a shared bucket (RATE calls/s, bursts of BURST) before it runs.
+A feeder keeps PENDING_BATCH/2+ channel tasks queued, taking pending
+channels in frontier.py order (page and extract tasks only register the
+channels they find), and adds unexplored seeds and search queries whenever
+the queue drops below LOW_WATER.
+
+A task key is held in `seen` while queued or running. Once done, channels
+are kept out by their DB status, seeds by the explored set and searches are
+meant to come round again; only playlist and extract keys are remembered,
+in a DONE_MEMORY-bounded LRU, so a multi-day run doesn't grow without bound.
+
+The crawler functions themselves are the blocking ones from
+discover_channels_10M / discover_related; they run on a thread pool sized to
+the budget and their yt-dlp calls go to the warm ytdlp_pool workers, so
+CONCURRENCY defaults to YTDLP_POOL_SIZE.
+
+Usage:
+    python3 src/discovery_engine.py
+    DISCOVERY_CONCURRENCY=16 DISCOVERY_RATE=6 python3 src/discovery_engine.py
+"""
+import asyncio, collections, functools, itertools, os, random, time
+from concurrent.futures import ThreadPoolExecutor
+
+import discover_channels_10M as channels
+import discover_related as related
+import frontier
+import ingest
+import ytdlp_pool
+
+CONCURRENCY = int(os.environ.get("DISCOVERY_CONCURRENCY", ytdlp_pool.POOL_SIZE))
+RATE = float(os.environ.get("DISCOVERY_RATE", "4"))      # yt-dlp calls/s, all tasks together
+BURST = 8
+PRIORITY = {'playlist': 0, 'channel': 1, 'page': 2, 'related': 3, 'search': 4, 'extract': 5}
+REMEMBER = {'playlist', 'extract'}   # done keys kept (bounded) since no DB state records them
+DONE_MEMORY = 200_000            # most remembered done keys
+LOW_WATER = 2 * CONCURRENCY
+PENDING_BATCH = 100              # pending channels per refill, best frontier scores first
+SEED_BATCH = 100                 # seeds per refill (related + page task each)
+SEARCHES_PER_REFILL = 3
+EXTRACT_BELOW = 500              # sample videos for channel extraction below this many pending
+EXTRACT_BATCH = 200
+PLAYLIST_CAP = 20                # playlists per accepted channel
+FEED_S = 5                       # feeder check interval
+IDLE_S = 60                      # feeder backoff when the queue is empty and nothing new turned up
+STATS_INTERVAL_S = 60
+TARGET = 10_000_000
+
+
+class TokenBucket:
+    """Async token bucket shared by every task of the engine."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def take(self, n=1):
+        n = min(n, self.burst)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+
+# --- blocking DB helpers (run on the thread pool) ---
+
+def pending_count():
+    cdb = channels.get_channels_db()
+    total = cdb.execute("SELECT COUNT(*) FROM channels WHERE status='pending'").fetchone()[0]
+    cdb.close()
+    return total
+
+
+def register(pairs, source):
+    """Add (channel_id, name) pairs as pending channels. Returns how many were new."""
+    cdb = channels.get_channels_db()
+    new = channels.register_channels(cdb, pairs, source)
+    cdb.commit()
+    cdb.close()
+    return new
+
+
+def seed_titles(explored):
+    """[(video_id, title)] for unexplored seeds."""
+    seeds = [s for s in related.get_seed_ids(2 * SEED_BATCH) if s not in explored][:SEED_BATCH]
+    conn = related.get_db()
+    rows = [(s, conn.execute("SELECT title FROM videos WHERE video_id=?", (s,)).fetchone())
+            for s in seeds]
+    conn.close()
+    return [(s, row[0] if row else '') for s, row in rows]
+
+
+def sample_video_ids(n=EXTRACT_BATCH):
+    conn = channels.get_db()
+    rows = conn.execute(
+        "SELECT video_id FROM videos WHERE status IN ('completed', 'pending') "
+        "ORDER BY RANDOM() LIMIT ?", (n,)).fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def db_total():
+    conn = channels.get_db()
+    total = conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+    conn.close()
+    return total
+
+
+class Engine:
+    def __init__(self, concurrency=CONCURRENCY, rate=RATE):
+        self.concurrency = concurrency
+        self.queue = asyncio.PriorityQueue()
+        self.order = itertools.count()
+        self.seen = set()              # queued or running
+        self.done_keys = collections.OrderedDict()   # finished REMEMBER keys, oldest first
+        self.bucket = TokenBucket(rate, BURST)
+        self.pool = ThreadPoolExecutor(concurrency + 1)    # +1 so the feeder never waits on crawls
+        self.explored = related.load_explored()
+        self.frontier = frontier.Frontier(channels.get_channels_db, channels.name_signal)
+        self.queued = collections.Counter()
+        self.done = collections.Counter()
+        self.new = collections.Counter()
+        self.rejected = 0
+        self.saved_s = 0.0             # listing time the sample gate skipped on rejects
+        self.new_channels = 0
+        self.errors = 0
+
+    def submit(self, kind, key, *args):
+        """Enqueue a task unless (kind, key) is queued or already done."""
+        if (kind, key) in self.seen or (kind, key) in self.done_keys:
+            return False
+        self.seen.add((kind, key))
+        self.queue.put_nowait((PRIORITY[kind], next(self.order), kind, key, args))
+        self.queued[kind] += 1
+        return True
+
+    async def call(self, calls, fn, *args, **kwargs):
+        """Run a blocking crawler function after taking `calls` rate tokens."""
+        if calls:
+            await self.bucket.take(calls)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, functools.partial(fn, *args, **kwargs))
+
+    # --- task handlers ---
+
+    async def do_channel(self, ch_id, ch_name):
+        res = None
+        try:
+            # the sample page up front (none for a name reject), the rest once we know
+            sample = 0 if channels.REJECT_CHANNELS.search(ch_name or '') else 1
+            res = await self.call(sample, channels.crawl_pending_channel, ch_id, ch_name)
+            if res['requests'] > sample:
+                await self.bucket.take(res['requests'] - sample)
+        finally:        # a failed crawl must leave frontier.picked, or it's never picked again
+            new, requests = (res['new'], res['requests']) if res else (0, 1)
+            self.frontier.record(ch_id, new, requests)
+        self.new['channel'] += res['new']
+        self.new_channels += res['related_new']
+        if not res['accepted']:
+            self.rejected += 1
+            self.saved_s += res['saved_seconds']
+            return
+        playlists = await self.call(1, channels.discover_playlists_from_channel, ch_id)
+        for pid, pname in playlists[:PLAYLIST_CAP]:
+            self.submit('playlist', pid, pname, ch_name or ch_id)
+        print(f"  CH {ch_name or ch_id[:12]:40s} vids: {res['videos']:>5} | +{res['new']:>4} new | "
+              f"playlists: {len(playlists):>3} | related_ch: {res['related']:>3}", flush=True)
+
+    async def do_playlist(self, pid, pname, source):
+        n = await self.call(1, channels.crawl_channel_playlist, pid, pname, source)
+        self.new['playlist'] += n
+
+    async def do_page(self, vid):
+        self.explored.add(vid)      # failed seeds too, as in discover_related
+        info = await self.call(1, related.fetch_video_page, vid)
+        for url in info['playlists']:
+            self.submit('playlist', url.split('list=')[-1], '', 'playlist')
+        if info['channel']:
+            ch_id = info['channel'].split('/channel/')[-1].split('/')[0]
+            new = await self.call(0, register, [(ch_id, '')], 'page')
+            self.new_channels += new
+
+    async def do_related(self, vid, title):
+        self.explored.add(vid)
+        _, n = await self.call(1, ingest.drain, related.fetch_related_via_search(vid, title),
+                               related.insert_videos, source='related')
+        self.new['related'] += n
+
+    async def do_search(self, query):
+        ch_new, n = await self.call(1, channels.search_channels, query)
+        self.new_channels += ch_new
+        self.new['search'] += n
+
+    async def do_extract(self, vid):
+        ch_id, ch_name = await self.call(1, channels.extract_channel, vid)
+        if ch_id:
+            new = await self.call(0, register, [(ch_id, ch_name)], 'extracted')
+            self.new_channels += new
+
+    # --- engine loops ---
+
+    async def worker(self):
+        while True:
+            _, _, kind, key, args = await self.queue.get()
+            self.queued[kind] -= 1
+            try:
+                await getattr(self, f'do_{kind}')(key, *args)
+            except Exception as e:
+                self.errors += 1
+                print(f"  [{kind}] {key}: {type(e).__name__}: {e}", flush=True)
+            finally:
+                self.done[kind] += 1
+                self.seen.discard((kind, key))
+                if kind in REMEMBER:
+                    self.done_keys[(kind, key)] = None
+                    if len(self.done_keys) > DONE_MEMORY:
+                        self.done_keys.popitem(last=False)
+                self.queue.task_done()
+
+    async def refill(self):
+        """Top the queue up; returns how many tasks were added."""
+        added = 0
+        if self.queued['channel'] < PENDING_BATCH // 2:
+            picked = await self.call(0, self.frontier.pick, PENDING_BATCH)
+            added += sum(self.submit('channel', ch_id, ch_name) for ch_id, ch_name in picked)
+        if self.queue.qsize() >= LOW_WATER:
+            return added
+        if await self.call(0, pending_count) < EXTRACT_BELOW:
+            vids = await self.call(0, sample_video_ids)
+            added += sum(self.submit('extract', vid) for vid in vids)
+        for vid, title in await self.call(0, seed_titles, set(self.explored)):
+            added += self.submit('related', vid, title)
+            added += self.submit('page', vid)
+        for q in random.sample(channels.CHANNEL_SEARCH_QUERIES, SEARCHES_PER_REFILL):
+            added += self.submit('search', q)
+        return added
+
+    async def feed(self):
+        while True:
+            try:
+                added = await self.refill()
+            except Exception as e:
+                print(f"[engine] refill failed: {type(e).__name__}: {e}", flush=True)
+                added = 0
+            await asyncio.sleep(IDLE_S if not (added or self.queue.qsize()) else FEED_S)
+
+    async def report(self):
+        """Print progress every STATS_INTERVAL_S; returns once TARGET is reached."""
+        start = time.time()
+        while True:
+            await asyncio.sleep(STATS_INTERVAL_S)
+            total = await self.call(0, db_total)
+            await self.call(0, related.save_explored, set(self.explored))
+            done = " ".join(f"{k}:{self.done[k]}" for k in PRIORITY if self.done[k])
+            print(f"[engine] {time.time() - start:.0f}s | DB: {total:,} | "
+                  f"+{sum(self.new.values()):,} videos | +{self.new_channels} channels | "
+                  f"{self.rejected} rejected (~{self.saved_s / 60:.0f} min saved) | queue: {self.queue.qsize()} | done {done} | "
+                  f"errors: {self.errors}", flush=True)
+            if total >= TARGET:
+                print(f"\n🎯 TARGET REACHED: {total:,} videos!", flush=True)
+                return
+
+    async def run(self):
+        print(f"[engine] {self.concurrency} concurrent tasks, {self.bucket.rate:g} yt-dlp calls/s",
+              flush=True)
+        tasks = [asyncio.create_task(self.worker()) for _ in range(self.concurrency)]
+        tasks.append(asyncio.create_task(self.feed()))
+        try:
+            await self.report()
+        finally:
+            for t in tasks:
+                t.cancel()
+            related.save_explored(self.explored)
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    print("=" * 60)
+    print("=== ASYNC DISCOVERY ENGINE ===")
+    print("=" * 60)
+    asyncio.run(Engine().run())
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,11 @@ DB_PATH = os.environ.get("DB_PATH", os.path.expanduser("~/academic_transcription
 HF_REPO = os.environ.get("HF_REPO", "thepowerfuldeez/massive-yt-edu-transcriptions")
 EXPORT_DIR = os.path.expanduser("~/academic_transcriptions/hf_export")
 CHUNK_SIZE = 50_000
+# Comma-separated transcript_source values to export ("whisper", "captions",
+# "duplicate"); empty = everything except re-uploads (same text as their original)
+EXPORT_SOURCES = [s for s in os.environ.get("EXPORT_SOURCES", "").split(",") if s]
+# EXPORT_SEGMENTS=1 adds per-segment timestamps + character offsets into `text`
+EXPORT_SEGMENTS = os.environ.get("EXPORT_SEGMENTS") == "1"
 
 
 def export_jsonl():
@@ -16,24 +21,44 @@ def export_jsonl():
     conn = sqlite3.connect(DB_PATH, timeout=30)
     conn.row_factory = sqlite3.Row
 
-    total = conn.execute(
-        "SELECT count(*) FROM videos WHERE status='completed' AND transcript IS NOT NULL"
-    ).fetchone()[0]
+    # A DB the current worker hasn't opened yet lacks its added columns/tables:
+    # export those as empty instead of failing
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(videos)")}
+    source = "COALESCE(transcript_source, 'whisper')" if "transcript_source" in cols else "'whisper'"
+    model_id = "model_id" if "model_id" in cols else "NULL AS model_id"
+
+    where = "status='completed' AND transcript IS NOT NULL"
+    if EXPORT_SOURCES:
+        where += f" AND {source} IN (%s)" % ",".join("?" * len(EXPORT_SOURCES))
+    else:
+        where += f" AND {source} != 'duplicate'"
+
+    total = conn.execute(f"SELECT count(*) FROM videos WHERE {where}", EXPORT_SOURCES).fetchone()[0]
     print(f"Exporting {total:,} completed transcriptions...")
 
     stats = conn.execute(
         "SELECT SUM(length(transcript)), SUM(duration_seconds) "
-        "FROM videos WHERE status='completed' AND transcript IS NOT NULL"
+        f"FROM videos WHERE {where}", EXPORT_SOURCES
     ).fetchone()
     total_chars = int(stats[0] or 0)
     total_duration = int(stats[1] or 0)
 
+    if EXPORT_SEGMENTS:
+        import segments
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' "
+                        "AND name='transcript_segments'").fetchone():
+            seg_col = ", (SELECT data FROM transcript_segments s WHERE s.video_id = videos.video_id) AS segments "
+        else:
+            seg_col = ", NULL AS segments "
+    else:
+        seg_col = " "
     cursor = conn.execute(
         "SELECT video_id, title, course, university, url, duration_seconds, "
         "transcript, processing_time_seconds, speed_ratio, priority, "
-        "content_category, license_risk, completed_at "
-        "FROM videos WHERE status='completed' AND transcript IS NOT NULL "
-        "ORDER BY priority DESC, completed_at"
+        "content_category, license_risk, completed_at, "
+        f"{source} AS transcript_source, {model_id}"
+        f"{seg_col}FROM videos WHERE {where} "
+        "ORDER BY priority DESC, completed_at", EXPORT_SOURCES
     )
 
     exported = 0
@@ -64,7 +89,13 @@ def export_jsonl():
                 "speed_ratio": round(float(row["speed_ratio"] or 0), 1),
                 "content_category": row["content_category"] or "",
                 "license_risk": row["license_risk"] or "",
+                "transcript_source": row["transcript_source"],
+                "model_id": row["model_id"] or "",
             }
+            if EXPORT_SEGMENTS:
+                start, end, cs, ce = segments.unpack(row["segments"])
+                record["segments"] = {"start_ms": start.tolist(), "end_ms": end.tolist(),
+                                      "char_start": cs.tolist(), "char_end": ce.tolist()}
             writer.write(json.dumps(record, ensure_ascii=False) + "\n")
             exported += 1
 
@@ -137,6 +168,9 @@ Large-scale educational content transcribed from YouTube using distil-whisper/di
 | `speed_ratio` | Transcription speed (realtime multiplier) |
 | `content_category` | Content type (university_lecture, conference, individual_educator, etc.) |
 | `license_risk` | License risk level (green/yellow/orange/red) |
+| `model_id` | Whisper model that produced `text` (empty for rows transcribed before versioning) |
+| `segments` | Only with `EXPORT_SEGMENTS=1`: `start_ms`/`end_ms` on the original audio and `char_start`/`char_end` into `text`, one entry per Whisper/caption segment |
+| `transcript_source` | `whisper` (transcribed) or `captions` (uploader-authored caption track); re-uploads of an exported video are left out |
 
 ## Content Categories
 
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+New-upload watcher for crawled channels, via their RSS uploads feeds.
+
+Crawled channels are never listed again, and re-listing 200K catalogs with
+yt-dlp to find a handful of new lectures would cost more than the first
+crawl. Every channel has a small Atom feed of its 15 latest uploads
+(FEED_URL) instead, which this process polls:
+
+- requests go over one keep-alive HTTPPool from THREADS threads, with
+  If-None-Match / If-Modified-Since, so an unchanged feed is a bodiless 304
+- each channel's poll interval follows its own posting rate: half the mean
+  gap between the uploads in its feed, stretched as the channel goes quiet
+  (at least half the time since its last upload), clamped to
+  [MIN_INTERVAL_S, MAX_INTERVAL_S]
+- feeds carry no durations: when a feed has entries published after the
+  newest one already seen, one flat listing of the channel's /videos tab
+  (the same listing the catalog crawl uses) supplies them, so insert_videos
+  applies MIN_DURATION and the usual title filters and known-ID check.
+  Entries missing from /videos are Shorts or streams and are skipped, as
+  the catalog crawl skips them; ones listed without a duration yet
+  (upcoming, live) are held back for up to HOLD_S
+
+State lives in channels.db (feed_watch). Newly crawled channels are enrolled
+each pass with their first poll spread over FIRST_POLL_SPREAD_S, starting
+from their crawl time (crawled_at), so only uploads the crawl can't have
+seen are new; without one, the first feed fetched only sets the baseline.
+FEED_URL can point at a stand-in server (scripts/bench_feed_watcher.py).
+
+Usage:
+    python3 src/feed_watcher.py           # poll due channels forever
+    python3 src/feed_watcher.py --once    # one pass over what's due now
+"""
+import argparse, collections, os, random, time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import discover_channels_10M as channels
+from http_pool import HTTPPool
+
+FEED_URL = os.environ.get("FEED_URL", "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}")
+THREADS = 16
+BATCH = 2000                     # due channels per pass
+MIN_INTERVAL_S = 3600
+MAX_INTERVAL_S = 7 * 86400
+FIRST_POLL_SPREAD_S = 86400      # newly enrolled channels: first poll within a day
+POLLS_PER_GAP = 2                # polls per mean upload gap
+ERROR_BACKOFF = 2.0              # interval multiplier after a failed poll
+LIST_MARGIN = 5                  # /videos entries listed beyond the fresh feed entries
+HOLD_S = 2 * 86400               # wait this long for a listed upload to get a duration
+IDLE_SLEEP_S = 60
+
+NS = {"atom": "http://www.w3.org/2005/Atom", "yt": "http://www.youtube.com/xml/schemas/2015"}
+
+
+def ensure_table(cdb):
+    cdb.execute("""CREATE TABLE IF NOT EXISTS feed_watch (
+        channel_id TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        last_published REAL,
+        upload_gap_s REAL,
+        interval_s REAL,
+        next_poll REAL,
+        last_status INTEGER,
+        polls INTEGER DEFAULT 0,
+        new_videos INTEGER DEFAULT 0
+    )""")
+    cdb.execute("CREATE INDEX IF NOT EXISTS idx_feed_watch_next ON feed_watch(next_poll)")
+    cdb.commit()
+
+
+def enrol(cdb, now):
+    """Start watching crawled channels that aren't watched yet. Returns how many."""
+    before = cdb.total_changes
+    with cdb:
+        cdb.execute(
+            "INSERT OR IGNORE INTO feed_watch (channel_id, interval_s, next_poll, last_published) "
+            "SELECT channel_id, ?, ? + (abs(random()) % ?), CAST(strftime('%s', crawled_at) AS REAL) "
+            "FROM channels WHERE status='crawled'",
+            (MIN_INTERVAL_S, now, FIRST_POLL_SPREAD_S))
+    return cdb.total_changes - before
+
+
+def parse_feed(body):
+    """[(video_id, title, published epoch)] from an uploads feed, newest first."""
+    entries = []
+    for e in ET.fromstring(body).iterfind("atom:entry", NS):
+        vid = e.findtext("yt:videoId", "", NS)
+        published = e.findtext("atom:published", "", NS)
+        if len(vid) != 11 or not published:
+            continue
+        try:
+            ts = datetime.fromisoformat(published.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            continue
+        entries.append((vid, e.findtext("atom:title", "", NS), ts))
+    entries.sort(key=lambda x: -x[2])
+    return entries
+
+
+def next_interval(gap, last_published, now):
+    """Seconds until the next poll for a channel posting every `gap` seconds."""
+    if not gap or not last_published:
+        return MAX_INTERVAL_S
+    gap = max(gap, (now - last_published) / 2)    # gone quiet: back off
+    return min(max(gap / POLLS_PER_GAP, MIN_INTERVAL_S), MAX_INTERVAL_S)
+
+
+def list_durations(ch_id, n):
+    """{video_id: duration or None} for the newest n uploads on the channel's /videos tab."""
+    return {v['id']: v['duration']
+            for v in channels.crawl_channel_full(ch_id, end=n + LIST_MARGIN)}
+
+
+def resolve_fresh(ch_id, fresh, now):
+    """Split fresh feed entries using one /videos listing.
+
+    Returns (videos to insert with durations, newest published time that is
+    settled). Entries listed without a duration younger than HOLD_S stay
+    unsettled, so the next poll sees them again."""
+    listed = list_durations(ch_id, len(fresh))
+    if not listed:
+        raise ValueError("empty /videos listing")
+    videos, settled = [], fresh[0][2]
+    for vid, title, ts in fresh:                     # newest first
+        if vid not in listed:
+            continue                                 # Short or stream: not a catalog upload
+        if listed[vid] is None and now - ts < HOLD_S:
+            settled = ts - 1e-3                      # look at it again next poll
+            continue
+        if listed[vid] is not None:
+            videos.append({'id': vid, 'title': title, 'duration': listed[vid]})
+    return videos, settled
+
+
+def poll_channel(pool, row, now):
+    """Fetch one feed and insert what's new. Returns the row's new state as a dict."""
+    ch_id, name, etag, last_modified, last_published, gap, interval = row
+    state = {'channel_id': ch_id, 'etag': etag, 'last_modified': last_modified,
+             'last_published': last_published, 'upload_gap_s': gap, 'new': 0, 'bytes': 0,
+             'listings': 0}
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        with pool.request("GET", FEED_URL.format(channel_id=ch_id), headers=headers) as resp:
+            body = resp.read()
+            state['status'] = resp.status
+            if resp.status == 200:
+                state['etag'] = resp.getheader('ETag')
+                state['last_modified'] = resp.getheader('Last-Modified')
+    except Exception:
+        state['status'] = 0
+        body = b''
+    state['bytes'] = len(body)
+
+    if state['status'] == 200:
+        try:
+            entries = parse_feed(body)
+        except ET.ParseError:
+            entries = []
+        if len(entries) >= 2:
+            state['upload_gap_s'] = (entries[0][2] - entries[-1][2]) / (len(entries) - 1)
+        fresh = [e for e in entries if e[2] > (last_published or 0)]
+        if fresh and last_published is None:         # no crawl time: this feed is the baseline
+            state['last_published'] = fresh[0][2]
+        elif fresh:
+            state['listings'] = 1
+            try:
+                videos, state['last_published'] = resolve_fresh(ch_id, fresh, now)
+                state['new'] = channels.insert_videos(
+                    [{**v, 'playlist': name or ch_id, 'channel_id': ch_id} for v in videos],
+                    source=name or ch_id)
+            except Exception:
+                state['status'] = 0                  # keep last_published: retry after backoff
+            if state['last_published'] != fresh[0][2]:
+                # entries left for later: the next fetch must return them, not a 304
+                state['etag'] = state['last_modified'] = None
+    if state['status'] in (200, 304):
+        state['interval_s'] = next_interval(state['upload_gap_s'], state['last_published'], now)
+    else:
+        state['interval_s'] = min((interval or MIN_INTERVAL_S) * ERROR_BACKOFF, MAX_INTERVAL_S)
+    return state
+
+
+def poll_due(cdb, pool, now=None, limit=BATCH, threads=THREADS):
+    """Poll every channel whose next_poll has passed (up to `limit`). Returns a Counter."""
+    now = time.time() if now is None else now
+    stats = collections.Counter(enrolled=enrol(cdb, now))
+    rows = cdb.execute(
+        "SELECT f.channel_id, c.channel_name, f.etag, f.last_modified, f.last_published, "
+        "f.upload_gap_s, f.interval_s FROM feed_watch f JOIN channels c USING (channel_id) "
+        "WHERE f.next_poll <= ? ORDER BY f.next_poll LIMIT ?", (now, limit)).fetchall()
+    if not rows:
+        return stats
+    with ThreadPoolExecutor(threads) as ex:
+        states = list(ex.map(lambda r: poll_channel(pool, r, now), rows))
+    with cdb:
+        cdb.executemany(
+            "UPDATE feed_watch SET etag=?, last_modified=?, last_published=?, upload_gap_s=?, "
+            "interval_s=?, next_poll=?, last_status=?, polls=polls+1, new_videos=new_videos+? "
+            "WHERE channel_id=?",
+            [(s['etag'], s['last_modified'], s['last_published'], s['upload_gap_s'],
+              s['interval_s'], now + s['interval_s'] * random.uniform(0.9, 1.1), s['status'],
+              s['new'], s['channel_id']) for s in states])
+    for s in states:
+        stats['polled'] += 1
+        stats['new'] += s['new']
+        stats['bytes'] += s['bytes']
+        stats['listings'] += s['listings']
+        stats[{200: 'changed', 304: 'not_modified'}.get(s['status'], 'errors')] += 1
+    return stats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--once", action="store_true")
+    args = ap.parse_args()
+
+    cdb = channels.get_channels_db()
+    ensure_table(cdb)
+    pool = HTTPPool(max_idle_per_host=THREADS, timeout=20)
+    print(f"[feeds] watching crawled channels via {FEED_URL.split('?')[0]}", flush=True)
+    while True:
+        t0 = time.time()
+        stats = poll_due(cdb, pool)
+        if stats['polled'] or stats['enrolled']:
+            print(f"[feeds] {stats['polled']} polled ({stats['not_modified']} unchanged, "
+                  f"{stats['errors']} failed), {stats['listings']} listings, +{stats['new']} new videos, "
+                  f"{stats['bytes'] / 1e6:.1f} MB, +{stats['enrolled']} enrolled "
+                  f"({time.time() - t0:.1f}s)", flush=True)
+        if args.once:
+            break
+        if stats['polled'] < BATCH:
+            time.sleep(IDLE_SLEEP_S)
+    pool.close()
+    cdb.close()
+
+
+if __name__ == "__main__":
+    main()
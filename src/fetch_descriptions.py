@@ -6,9 +6,11 @@ No API key needed. Stores in DB, reclassifies CC-licensed videos.
 Uses --print to extract just the fields we need (faster than --dump-json).
 Processes in parallel with ThreadPoolExecutor.
 """
-import sqlite3, os, sys, time, json, subprocess, re
+import sqlite3, os, sys, time, json, re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import ytdlp_pool
+
 DB = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
 COOKIE_DIR = os.path.expanduser("~/academic_transcriptions/cookie_pool")
@@ -55,7 +57,7 @@ def fetch_one(video_id, worker_id=0):
         cmd.extend(["--cookies", cookie])
     
     try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
+        r = ytdlp_pool.run(cmd, timeout=20)
         if r.returncode != 0:
             return video_id, None, None, "error"
         j = json.loads(r.stdout)
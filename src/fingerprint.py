@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Compact audio fingerprints for spotting re-uploads of the same recording.
+
+Landmark hashing: spectrogram peaks (local maxima in 250-4000 Hz) are paired
+with the next few peaks after them, and each pair (f1, f2, dt) packs into a
+22-bit hash. Peak pairs survive re-encoding, level changes and noise far
+better than per-frame band-energy bits.
+
+A whole video is reduced to a bottom-k sketch: the SKETCH_K smallest
+distinct (mixed) pair hashes, each with the time of its first anchor. A
+sketch is a sample of a set, so it doesn't care where the audio starts
+(different intros, trimmed mirrors). Similar voices share plenty of pair
+hashes by chance, so two sketches only count as overlapping on hashes that
+agree on one time offset (the usual landmark-matching vote).
+
+`speed` converts frame timing back to original-audio time, but atempo
+artifacts still move enough peaks that sketches are best compared at the
+same speed; the worker fingerprints a 1.0x excerpt.
+"""
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_S = 0.096
+HOP_S = 0.016                # 6x overlap: peaks barely move with the frame phase
+N_FFT = 2048                 # fixed FFT size: bins stay put for any frame length
+FMIN, FMAX = 250.0, 4000.0
+FREQ_QUANT = 2               # FFT bins per hash frequency step (~15.6 Hz)
+PEAK_T, PEAK_F = 10, 6       # neighbourhood half-size (hops, bins) for a peak
+PEAK_MIN_DB = 10.0           # peak must clear the block median by this much
+PEAKS_PER_S = 30.0           # keep only the strongest peaks
+FANOUT = 3                   # pairs per anchor peak
+MAX_DT = 63                  # hops (~1 s); 6 bits
+OFFSET_TOL = 2               # hops of slack when voting on the time offset
+SKETCH_K = 256
+INDEX_KEYS = 16              # smallest sketch values stored as lookup keys
+BLOCK_FRAMES = 4096
+
+_lo = int(FMIN * N_FFT / SAMPLE_RATE)
+_hi = int(FMAX * N_FFT / SAMPLE_RATE)
+
+
+def _max_filter(a, rt, rf):
+    """Max over a (2*rt+1, 2*rf+1) neighbourhood, separable: rows then columns."""
+    out = a.copy()
+    for d in range(1, rt + 1):
+        np.maximum(out[d:], a[:-d], out=out[d:])
+        np.maximum(out[:-d], a[d:], out=out[:-d])
+    rows = out.copy()
+    for d in range(1, rf + 1):
+        np.maximum(out[:, d:], rows[:, :-d], out=out[:, d:])
+        np.maximum(out[:, :-d], rows[:, d:], out=out[:, :-d])
+    return out
+
+
+def peaks(pcm, speed=1.0):
+    """(times, bins) of spectrogram peaks, times in hops of original audio."""
+    x = pcm.astype(np.float32) / 32768.0
+    frame = int(FRAME_S / speed * SAMPLE_RATE)
+    hop = max(int(HOP_S / speed * SAMPLE_RATE), 1)
+    if len(x) < frame + hop:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    n = 1 + (len(x) - frame) // hop
+    window = np.hanning(frame).astype(np.float32)
+
+    ts, fs = [], []
+    for b0 in range(0, n, BLOCK_FRAMES):
+        # pad the block by PEAK_T frames each side so edge peaks are judged correctly
+        lo, hi = max(b0 - PEAK_T, 0), min(b0 + BLOCK_FRAMES + PEAK_T, n)
+        idx = np.arange(lo, hi)[:, None] * hop + np.arange(frame)
+        spec = np.abs(np.fft.rfft(x[idx] * window, n=N_FFT, axis=1))[:, _lo:_hi]
+        db = 20 * np.log10(spec + 1e-6)
+        is_peak = (db == _max_filter(db, PEAK_T, PEAK_F)) & (db > np.median(db) + PEAK_MIN_DB)
+        t, f = np.nonzero(is_peak)
+        keep = (t + lo >= b0) & (t + lo < b0 + BLOCK_FRAMES)
+        t, f = t[keep], f[keep]
+        budget = int(PEAKS_PER_S * (min(b0 + BLOCK_FRAMES, n) - b0) * HOP_S / speed)
+        if len(t) > budget:
+            top = np.argsort(db[t, f])[-budget:]
+            t, f = t[top], f[top]
+        ts.append(t + lo)
+        fs.append(f)
+    # frame index -> original-audio hops (int() on the hop would drift over hours)
+    t = np.rint(np.concatenate(ts) * (hop * speed / (HOP_S * SAMPLE_RATE))).astype(np.int64)
+    return t, np.concatenate(fs)
+
+
+def landmark_hashes(pcm, speed=1.0):
+    """(hashes, anchor times): uint32 f1 (8 bits) | f2 (8 bits) | dt (6 bits)."""
+    t, f = peaks(pcm, speed)
+    if len(t) < 2:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32)
+    order = np.lexsort((f, t))
+    t, f = t[order], f[order] // FREQ_QUANT
+    hashes, times = [], []
+    for k in range(1, FANOUT + 1):
+        dt = t[k:] - t[:-k]
+        ok = (dt > 0) & (dt <= MAX_DT)
+        hashes.append(((f[:-k][ok] << 14) | (f[k:][ok] << 6) | dt[ok]).astype(np.uint32))
+        times.append(t[:-k][ok].astype(np.uint32))
+    return np.concatenate(hashes), np.concatenate(times)
+
+
+def _mix(h):
+    """Spread hash values uniformly so the bottom-k is an unbiased sample."""
+    v = h.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return (v >> np.uint64(32)).astype(np.uint32)
+
+
+def sketch(hashes, times, k=SKETCH_K):
+    """(k, 2) uint32 array of the k smallest distinct mixed hashes + first anchor time."""
+    mixed = _mix(hashes)
+    order = np.lexsort((times, mixed))
+    mixed, times = mixed[order], times[order]
+    first = np.ones(len(mixed), dtype=bool)
+    first[1:] = mixed[1:] != mixed[:-1]
+    return np.stack([mixed[first][:k], times[first][:k]], axis=1).astype(np.uint32)
+
+
+def fingerprint(pcm, speed=1.0):
+    return sketch(*landmark_hashes(pcm, speed))
+
+
+def similarity(a, b, k=SKETCH_K):
+    """Estimated overlap of two recordings' hash sets (0..1), time-consistent matches only.
+
+    Among the bottom-k of the union, count hashes present in both sketches
+    whose anchor times differ by the most common offset (+-OFFSET_TOL hops).
+    """
+    if len(a) == 0 or len(b) == 0:
+        return 0.0
+    union = np.union1d(a[:, 0], b[:, 0])[:k]
+    shared, ia, ib = np.intersect1d(a[:, 0], b[:, 0], assume_unique=True, return_indices=True)
+    in_union = shared <= union[-1]
+    if not in_union.any():
+        return 0.0
+    offsets = a[ia[in_union], 1].astype(np.int64) - b[ib[in_union], 1].astype(np.int64)
+    votes = [(np.abs(offsets - o) <= OFFSET_TOL).sum() for o in offsets]
+    return int(max(votes)) / len(union)
+
+
+def to_blob(sk):
+    return sk.astype("<u4").tobytes()
+
+
+def from_blob(blob):
+    return np.frombuffer(blob, dtype="<u4").reshape(-1, 2)
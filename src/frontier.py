@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Yield-driven crawl order for pending channels.
+
+Picking pending channels ORDER BY RANDOM() spends as much crawl budget on a
+gaming channel found through featured-channel links as on one referred by
+three lecture channels. The frontier scores every pending channel by
+expected yield — new educational videos inserted per yt-dlp request — and
+hands out the best first. Scores are Thompson samples, so channels with
+little evidence still get crawled now and then instead of starving.
+
+A channel's yield rate has a Gamma posterior built from:
+  - its arm, (discovery source, name signal) such as ('search', 'edu'):
+    the yield of that arm's crawled channels, counted as at most
+    ARM_WEIGHT requests of evidence so a well-explored arm sets the
+    baseline without drowning out the channel's own referrers
+  - its referrers: every crawled or rejected channel with a
+    channel_discoveries edge to it, counted in full
+The sampled rate is then tilted by the channel's graph authority from
+channel_rank.py (1.0 until it has run), so a channel many good channels
+link to moves up even before any of its referrers has been crawled.
+Arm totals start from the crawled/rejected rows of channels.db and are
+updated online by record() after each crawl. The pending set and referrer
+totals (one grouped join, seconds on a big channels.db) are reloaded every
+REFRESH_S or when they run short; each pick() draws fresh samples against
+the current arm totals.
+
+    fr = frontier.Frontier(get_channels_db, name_signal)
+    for ch_id, ch_name in fr.pick(100):
+        res = crawl_pending_channel(ch_id, ch_name)
+        fr.record(ch_id, res['new'], res['requests'])
+"""
+import threading
+import time
+
+import numpy as np
+
+PRIOR_YIELD = 2.0          # new videos per request, before any evidence
+PRIOR_REQUESTS = 2.0       # weight of that prior, in requests
+ARM_WEIGHT = 30.0          # most requests of evidence an arm lends one channel
+ACCEPT_REQUESTS = 3        # history estimate: sample + rest of catalog + related
+REJECT_REQUESTS = 2        # history estimate (full catalog + related before the sample gate)
+MIN_PICK_REQUESTS = 1      # a pick that made no call (rejected by name) still counts this much
+AUTHORITY_EXP = 0.5        # score *= authority ** this (channel_rank.py, mean channel 1.0)
+REFRESH_S = 600            # reload pending channels + referrer totals at least this often
+
+PENDING_SQL = """
+    SELECT c.channel_id, c.channel_name, c.source, COALESCE(c.authority, 1.0),
+           COALESCE(SUM(r.edu_video_count), 0),
+           COALESCE(SUM(CASE r.status WHEN 'crawled' THEN ? WHEN 'rejected' THEN ? END), 0)
+    FROM channels c
+    LEFT JOIN channel_discoveries d ON d.to_channel = c.channel_id
+    LEFT JOIN channels r ON r.channel_id = d.from_channel AND r.status IN ('crawled', 'rejected')
+    WHERE c.status = 'pending'
+    GROUP BY c.channel_id"""
+
+
+class Frontier:
+    def __init__(self, connect, name_signal, seed=None):
+        """connect() -> channels.db connection; name_signal(name) -> short label."""
+        self.connect = connect
+        self.name_signal = name_signal
+        self.rng = np.random.default_rng(seed)
+        self.arms = {}             # (source, signal) -> [new videos, requests]
+        self.picked = {}           # channel_id -> arm, handed out and not yet recorded
+        self.lock = threading.Lock()
+        self.alive = np.zeros(0, dtype=bool)
+        self.loaded = 0.0
+        self._load_history()
+
+    def _load_history(self):
+        cdb = self.connect()
+        rows = cdb.execute(
+            "SELECT source, channel_name, status, edu_video_count FROM channels "
+            "WHERE status IN ('crawled', 'rejected')").fetchall()
+        cdb.close()
+        for source, name, status, new in rows:
+            requests = ACCEPT_REQUESTS if status == 'crawled' else REJECT_REQUESTS
+            self._add((source, self.name_signal(name)), new or 0, requests)
+
+    def _add(self, arm, new, requests):
+        stats = self.arms.setdefault(arm, [0.0, 0.0])
+        stats[0] += new
+        stats[1] += requests
+
+    def _refresh(self):
+        """Reload pending channels and their referrer totals (seconds on a big DB)."""
+        cdb = self.connect()
+        rows = cdb.execute(PENDING_SQL, (ACCEPT_REQUESTS, REJECT_REQUESTS)).fetchall()
+        cdb.close()
+        arm_index = {}
+        self.ids = [r[0] for r in rows]
+        self.names = [r[1] for r in rows]
+        self.arm_of = np.array([arm_index.setdefault((r[2], self.name_signal(r[1])), len(arm_index))
+                                for r in rows], dtype=np.int64)
+        self.arm_keys = list(arm_index)
+        self.authority = np.array([r[3] for r in rows], dtype=np.float64)
+        self.ref = np.array([r[4:] for r in rows], dtype=np.float64).reshape(-1, 2)
+        self.alive = np.array([i not in self.picked for i in self.ids], dtype=bool)
+        self.loaded = time.time()
+
+    def pick(self, n):
+        """Up to n pending (channel_id, channel_name), best sampled yield first.
+        Channels already handed out are skipped until record()ed; the pending
+        set is reloaded when stale or when fewer than n are left."""
+        with self.lock:
+            if time.time() - self.loaded > REFRESH_S or self.alive.sum() < n:
+                self._refresh()
+            if not self.alive.any():
+                return []
+            arm = np.array([self.arms.get(a, (0.0, 0.0)) for a in self.arm_keys],
+                           dtype=np.float64).reshape(-1, 2)[self.arm_of]
+            scale = np.minimum(1.0, ARM_WEIGHT / np.maximum(arm[:, 1], 1.0))
+            alpha = PRIOR_YIELD * PRIOR_REQUESTS + scale * arm[:, 0] + self.ref[:, 0]
+            beta = PRIOR_REQUESTS + scale * arm[:, 1] + self.ref[:, 1]
+            score = self.rng.gamma(alpha, 1.0 / beta) * self.authority ** AUTHORITY_EXP
+            score[~self.alive] = -np.inf
+            top = np.argsort(-score)[:min(n, int(self.alive.sum()))]
+            self.alive[top] = False
+            for i in top:
+                self.picked[self.ids[i]] = self.arm_keys[self.arm_of[i]]
+            return [(self.ids[i], self.names[i]) for i in top]
+
+    def record(self, channel_id, new, requests):
+        """Feed back a crawl of a picked channel: new videos inserted, yt-dlp requests spent.
+
+        Name rejects make no request; counting them as MIN_PICK_REQUESTS keeps
+        an arm of such channels from holding its prior yield forever."""
+        with self.lock:
+            arm = self.picked.pop(channel_id, None)
+            if arm is not None:
+                self._add(arm, new, max(requests, MIN_PICK_REQUESTS))
+
+    def describe(self, top=5):
+        """Best arms by observed yield per request, for logs."""
+        with self.lock:
+            rates = sorted(((y / r, a, r) for a, (y, r) in self.arms.items() if r),
+                           key=lambda t: t[0], reverse=True)[:top]
+        return ", ".join(f"{src}/{sig}: {rate:.1f}/req ({r:.0f} req)" for rate, (src, sig), r in rates)
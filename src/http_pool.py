@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tiny keep-alive HTTP connection pool on top of http.client (stdlib only).
+
+One pool per process; connections are keyed by (scheme, host, port) and
+reused across threads, so repeated requests to the same CDN host skip the
+TCP + TLS handshake. A reused connection that turns out to be stale
+(server closed it while idle) is retried once on a fresh connection.
+"""
+import http.client
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+_STALE = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+          BrokenPipeError, ConnectionResetError)
+
+
+class HTTPPool:
+    def __init__(self, max_idle_per_host=8, timeout=30):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _new_conn(self, scheme, host, port):
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout)
+
+    def _acquire(self, key):
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+        return self._new_conn(*key), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle_per_host:
+                conns.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def request(self, method, url, headers=None, body=None):
+        """Yield an http.client.HTTPResponse.
+
+        The connection goes back to the pool only if the caller read the body
+        to the end; otherwise it is closed (partial bodies poison keep-alive).
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        hdrs = {"User-Agent": USER_AGENT}
+        hdrs.update(headers or {})
+
+        conn, reused = self._acquire(key)
+        try:
+            conn.request(method, path, body=body, headers=hdrs)
+            resp = conn.getresponse()
+        except _STALE:
+            conn.close()
+            if not reused:
+                raise
+            conn = self._new_conn(*key)
+            conn.request(method, path, body=body, headers=hdrs)
+            resp = conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+
+        try:
+            yield resp
+        except BaseException:
+            conn.close()
+            raise
+        if resp.isclosed() and not resp.will_close:
+            self._release(key, conn)
+        else:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for c in conns:
+                    c.close()
+            self._idle.clear()
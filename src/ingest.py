@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Shared bulk insert path for discovery crawlers.
+
+Candidates go through the known-ID filter, then each crawler's own
+`to_row` (which applies its filters and returns None to drop a
+candidate), then one `INSERT OR IGNORE ... executemany` in a single
+transaction. The inserted count comes from SQLite's change counter, so
+duplicates cost no Python exception handling.
+Only the IDs of rows that reached the insert are added to the known-ID
+index; a candidate `to_row` dropped stays open to other crawlers.
+
+With INGEST_MODE=staged, crawlers never take the DB write lock: rows are
+appended to a per-process JSONL file in STAGING_DIR and
+src/ingest_service.py merges them into `videos` in large batches.
+
+    rows = ingest.ingest_videos(DB_PATH, videos, to_row)
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+
+import known_ids
+
+COLUMNS = ("video_id", "title", "course", "university", "duration_seconds", "priority")
+CHANNEL_COLUMNS = COLUMNS + ("channel_id",)    # for crawlers that know the uploading channel
+# Columns the crawlers write on top of the original videos schema (added lazily, idempotent)
+EXTRA_COLUMNS = {"channel_id": "TEXT"}
+INGEST_MODE = os.environ.get("INGEST_MODE", "direct")    # direct | staged
+STAGING_DIR = os.environ.get("STAGING_DIR", os.path.expanduser("~/academic_transcriptions/ingest_staging"))
+BATCH = 200                  # streamed candidates per insert
+
+_local = threading.local()
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def ensure_columns(conn):
+    """Add EXTRA_COLUMNS (and the channel_id index) to videos if missing."""
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(videos)")}
+    for name, decl in EXTRA_COLUMNS.items():
+        if name not in cols:
+            try:
+                conn.execute(f"ALTER TABLE videos ADD COLUMN {name} {decl}")
+            except sqlite3.OperationalError:     # another process added it first
+                pass
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos(channel_id)")
+    conn.commit()
+
+
+def thread_conn(db_path):
+    """A connection kept open per thread: crawlers call ingest once per
+    channel/playlist, and reopening costs more than a small insert (cold page
+    cache, and a WAL checkpoint whenever the last connection closes)."""
+    conns = _local.__dict__.setdefault("conns", {})
+    if db_path not in conns:
+        conns[db_path] = connect(db_path)
+        ensure_columns(conns[db_path])
+    return conns[db_path]
+
+
+def insert_rows(conn, rows, columns=COLUMNS):
+    """INSERT OR IGNORE pending videos in one transaction. Returns rows inserted.
+
+    rows: tuples matching `columns` (video_id first); url and status are filled in.
+    """
+    if not rows:
+        return 0
+    cols = ", ".join(columns)
+    marks = ", ".join(f"?{i}" for i in range(1, len(columns) + 1))
+    before = conn.total_changes
+    with conn:
+        conn.executemany(
+            f"INSERT OR IGNORE INTO videos ({cols}, url, status) "
+            f"VALUES ({marks}, 'https://youtube.com/watch?v=' || ?1, 'pending')", rows)
+    return conn.total_changes - before
+
+
+def stage_rows(rows, columns=COLUMNS, staging_dir=STAGING_DIR):
+    """Append one batch as a JSONL line to this process's staging file. Returns rows staged.
+
+    A single O_APPEND write per batch, so the merger never sees half a line
+    once it has renamed the file away and let in-flight writes settle.
+    """
+    if not rows:
+        return 0
+    os.makedirs(staging_dir, exist_ok=True)
+    path = os.path.join(staging_dir, f"{socket.gethostname()}-{os.getpid()}.jsonl")
+    data = (json.dumps({"columns": list(columns), "rows": rows}) + "\n").encode()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+    return len(rows)
+
+
+def ingest_videos(db_path, videos, to_row, columns=COLUMNS, filter_known=True):
+    """Filter candidate dicts and bulk-insert the survivors. Returns rows inserted
+    (rows staged with INGEST_MODE=staged; those are new as far as the known-ID
+    index could tell)."""
+    if filter_known:
+        videos = known_ids.drop_known(videos, db_path)
+    rows = [row for row in map(to_row, videos or ()) if row is not None]
+    if not rows:
+        return 0
+    if INGEST_MODE == "staged":
+        n = stage_rows(rows, columns)
+    else:
+        n = insert_rows(thread_conn(db_path), rows, columns)
+    if filter_known:        # only rows that passed to_row: a rejected candidate stays unknown
+        known_ids.shared(db_path).add([row[0] for row in rows])
+    return n
+
+
+def drain(entries, insert, *args, batch=BATCH, **kwargs):
+    """Feed a (streaming) candidate iterator to insert(videos, ...) every
+    `batch` entries, so a listing that dies halfway keeps what it listed.
+    Returns (listed, inserted)."""
+    listed = inserted = 0
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= batch:
+            listed += len(chunk)
+            inserted += insert(chunk, *args, **kwargs)
+            chunk = []
+    if chunk:
+        listed += len(chunk)
+        inserted += insert(chunk, *args, **kwargs)
+    return listed, inserted
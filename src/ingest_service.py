@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Single writer for discovery: merges staged candidates into `videos`.
+
+Crawlers started with INGEST_MODE=staged append batches to
+STAGING_DIR/<host>-<pid>.jsonl instead of inserting. Every MERGE_INTERVAL_S
+this process claims those files (rename to *.merging, so crawlers start a
+fresh file on their next write), waits SETTLE_S for in-flight appends,
+then inserts everything with INSERT OR IGNORE in transactions of TXN_ROWS
+and deletes the claimed files. Crawler throughput never competes with the
+GPU workers for the write lock; this process takes it a few times a minute.
+
+Merging is idempotent, so *.merging files left by a crash are simply
+merged again on the next start.
+
+Usage:
+    python3 src/ingest_service.py            # run forever
+    python3 src/ingest_service.py --once     # merge what's staged and exit
+"""
+import argparse, glob, json, os, time
+
+from ingest import connect, ensure_columns, insert_rows, STAGING_DIR
+
+DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
+MERGE_INTERVAL_S = 30
+SETTLE_S = 5
+TXN_ROWS = 50_000
+
+
+def claim_files(staging_dir):
+    """Rename staged files to *.merging; returns every claimed file (incl. leftovers)."""
+    stamp = int(time.time() * 1000)
+    for path in glob.glob(os.path.join(staging_dir, "*.jsonl")):
+        try:
+            os.rename(path, f"{path}.{stamp}.merging")
+        except OSError:
+            pass
+    return sorted(glob.glob(os.path.join(staging_dir, "*.merging")))
+
+
+def read_batches(paths):
+    """{columns tuple: [row, ...]} from claimed files, first occurrence of an ID wins."""
+    by_cols, seen, bad = {}, set(), 0
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    batch = json.loads(line)
+                except ValueError:
+                    bad += 1
+                    continue
+                rows = by_cols.setdefault(tuple(batch["columns"]), [])
+                for row in batch["rows"]:
+                    if row[0] not in seen:
+                        seen.add(row[0])
+                        rows.append(tuple(row))
+    return by_cols, bad
+
+
+def merge_once(conn, staging_dir=STAGING_DIR):
+    """Returns (files, rows staged, rows inserted)."""
+    paths = claim_files(staging_dir)
+    if not paths:
+        return 0, 0, 0
+    time.sleep(SETTLE_S)
+    by_cols, bad = read_batches(paths)
+    if bad:
+        print(f"[ingest] skipped {bad} unreadable staging lines", flush=True)
+    staged = inserted = 0
+    for columns, rows in by_cols.items():
+        staged += len(rows)
+        for i in range(0, len(rows), TXN_ROWS):
+            inserted += insert_rows(conn, rows[i:i + TXN_ROWS], columns)
+    for path in paths:
+        os.unlink(path)
+    return len(paths), staged, inserted
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--once", action="store_true")
+    ap.add_argument("--interval", type=float, default=MERGE_INTERVAL_S)
+    args = ap.parse_args()
+
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    conn = connect(os.environ.get("DB_PATH", DB_PATH))
+    ensure_columns(conn)
+    print(f"[ingest] merging {STAGING_DIR} every {args.interval:.0f}s", flush=True)
+    while True:
+        t0 = time.time()
+        files, staged, inserted = merge_once(conn)
+        if files:
+            print(f"[ingest] {files} files, {staged:,} staged -> {inserted:,} new videos "
+                  f"({time.time() - t0:.1f}s)", flush=True)
+        if args.once:
+            break
+        time.sleep(max(args.interval - (time.time() - t0), 0))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""In-memory index of video IDs already in the DB, so crawlers can drop
+known candidates before touching SQLite.
+
+YouTube IDs are 11 base64url chars; the last one only ever carries 4 bits,
+so an ID packs exactly into a uint64. The index is a sorted uint64 array
+(~45 MB at 5.6M IDs, vs ~500 MB for a Python set of strings) fronted by a
+Bloom filter that rejects most genuinely new IDs without a binary search.
+IDs that don't fit the packing go in a small fallback set.
+
+It loads once per process and then only reads rows past a rowid watermark,
+so a refresh costs as much as the rows added since the last one.
+
+    import known_ids
+    videos = known_ids.drop_known(videos, DB_PATH)
+"""
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+ID_LEN = 11
+REFRESH_S = 60               # re-read new DB rows at most this often
+BLOOM_BITS_PER_KEY = 10      # ~1% false positives with 7 probes
+BLOOM_PROBES = 7
+FETCH_BATCH = 200_000
+
+_LUT = np.full(256, 255, dtype=np.uint8)
+for _i, _c in enumerate(ALPHABET):
+    _LUT[ord(_c)] = _i
+_U = np.uint64
+
+
+def encode(ids):
+    """(uint64 keys, packable mask) for a list of ID strings."""
+    keys = np.zeros(len(ids), dtype=np.uint64)
+    ok = np.zeros(len(ids), dtype=bool)
+    idx = [i for i, v in enumerate(ids) if isinstance(v, str) and len(v) == ID_LEN and v.isascii()]
+    if not idx:
+        return keys, ok
+    raw = np.frombuffer("".join(ids[i] for i in idx).encode("ascii"), dtype=np.uint8)
+    vals = _LUT[raw.reshape(-1, ID_LEN)].astype(np.uint64)
+    k = np.zeros(len(idx), dtype=np.uint64)
+    for j in range(ID_LEN - 1):
+        k = (k << _U(6)) | vals[:, j]
+    k = (k << _U(4)) | (vals[:, -1] >> _U(2))
+    keys[idx] = k
+    ok[idx] = (vals < 64).all(axis=1) & (vals[:, -1] & _U(3) == 0)
+    return keys, ok
+
+
+def decode(key):
+    key = int(key)
+    chars = [ALPHABET[(key & 0xF) << 2]]
+    key >>= 4
+    for _ in range(ID_LEN - 1):
+        chars.append(ALPHABET[key & 0x3F])
+        key >>= 6
+    return "".join(reversed(chars))
+
+
+def _probes(keys, n_bits):
+    """(len(keys), BLOOM_PROBES) bit positions by double hashing."""
+    h1 = keys * _U(0x9E3779B97F4A7C15)
+    h2 = ((keys ^ (keys >> _U(31))) * _U(0xBF58476D1CE4E5B9)) | _U(1)
+    i = np.arange(BLOOM_PROBES, dtype=np.uint64)
+    return (h1[:, None] + i * h2[:, None]) & _U(n_bits - 1)
+
+
+class KnownIds:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.keys = np.zeros(0, dtype=np.uint64)   # sorted
+        self.recent = set()                        # keys added since the last merge
+        self.other = set()                         # IDs that don't pack into 64 bits
+        self.watermark = 0
+        self.refreshed_at = 0.0
+        self.bloom = np.zeros(1, dtype=np.uint8)
+        self.bloom_capacity = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys) + len(self.recent) + len(self.other)
+
+    def _bloom_add(self, keys):
+        pos = _probes(keys, len(self.bloom) * 8).ravel()
+        byte, bit = pos >> _U(3), pos & _U(7)
+        for b in range(8):   # one fancy-index OR per bit value: repeats within it are harmless
+            sel = byte[bit == b]
+            self.bloom[sel] |= np.uint8(1 << b)
+
+    def _bloom_rebuild(self, n):
+        self.bloom_capacity = max(2 * n, 1 << 20)
+        n_bits = 1 << int(np.ceil(np.log2(self.bloom_capacity * BLOOM_BITS_PER_KEY)))
+        self.bloom = np.zeros(n_bits // 8, dtype=np.uint8)
+        self._bloom_add(self.keys)
+
+    def _insert(self, keys):
+        """Add packed keys; merges into the sorted array only when refreshing."""
+        if len(self) + len(keys) > self.bloom_capacity:
+            self._merge()
+            self.keys = np.union1d(self.keys, keys)
+            self._bloom_rebuild(len(self.keys))
+        else:
+            self.recent.update(keys.tolist())
+            self._bloom_add(keys)
+
+    def _merge(self):
+        if self.recent:
+            self.keys = np.union1d(self.keys, np.fromiter(self.recent, dtype=np.uint64))
+            self.recent.clear()
+
+    def add(self, ids):
+        """Record IDs this process just inserted."""
+        keys, ok = encode(ids)
+        with self.lock:
+            self.other.update(v for v, good in zip(ids, ok) if not good)
+            if ok.any():
+                self._insert(keys[ok])
+
+    def refresh(self, force=False):
+        """Pull rows added to `videos` since the last call. Returns how many."""
+        with self.lock:
+            if not force and time.time() - self.refreshed_at < REFRESH_S:
+                return 0
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                cur = conn.execute("SELECT rowid, video_id FROM videos WHERE rowid > ? ORDER BY rowid",
+                                   (self.watermark,))
+                n, batches = 0, []
+                while True:
+                    rows = cur.fetchmany(FETCH_BATCH)
+                    if not rows:
+                        break
+                    ids = [r[1] for r in rows]
+                    keys, ok = encode(ids)
+                    self.other.update(v for v, good in zip(ids, ok) if not good)
+                    batches.append(keys[ok])
+                    self.watermark = rows[-1][0]
+                    n += len(rows)
+            finally:
+                conn.close()
+            if batches:
+                self._insert(np.concatenate(batches))
+            self._merge()
+            self.refreshed_at = time.time()
+            return n
+
+    def unknown_mask(self, ids):
+        """Boolean mask: True where the ID is not in the index."""
+        keys, ok = encode(ids)
+        with self.lock:
+            pos = _probes(keys, len(self.bloom) * 8)
+            maybe = ((self.bloom[pos >> _U(3)] >> (pos & _U(7)).astype(np.uint8)) & 1).all(axis=1)
+            maybe &= ok
+            unknown = ~maybe
+            check = np.nonzero(maybe)[0]
+            if len(check) and len(self.keys):
+                j = np.minimum(np.searchsorted(self.keys, keys[check]), len(self.keys) - 1)
+                unknown[check] = self.keys[j] != keys[check]
+            elif len(check):
+                unknown[check] = True
+            for i in check[unknown[check]]:
+                unknown[i] = int(keys[i]) not in self.recent
+            for i in np.nonzero(~ok)[0]:
+                unknown[i] = ids[i] not in self.other
+        return unknown
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared(db_path):
+    """The process-wide index for db_path, refreshed if it's older than REFRESH_S."""
+    with _shared_lock:
+        index = _shared.get(db_path)
+        if index is None:
+            index = _shared[db_path] = KnownIds(db_path)
+    index.refresh()
+    return index
+
+
+def drop_known(videos, db_path, key="id"):
+    """Candidates (dicts) whose ID isn't in the DB yet; logs how many were dropped.
+
+    Nothing is recorded here: a candidate one crawler's filters reject may
+    be accepted by another. Callers add() the IDs they actually insert.
+    """
+    if not videos:
+        return videos
+    index = shared(db_path)
+    ids = [v.get(key) or "" for v in videos]
+    unknown = index.unknown_mask(ids)
+    fresh = [v for v, new in zip(videos, unknown) if new and v.get(key)]
+    dropped = len(videos) - len(fresh)
+    if dropped:
+        print(f"    known-ID filter: dropped {dropped}/{len(videos)} candidates", flush=True)
+    return fresh
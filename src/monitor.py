@@ -12,6 +12,16 @@ def monitor():
             total_hours = c.execute("SELECT coalesce(sum(duration_seconds)/3600.0, 0) FROM videos WHERE status='completed'").fetchone()[0]
             avg_speed = c.execute("SELECT coalesce(avg(speed_ratio), 0) FROM videos WHERE status='completed' AND speed_ratio > 0").fetchone()[0]
             recent = c.execute("SELECT avg(speed_ratio) FROM (SELECT speed_ratio FROM videos WHERE status='completed' AND speed_ratio > 0 ORDER BY completed_at DESC LIMIT 20)").fetchone()[0] or 0
+            # Network cost per audio hour (rows downloaded with format selection)
+            try:
+                mb_per_h = c.execute("SELECT coalesce(sum(download_bytes)/1e6 / nullif(sum(duration_seconds)/3600.0, 0), 0) FROM videos WHERE status='completed' AND download_bytes > 0").fetchone()[0]
+            except sqlite3.OperationalError:
+                mb_per_h = 0
+            # Videos completed from uploader captions (no download, no GPU)
+            try:
+                from_captions = c.execute("SELECT count(*) FROM videos WHERE status='completed' AND transcript_source='captions'").fetchone()[0]
+            except sqlite3.OperationalError:
+                from_captions = 0
             
             # Estimate tokens (avg ~12K tokens per hour of speech)
             est_tokens = total_hours * 12000
@@ -23,7 +33,8 @@ def monitor():
             print(f"\r[{time.strftime('%H:%M:%S')}] "
                   f"Done: {completed} | Pending: {pending} | Errors: {errors} | "
                   f"Hours: {total_hours:.1f} | ~{est_tokens/1e6:.1f}M tokens | "
-                  f"Speed: {recent:.0f}x recent, {avg_speed:.0f}x avg", end="", flush=True)
+                  f"Speed: {recent:.0f}x recent, {avg_speed:.0f}x avg | "
+                  f"Net: {mb_per_h:.0f}MB/audio-h | Captions: {from_captions}", end="", flush=True)
             c.close()
         except:
             pass
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Parallel byte-range downloader for resolved media URLs.
+
+yt-dlp only resolves the stream URL + headers; the bytes are moved here:
+- file size from a 1-byte Range probe (Content-Range), then the file is
+  split into CHUNK_BYTES pieces fetched by `connections` threads
+- every thread reuses keep-alive connections from a shared HTTPPool
+- a chunk that dies mid-transfer is resumed from the last byte received
+- servers without Range support fall back to one plain streaming GET
+
+googlevideo throttles long single responses much harder than many short
+ranged ones, so small chunks over a few connections beat one big stream.
+When it throttles anyway, ThroughputMonitor notices the sustained collapse
+and download() raises Throttled instead of crawling until the timeout.
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from http_pool import HTTPPool
+
+CHUNK_BYTES = 1 << 20       # 1 MiB per range request
+READ_BYTES = 64 << 10
+MAX_CHUNK_RETRIES = 5
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HTTPPool()
+        return _pool
+
+
+class DownloadError(Exception):
+    pass
+
+
+class Throttled(DownloadError):
+    """Throughput stayed under the minimum rate for a whole window."""
+
+    def __init__(self, rate_bps, window_s):
+        super().__init__(f"throttled: {rate_bps / 1024:.1f} KB/s over {window_s:.0f}s")
+        self.rate_bps = rate_bps
+
+
+class ThroughputMonitor:
+    """Sliding-window byte rate. check() raises Throttled on sustained collapse.
+
+    Nothing is judged until `window_s` has passed since start(), so slow
+    connection setup isn't mistaken for throttling.
+    """
+
+    def __init__(self, min_rate_bps, window_s=20.0):
+        self.min_rate_bps = min_rate_bps
+        self.window_s = window_s
+        self.samples = deque()
+        self.started = None
+
+    def start(self):
+        self.started = time.time()
+        self.samples.clear()
+        self.samples.append((self.started, 0))
+
+    def sample(self, total_bytes):
+        now = time.time()
+        self.samples.append((now, total_bytes))
+        while len(self.samples) > 2 and self.samples[1][0] <= now - self.window_s:
+            self.samples.popleft()
+
+    def rate(self, total_bytes):
+        now = time.time()
+        t0, b0 = self.samples[0]
+        return (total_bytes - b0) / max(now - t0, 1e-6)
+
+    def check(self, total_bytes):
+        if not self.min_rate_bps or self.started is None:
+            return
+        self.sample(total_bytes)
+        if time.time() - self.started < self.window_s:
+            return
+        rate = self.rate(total_bytes)
+        if rate < self.min_rate_bps:
+            raise Throttled(rate, self.window_s)
+
+
+def probe_size(url, headers=None, pool=None):
+    """Return (total_size, supports_ranges). total_size is None if unknown."""
+    pool = pool or get_pool()
+    with pool.request("GET", url, {**(headers or {}), "Range": "bytes=0-0"}) as resp:
+        resp.read()
+        if resp.status == 206:
+            m = re.search(r"/(\d+)$", resp.getheader("Content-Range", ""))
+            return (int(m.group(1)) if m else None), True
+        if resp.status == 200:
+            length = resp.getheader("Content-Length")
+            return (int(length) if length else None), False
+        raise DownloadError(f"HTTP {resp.status} probing {url[:80]}")
+
+
+def _fetch_range(url, headers, start, end, fd, pool, progress, deadline, abort):
+    """Fetch bytes [start, end] into fd at the same offsets, resuming on errors."""
+    pos = start
+    for attempt in range(MAX_CHUNK_RETRIES):
+        if abort.is_set():
+            return
+        try:
+            rng = {**(headers or {}), "Range": f"bytes={pos}-{end}"}
+            with pool.request("GET", url, rng) as resp:
+                if resp.status != 206:
+                    raise DownloadError(f"HTTP {resp.status} for range {pos}-{end}")
+                while pos <= end:
+                    if deadline and time.time() > deadline:
+                        raise DownloadError("download deadline exceeded")
+                    if abort.is_set():
+                        return
+                    buf = resp.read(min(READ_BYTES, end - pos + 1))
+                    if not buf:
+                        break
+                    os.pwrite(fd, buf, pos)
+                    pos += len(buf)
+                    progress(len(buf))
+                resp.read()  # drain so the connection can be reused
+            if pos > end:
+                return
+        except DownloadError as e:
+            if "deadline" in str(e) or "HTTP 4" in str(e):
+                raise
+        except OSError:
+            pass
+        time.sleep(min(2 ** attempt * 0.5, 8))
+    raise DownloadError(f"range {start}-{end} failed at byte {pos} after {MAX_CHUNK_RETRIES} tries")
+
+
+def download(url, out_path, headers=None, connections=4, chunk_bytes=CHUNK_BYTES,
+             timeout=900, pool=None, on_progress=None, min_rate_bps=0, rate_window_s=20.0):
+    """Download url to out_path. Returns bytes written.
+
+    on_progress(bytes_done_total) is called from the transfer threads.
+    min_rate_bps > 0 aborts with Throttled once the aggregate rate stays
+    below it for rate_window_s seconds.
+    """
+    pool = pool or get_pool()
+    deadline = time.time() + timeout if timeout else None
+    size, ranged = probe_size(url, headers, pool)
+
+    done = [0]
+    done_lock = threading.Lock()
+    abort = threading.Event()
+    monitor = ThroughputMonitor(min_rate_bps, rate_window_s)
+    monitor.start()
+
+    def progress(n):
+        with done_lock:
+            done[0] += n
+            total = done[0]
+        if on_progress:
+            on_progress(total)
+
+    fd = os.open(out_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if not ranged or not size:
+            with pool.request("GET", url, headers) as resp:
+                if resp.status != 200:
+                    raise DownloadError(f"HTTP {resp.status} for {url[:80]}")
+                pos = 0
+                while True:
+                    if deadline and time.time() > deadline:
+                        raise DownloadError("download deadline exceeded")
+                    buf = resp.read(READ_BYTES)
+                    if not buf:
+                        break
+                    os.pwrite(fd, buf, pos)
+                    pos += len(buf)
+                    progress(len(buf))
+                    monitor.check(pos)
+            return pos
+
+        os.ftruncate(fd, size)
+        chunks = [(s, min(s + chunk_bytes, size) - 1) for s in range(0, size, chunk_bytes)]
+        chunks.reverse()  # pop() from the end = file order
+        chunk_lock = threading.Lock()
+        errors = []
+
+        def worker():
+            while not errors and not abort.is_set():
+                with chunk_lock:
+                    if not chunks:
+                        return
+                    start, end = chunks.pop()
+                try:
+                    _fetch_range(url, headers, start, end, fd, pool, progress, deadline, abort)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(max(1, min(connections, len(chunks))))]
+        for t in threads:
+            t.start()
+        # Watch aggregate throughput from here: a fully stalled connection
+        # never calls progress(), so the check can't live in the readers only
+        while True:
+            alive = [t for t in threads if t.is_alive()]
+            if not alive:
+                break
+            alive[0].join(1.0)
+            if not errors and not abort.is_set():
+                try:
+                    with done_lock:
+                        total = done[0]
+                    monitor.check(total)
+                except Throttled as e:
+                    errors.append(e)
+                    abort.set()
+        for t in threads:
+            t.join()  # readers exit at their next read (socket timeout at worst)
+        if errors:
+            raise errors[0]
+        return size
+    finally:
+        os.close(fd)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Compact segment timestamps: one zlib'd int32 blob per transcript.
+
+A segment is (start_ms, end_ms, char_start, char_end) on the original
+(1.0x, untrimmed) timeline, with character offsets into the stored
+transcript, so transcript[char_start:char_end] is the segment text.
+Stored column-wise as int32 with starts delta-encoded and ends as
+durations, which zlib squeezes to ~7 bytes per segment (~5 KB per
+lecture hour, vs ~50 KB of transcript text).
+"""
+import zlib
+import numpy as np
+
+VERSION = 1
+
+
+def char_spans(segments, transcript):
+    """(char_start, char_end) of each segment's text within transcript."""
+    spans, cursor = [], 0
+    for seg in segments:
+        text = " ".join(seg[2].split())
+        pos = transcript.find(text, cursor) if text else -1
+        if pos < 0:
+            pos = cursor
+            text = ""
+        spans.append((pos, pos + len(text)))
+        cursor = pos + len(text)
+    return spans
+
+
+def pack(segments, transcript):
+    """segments: [[start_s, end_s, text], ...] -> bytes."""
+    if not segments:
+        return b""
+    spans = char_spans(segments, transcript)
+    start = np.array([round(s[0] * 1000) for s in segments], dtype=np.int64)
+    end = np.array([round(s[1] * 1000) for s in segments], dtype=np.int64)
+    cs = np.array([a for a, _ in spans], dtype=np.int64)
+    ce = np.array([b for _, b in spans], dtype=np.int64)
+    cols = np.stack([np.diff(start, prepend=0), end - start,
+                     np.diff(cs, prepend=0), ce - cs]).astype("<i4")
+    return bytes([VERSION]) + zlib.compress(cols.tobytes(), 6)
+
+
+def unpack(blob):
+    """bytes -> (start_ms, end_ms, char_start, char_end) int64 arrays."""
+    if not blob:
+        return tuple(np.zeros(0, dtype=np.int64) for _ in range(4))
+    if blob[0] != VERSION:
+        raise ValueError(f"unknown segment blob version {blob[0]}")
+    cols = np.frombuffer(zlib.decompress(blob[1:]), dtype="<i4").reshape(4, -1).astype(np.int64)
+    start = np.cumsum(cols[0])
+    cs = np.cumsum(cols[2])
+    return start, start + cols[1], cs, cs + cols[3]
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""GPU worker: faster-whisper (CTranslate2) + 1.2x audio speedup + cookie rotation.
+"""GPU worker: faster-whisper (CTranslate2) + adaptive audio speedup + cookie rotation.
 
 Architecture:
 - N prefetch threads download audio via yt-dlp with cookie rotation
@@ -11,7 +11,7 @@ Cookie rotation:
 - Worker selects cookies based on GPU_ID % num_cookies
 - See README.md for cookie setup instructions
 """
-import os, sys, time, random, sqlite3, subprocess, glob, threading, queue, traceback
+import os, sys, time, random, sqlite3, subprocess, glob, threading, queue, traceback, json, re
 import numpy as np
 
 GPU_ID = int(sys.argv[1]) if len(sys.argv) > 1 else 0
@@ -19,11 +19,124 @@ DB_PATH = os.path.expanduser("~/academic_transcriptions/massive_production.db")
 WORK_DIR = os.path.expanduser("~/academic_transcriptions")
 YTDLP = os.path.join(WORK_DIR, "yt-dlp")
 MODEL_ID = "distil-large-v3.5"
+COMPUTE_TYPE = "float16"
+# Everything passed to model.transcribe(); stored per row (decode_params) with model_id
+DECODE_PARAMS = {"beam_size": 1, "vad_filter": False, "word_timestamps": False,
+                 "condition_on_previous_text": False}
 PREFETCH_DEPTH = 5
+PREFETCH_MAX_AUDIO_S = 4 * 3600  # queued audio across jobs (decoded PCM is ~115 MB per hour)
 PREFETCH_THREADS = 2
 CLAIM_BATCH = 15
-AUDIO_SPEED = 1.2
+AUTHORITY_TOP = 2000  # channels (by channel_rank.py authority) that get their own claim share
+AUDIO_SPEED = 1.2  # fallback when no speech-rate estimate is available
 MAX_DOWNLOAD_RETRIES = 3
+# Whisper only needs 16 kHz mono speech: take the smallest adequate audio-only
+# stream (typically opus 249 ~50 kbps, then m4a 139 ~48 kbps) instead of
+# bestaudio (~130-160 kbps) + mp3 re-encode. yt-dlp tries rungs left to right.
+MIN_AUDIO_ABR = 40
+AUDIO_FORMAT = (f"wa[acodec=opus][abr>={MIN_AUDIO_ABR}]/wa[abr>={MIN_AUDIO_ABR}]"
+                f"/ba[abr<=96]/ba/w")
+AUDIO_FORMAT_M4A = f"wa[acodec^=mp4a][abr>={MIN_AUDIO_ABR}]/ba[ext=m4a]/ba"
+# "ranged": yt-dlp only resolves the stream URL, bytes are fetched with parallel
+# Range requests over pooled keep-alive connections (falls back to "ytdlp" on
+# failure). "ytdlp": yt-dlp subprocess downloads everything itself.
+DOWNLOAD_ENGINE = "ranged"
+RANGE_CONNECTIONS = 4
+DOWNLOAD_TIMEOUT_S = 900
+# Resolver stage: resolve stream URLs (watch page + player JS + signatures)
+# for the next RESOLVE_AHEAD claimed videos before a download slot picks them up.
+# Unavailable videos (private/removed/...) are errored here without a download.
+RESOLVER_THREADS = 1
+RESOLVE_AHEAD = 4
+RESOLVE_MIN_TTL_S = 600  # re-resolve if the signed URL expires sooner than this
+# Throttle detection: a download whose throughput stays under THROTTLE_MIN_BPS
+# for THROTTLE_WINDOW_S is aborted and retried with the next identity below
+# (fresh cookie + player client + format ladder). Events go to throttle_events.
+THROTTLE_MIN_BPS = 64 * 1024
+THROTTLE_WINDOW_S = 30
+THROTTLE_IDENTITIES = [
+    (None, AUDIO_FORMAT),
+    ("mweb", AUDIO_FORMAT),
+    ("tv", AUDIO_FORMAT_M4A),
+]
+# Throttled on every identity: the video goes back to pending, unclaimable for
+# THROTTLE_RETRY_H * 2^retries hours, and errors out after THROTTLE_MAX_RETRIES.
+# The prefetch thread itself pauses THROTTLE_PAUSE_S before its next claim.
+THROTTLE_RETRY_H = 1
+THROTTLE_MAX_RETRIES = 5
+THROTTLE_PAUSE_S = 300
+# Captions first: videos with an uploader-authored (not auto-generated) caption
+# track in their own language are completed from it in the resolver stage — no
+# download, no GPU. CAPTION_AUDIT_RATE of them are still transcribed and the
+# caption-vs-Whisper WER goes to caption_audits. Needs RESOLVER_THREADS > 0.
+CAPTIONS_FIRST = True
+CAPTION_AUDIT_RATE = 0.02
+AUDIT_MAX_WORDS = 10_000   # audits score the leading span only: alignment cost is n x m
+AUDIT_MAX_CHARS = 8_000
+# Re-upload dedup: a landmark fingerprint of a FINGERPRINT_S excerpt (middle of
+# the file, 1.0x) is looked up against completed videos right after download.
+# A match with similar duration reuses that transcript (duplicate_of) — no GPU.
+DEDUP_AUDIO = True
+FINGERPRINT_S = 600
+DUP_MIN_SIMILARITY = 0.05  # unrelated audio scores ~0.004, shifted/noisy copies 0.12+
+DUP_MAX_DURATION_DIFF = 0.15
+# Audio archive (opt-in): keep downloaded audio in a content-addressed store
+# under ARCHIVE_BUDGET_GB so re-runs (better model, other speed, timestamps)
+# don't hit YouTube again. Consulted before every resolve/download; evicts
+# non-green, low-priority, least recently used audio first.
+ARCHIVE_AUDIO = False
+ARCHIVE_DIR = os.path.join(WORK_DIR, "audio_archive")
+ARCHIVE_BUDGET_GB = 500
+ARCHIVE_MAX_KBPS = 96  # don't spend the budget on bestaudio fallbacks
+# Re-transcription: RETRANSCRIBE_SHARE of each claim batch re-processes
+# completed Whisper rows matching RETRANSCRIBE_WHERE (":model_id" = MODEL_ID),
+# in RETRANSCRIBE_ORDER (archived audio first when the archive is on). The new
+# transcript replaces the old one only if it passes retranscript_problem()
+# and our claim (retranscribe_claimed_at) is still the current one.
+RETRANSCRIBE_SHARE = 0.0
+RETRANSCRIBE_WHERE = "COALESCE(model_id, '') != :model_id"
+RETRANSCRIBE_ORDER = "license_risk = 'green' DESC, priority DESC"
+RETRANSCRIBE_LEASE_H = 6
+RETRANSCRIBE_MIN_LEN_RATIO = 0.5   # new/old word count outside this band = suspicious
+RETRANSCRIBE_MAX_LEN_RATIO = 2.0
+# Adaptive atempo: pick the fastest speed in [SPEED_MIN, SPEED_MAX] that keeps
+# sped-up speech under TARGET_WPS words/sec. Rate comes from channel history
+# (speech_wps of completed rows from the same channel_id) or a CPU envelope probe.
+ADAPTIVE_SPEED = True
+SPEED_MIN = 1.0
+SPEED_MAX = 1.6
+TARGET_WPS = 3.0
+PROBE_START_S = 300      # skip intros/title music when the video is long enough
+PROBE_S = 90
+HISTORY_MIN_VIDEOS = 5
+HISTORY_REFRESH_S = 3600
+# Dead-air trimming on decoded PCM (prefetch threads, CPU only).
+# Gaps >= MIN_SILENCE_S below SILENCE_DB are cut; timestamps map back via offset map.
+TRIM_SILENCE = True
+SILENCE_DB = -45.0
+MIN_SILENCE_S = 3.0
+# Persist partial transcripts every N seconds of (original) audio so a crash
+# or restart 90 min into a 4h lecture resumes there instead of from zero
+CHECKPOINT_EVERY_S = 900
+# Per-video time budget: BUDGET_MIN_S + BUDGET_SLACK * audio / measured speed.
+# Past the budget the decode is aborted between segments; if no segment comes
+# back within BUDGET_HARD_GRACE_S after that (decoder hung in C++), the worker
+# process exits and watchdog.sh restarts it.
+BUDGET_SLACK = 4.0
+BUDGET_MIN_S = 120
+BUDGET_HARD_GRACE_S = 120
+INITIAL_SPEED = 60.0  # conservative realtime factor until we've measured our own
+STATS_PATH = f"/tmp/gpu_{GPU_ID}_stats.json"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import asr_metrics
+import audio_archive
+import audio_prep
+import captions
+import decode_guard
+import fingerprint
+import range_downloader
+import segments as segment_store
 
 # Cookie rotation: pool of real account cookies in cookie_pool/ directory.
 # Each download thread picks a cookie round-robin from the pool.
@@ -45,6 +158,7 @@ def load_cookie_pool():
 
 _cookie_pool = load_cookie_pool()
 _cookie_lock = threading.Lock()
+_cookie_sources = {}  # per-thread copy -> pool file (= account) it came from
 _cookie_counter = GPU_ID  # offset so each GPU starts on a different cookie
 
 def get_thread_cookie_file(thread_idx):
@@ -58,6 +172,7 @@ def get_thread_cookie_file(thread_idx):
     src = _cookie_pool[idx]
     dst = os.path.join(WORK_DIR, f"cookies_gpu{GPU_ID}_t{thread_idx}.txt")
     shutil.copy2(src, dst)
+    _cookie_sources[dst] = os.path.basename(src)
     print(f"[GPU {GPU_ID}] Thread {thread_idx} using cookie: {os.path.basename(src)}", flush=True)
     return dst
 
@@ -74,38 +189,147 @@ def get_db():
     return conn
 
 
+# Columns added on top of the original videos schema (added lazily, idempotent)
+EXTRA_COLUMNS = {
+    "silence_trimmed_seconds": "REAL",
+    "audio_speed": "REAL",
+    "speech_wps": "REAL",
+    "audio_format": "TEXT",
+    "download_bytes": "INTEGER",
+    "transcript_source": "TEXT",   # 'whisper' | 'captions' | 'duplicate'
+    "caption_lang": "TEXT",
+    "duplicate_of": "TEXT",
+    "model_id": "TEXT",
+    "decode_params": "TEXT",        # json: DECODE_PARAMS + compute type + trimming
+    "retranscribe_claimed_at": "TEXT",
+    "retranscribed_at": "TEXT",
+    "retranscribe_error": "TEXT",
+    "channel_id": "TEXT",           # uploading channel, when the crawler knew it
+    "throttle_retries": "INTEGER",
+    "retry_after": "TEXT",          # not claimable before this (throttle backoff)
+}
+
+
+def ensure_columns():
+    conn = get_db()
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(videos)").fetchall()}
+    for name, decl in EXTRA_COLUMNS.items():
+        if name not in cols:
+            conn.execute(f"ALTER TABLE videos ADD COLUMN {name} {decl}")
+    conn.commit()
+    conn.close()
+
+
+def ensure_tables():
+    conn = get_db()
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos(channel_id)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS transcript_checkpoints (
+        video_id TEXT PRIMARY KEY,
+        segments TEXT,
+        last_offset REAL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS throttle_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        at TEXT DEFAULT CURRENT_TIMESTAMP,
+        gpu INTEGER,
+        account TEXT,
+        client TEXT,
+        engine TEXT,
+        rate_bps REAL,
+        video_id TEXT
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS transcript_segments (
+        video_id TEXT PRIMARY KEY,
+        n_segments INTEGER,
+        data BLOB
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS audio_fingerprints (
+        video_id TEXT PRIMARY KEY,
+        duration REAL,
+        sketch BLOB,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS fingerprint_keys (
+        key INTEGER,
+        video_id TEXT
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fingerprint_keys_key ON fingerprint_keys(key)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS channel_authority (
+        channel_id TEXT PRIMARY KEY,
+        authority REAL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_channel_authority ON channel_authority(authority)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS caption_audits (
+        video_id TEXT PRIMARY KEY,
+        lang TEXT,
+        caption_text TEXT,
+        wer REAL,
+        cer REAL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.commit()
+    conn.close()
+
+
+ensure_columns()
+ensure_tables()
+archive = (audio_archive.AudioArchive(DB_PATH, ARCHIVE_DIR, ARCHIVE_BUDGET_GB << 30)
+           if ARCHIVE_AUDIO else None)
+
+
 # === Claim logic ===
 claim_lock = threading.Lock()
 claimed_queue = queue.Queue()
 
 
+def allocate(total, fracs):
+    """Split `total` claims by fractions (summing to 1), largest remainder first.
+    Ties are broken at random, so a bucket's long-run share is its fraction."""
+    exact = [total * f for f in fracs]
+    counts = [int(x) for x in exact]
+    order = sorted(range(len(fracs)), key=lambda i: (counts[i] - exact[i], random.random()))
+    for i in order[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
 def refill_claims():
     conn = get_db()
     try:
         # Weighted random sampling across priorities and durations.
         # Bias toward higher priority and shorter videos (faster downloads),
         # but still sample variety for dataset diversity.
-        # Strategy: pick from 4 buckets proportionally:
-        #   - 40% high priority short (<60min, P8+P9)
-        #   - 25% high priority long (60min+, P8+P9)
-        #   - 25% default priority short (<60min, P5+P7)
-        #   - 10% default priority long (60min+, P5+P7)
-        # Within each bucket: random sampling via ORDER BY RANDOM()
+        # Strategy: pick from 7 buckets proportionally (claims per 15-claim batch):
+        #   -  7% resume checkpointed partials                     (1)
+        #   - 40% GREEN (CC-licensed)                               (6)
+        #   - 23% high priority short (<60min, P8+P9)               (3)
+        #   -  5% high priority long (60min+, P8+P9)                (1)
+        #   - 10% channels ranked highest by channel_rank.py        (1 or 2)
+        #   - 10% default priority short (<60min, P5+P7)            (1 or 2)
+        #   -  5% default priority long (60min+, P5+P7)             (1)
+        # Counts come from allocate() (largest remainder), so they always add
+        # up to CLAIM_BATCH. Within each bucket: random sampling via ORDER BY RANDOM()
         # Priority: GREEN (CC-licensed) > high priority > default
         # RED content is excluded entirely
         buckets = [
+            ("video_id IN (SELECT video_id FROM transcript_checkpoints)", 0.07),  # resume partials
             ("license_risk = 'green'", 0.40),                              # CC-licensed first
-            ("license_risk != 'red' AND priority >= 8 AND duration_seconds < 3600", 0.25),
+            ("license_risk != 'red' AND priority >= 8 AND duration_seconds < 3600", 0.23),
             ("license_risk != 'red' AND priority >= 8 AND duration_seconds >= 3600", 0.05),
-            ("license_risk != 'red' AND priority < 8 AND duration_seconds < 3600", 0.20),
-            ("license_risk != 'red' AND priority < 8 AND duration_seconds >= 3600", 0.10),
+            ("license_risk != 'red' AND channel_id IN (SELECT channel_id FROM channel_authority "
+             f"ORDER BY authority DESC LIMIT {AUTHORITY_TOP})", 0.10),         # top-ranked channels
+            ("license_risk != 'red' AND priority < 8 AND duration_seconds < 3600", 0.10),
+            ("license_risk != 'red' AND priority < 8 AND duration_seconds >= 3600", 0.05),
         ]
         all_ids = []
-        for cond, frac in buckets:
-            n = max(int(CLAIM_BATCH * frac), 1)
+        for (cond, _), n in zip(buckets, allocate(CLAIM_BATCH, [f for _, f in buckets])):
+            if not n:
+                continue
             rows = conn.execute(
                 f"SELECT video_id FROM videos WHERE status='pending' "
                 f"AND (duration_seconds >= 900 OR duration_seconds IS NULL OR duration_seconds = 0) "
+                f"AND (retry_after IS NULL OR retry_after <= datetime('now')) "
                 f"AND ({cond}) ORDER BY RANDOM() LIMIT ?", (n,)
             ).fetchall()
             all_ids.extend(r[0] for r in rows)
@@ -115,23 +339,24 @@ def refill_claims():
             rows = conn.execute(
                 "SELECT video_id FROM videos WHERE status='pending' "
                 "AND (duration_seconds >= 900 OR duration_seconds IS NULL OR duration_seconds = 0) "
+                "AND (retry_after IS NULL OR retry_after <= datetime('now')) "
                 "AND (license_risk IS NULL OR license_risk != 'red') "
                 "ORDER BY RANDOM() LIMIT ?", (CLAIM_BATCH,)
             ).fetchall()
             all_ids = [r[0] for r in rows]
 
         if not all_ids:
-            return []
+            return claim_retranscriptions(conn)
 
         placeholders = ",".join("?" * len(all_ids))
         cur = conn.execute(
             f"UPDATE videos SET status='processing', processing_started_at=datetime('now') "
             f"WHERE video_id IN ({placeholders}) "
-            f"RETURNING video_id, title", all_ids
+            f"RETURNING video_id, title, channel_id", all_ids
         )
         rows = cur.fetchall()
         conn.commit()
-        return rows
+        return rows + claim_retranscriptions(conn)
     except Exception as e:
         print(f"[GPU {GPU_ID}] Claim error: {e}", flush=True)
         return []
@@ -139,6 +364,37 @@ def refill_claims():
         conn.close()
 
 
+retranscribing = {}  # video_id -> retranscribe_claimed_at lease (compare-and-swap token)
+
+
+def claim_retranscriptions(conn):
+    """Lease RETRANSCRIBE_SHARE of a batch worth of completed rows for re-processing."""
+    want = CLAIM_BATCH * RETRANSCRIBE_SHARE
+    n = int(want) + (random.random() < want - int(want))
+    if n <= 0:
+        return []
+    order = RETRANSCRIBE_ORDER
+    if archive is not None:
+        order = "video_id IN (SELECT video_id FROM audio_archive) DESC, " + order
+    rows = conn.execute(
+        "UPDATE videos SET retranscribe_claimed_at=datetime('now') WHERE video_id IN ("
+        "  SELECT video_id FROM videos WHERE status='completed' "
+        "  AND COALESCE(transcript_source, 'whisper') = 'whisper' "
+        f"  AND ({RETRANSCRIBE_WHERE}) "
+        "  AND retranscribe_error IS NULL "          # failed once: don't burn the GPU on it again
+        "  AND (retranscribe_claimed_at IS NULL "
+        "       OR retranscribe_claimed_at < datetime('now', :lease)) "
+        f"  ORDER BY {order} LIMIT :n) "
+        "RETURNING video_id, title, channel_id, retranscribe_claimed_at",
+        {"model_id": MODEL_ID, "n": n, "lease": f"-{RETRANSCRIBE_LEASE_H} hours"}).fetchall()
+    conn.commit()
+    for r in rows:
+        retranscribing[r[0]] = r[3]
+    if rows:
+        print(f"[GPU {GPU_ID}] Claimed {len(rows)} videos for re-transcription", flush=True)
+    return [r[:3] for r in rows]
+
+
 def get_claimed():
     with claim_lock:
         if claimed_queue.empty():
@@ -150,45 +406,394 @@ def get_claimed():
         return None
 
 
-def mark_done(video_id, transcript, duration_s, transcribe_s):
+def save_segments(conn, video_id, segments, transcript):
+    """Segment timestamps (original-audio seconds) -> transcript_segments, in conn's transaction."""
+    if not segments:
+        conn.execute("DELETE FROM transcript_segments WHERE video_id=?", (video_id,))
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO transcript_segments (video_id, n_segments, data) VALUES (?, ?, ?)",
+        (video_id, len(segments), segment_store.pack(segments, transcript)))
+
+
+def mark_done(video_id, transcript, duration_s, transcribe_s, trimmed_s=0.0,
+              audio_speed=AUDIO_SPEED, segments=None, **fields):
+    """Complete a video. Extra keyword args are stored in same-named EXTRA_COLUMNS.
+
+    segments: [[start_s, end_s, text], ...] on the original timeline, or None.
+    """
     conn = get_db()
     speed = duration_s / transcribe_s if transcribe_s > 0 else 0
+    spoken_s = duration_s - trimmed_s
+    wps = len(transcript.split()) / spoken_s if spoken_s > 0 else None
+    extra = "".join(f"{k}=?, " for k in fields if k in EXTRA_COLUMNS)
     conn.execute(
         "UPDATE videos SET status='completed', transcript=?, duration_seconds=?, "
-        "processing_time_seconds=?, speed_ratio=?, completed_at=datetime('now') WHERE video_id=?",
-        (transcript, duration_s, transcribe_s, speed, video_id))
+        "processing_time_seconds=?, speed_ratio=?, silence_trimmed_seconds=?, "
+        f"audio_speed=?, speech_wps=?, {extra}completed_at=datetime('now') WHERE video_id=?",
+        (transcript, duration_s, transcribe_s, speed, trimmed_s, audio_speed, wps,
+         *[v for k, v in fields.items() if k in EXTRA_COLUMNS], video_id))
+    if segments is not None:
+        save_segments(conn, video_id, segments, transcript)
+    conn.execute("DELETE FROM transcript_checkpoints WHERE video_id=?", (video_id,))
     conn.commit()
     conn.close()
 
 
 def mark_error(video_id, error):
+    if video_id in retranscribing:
+        return retranscribe_failed(video_id, error)
     conn = get_db()
     conn.execute(
         "UPDATE videos SET status='error', error=? WHERE video_id=?",
         (str(error)[:500], video_id))
+    conn.execute("DELETE FROM transcript_checkpoints WHERE video_id=?", (video_id,))
+    conn.commit()
+    conn.close()
+
+
+def release_throttled(video_id):
+    """Hand a video throttled on every identity back to the queue with backoff;
+    errors it once it has been throttled THROTTLE_MAX_RETRIES times."""
+    if retranscribing.pop(video_id, None) is not None:
+        return      # keep the lease: the row comes round again when it expires
+    conn = get_db()
+    row = conn.execute("SELECT COALESCE(throttle_retries, 0) FROM videos WHERE video_id=?",
+                       (video_id,)).fetchone()
+    retries = (row[0] if row else 0) + 1
+    conn.close()
+    if retries > THROTTLE_MAX_RETRIES:
+        return mark_error(video_id, "throttled")
+    hours = THROTTLE_RETRY_H * 2 ** (retries - 1)
+    conn = get_db()
+    conn.execute(
+        "UPDATE videos SET status='pending', throttle_retries=?, "
+        "retry_after=datetime('now', ?) WHERE video_id=? AND status='processing'",
+        (retries, f"+{hours} hours", video_id))
+    conn.commit()
+    conn.close()
+    print(f"[GPU {GPU_ID}] {video_id}: throttled on every identity, back to pending "
+          f"in {hours}h (retry {retries}/{THROTTLE_MAX_RETRIES})", flush=True)
+
+
+# === Re-transcription ===
+def retranscribe_failed(video_id, error):
+    """Keep the existing transcript; record why the re-run didn't replace it."""
+    lease = retranscribing.pop(video_id, None)
+    conn = get_db()
+    conn.execute(
+        "UPDATE videos SET retranscribe_error=?, retranscribe_claimed_at=NULL "
+        "WHERE video_id=? AND retranscribe_claimed_at=?", (str(error)[:500], video_id, lease))
+    conn.execute("DELETE FROM transcript_checkpoints WHERE video_id=?", (video_id,))
+    conn.commit()
+    conn.close()
+    print(f"[GPU {GPU_ID}] {video_id}: re-transcription kept old transcript ({error})", flush=True)
+
+
+def retranscript_problem(new, old, spoken_s):
+    """Reason the new transcript shouldn't replace the old one, or None."""
+    words = len(new.split())
+    if not words:
+        return "empty_transcript"
+    if spoken_s > 60 and not 0.3 <= words / spoken_s <= 6.0:
+        return f"implausible_rate_{words / spoken_s:.2f}wps"
+    if decode_guard.compression_ratio(new) > decode_guard.RepetitionGuard().max_compression:
+        return "repetitive"
+    old_words = len((old or "").split())
+    if old_words:
+        ratio = words / old_words
+        if not RETRANSCRIBE_MIN_LEN_RATIO <= ratio <= RETRANSCRIBE_MAX_LEN_RATIO:
+            return f"length_ratio_{ratio:.2f}"
+    return None
+
+
+def finish_retranscription(video_id, transcript, duration_s, transcribe_s, trimmed_s,
+                           audio_speed, segments=None, **fields):
+    """Swap in the new transcript if it passes checks and our lease still holds.
+
+    Returns True if replaced. Same extra fields as mark_done().
+    """
+    lease = retranscribing.get(video_id)
+    conn = get_db()
+    row = conn.execute("SELECT transcript FROM videos WHERE video_id=?", (video_id,)).fetchone()
+    conn.close()
+    problem = retranscript_problem(transcript, row[0] if row else None, duration_s - trimmed_s)
+    if problem:
+        retranscribe_failed(video_id, problem)
+        return False
+    retranscribing.pop(video_id, None)
+    speed = duration_s / transcribe_s if transcribe_s > 0 else 0
+    spoken_s = duration_s - trimmed_s
+    wps = len(transcript.split()) / spoken_s if spoken_s > 0 else None
+    extra = "".join(f"{k}=?, " for k in fields if k in EXTRA_COLUMNS)
+    conn = get_db()
+    cur = conn.execute(
+        "UPDATE videos SET transcript=?, processing_time_seconds=?, speed_ratio=?, "
+        f"silence_trimmed_seconds=?, audio_speed=?, speech_wps=?, {extra}"
+        "retranscribe_error=NULL, retranscribe_claimed_at=NULL, retranscribed_at=datetime('now') "
+        "WHERE video_id=? AND status='completed' AND retranscribe_claimed_at=?",
+        (transcript, transcribe_s, speed, trimmed_s, audio_speed, wps,
+         *[v for k, v in fields.items() if k in EXTRA_COLUMNS], video_id, lease))
+    if cur.rowcount == 1:
+        save_segments(conn, video_id, segments, transcript)
+    conn.execute("DELETE FROM transcript_checkpoints WHERE video_id=?", (video_id,))
+    conn.commit()
+    conn.close()
+    if cur.rowcount != 1:
+        print(f"[GPU {GPU_ID}] {video_id}: lost re-transcription lease, result dropped", flush=True)
+        return False
+    return True
+
+
+# === Checkpoints ===
+# segments: [[start_s, end_s, text], ...] on the original (1.0x, untrimmed) timeline.
+# last_offset: original-audio second up to which the transcript is complete.
+def save_checkpoint(video_id, segments, last_offset):
+    conn = get_db()
+    conn.execute(
+        "INSERT OR REPLACE INTO transcript_checkpoints (video_id, segments, last_offset, updated_at) "
+        "VALUES (?, ?, ?, datetime('now'))",
+        (video_id, json.dumps(segments, ensure_ascii=False), last_offset))
     conn.commit()
     conn.close()
 
 
+def load_checkpoint(video_id):
+    """Return (segments, last_offset) or (None, 0.0) if there is no checkpoint."""
+    conn = get_db()
+    row = conn.execute(
+        "SELECT segments, last_offset FROM transcript_checkpoints WHERE video_id=?",
+        (video_id,)).fetchone()
+    conn.close()
+    if not row:
+        return None, 0.0
+    try:
+        return json.loads(row[0]), float(row[1] or 0)
+    except (ValueError, TypeError):
+        return None, 0.0
+
+
+# === Speech rate history ===
+_history = {"by_channel": {}, "loaded_at": 0}
+_history_lock = threading.Lock()
+
+
+def channel_wps(channel_id):
+    """Mean words/sec of completed videos from the same channel, or None.
+
+    Keyed by channel_id, not `university`: that column mostly holds crawler
+    tags ('related', 'cc_search', ...) shared by videos from many channels."""
+    if not channel_id:
+        return None
+    with _history_lock:
+        if time.time() - _history["loaded_at"] > HISTORY_REFRESH_S:
+            _history["loaded_at"] = time.time()
+            conn = get_db()
+            try:
+                rows = conn.execute(
+                    "SELECT channel_id, AVG(speech_wps) FROM videos "
+                    "WHERE status='completed' AND speech_wps > 0 AND channel_id IS NOT NULL "
+                    "AND COALESCE(transcript_source, 'whisper') = 'whisper' "
+                    "GROUP BY channel_id HAVING COUNT(*) >= ?", (HISTORY_MIN_VIDEOS,)).fetchall()
+                _history["by_channel"] = dict(rows)
+            except sqlite3.OperationalError as e:
+                print(f"[GPU {GPU_ID}] Speech-rate history error: {e}", flush=True)
+            finally:
+                conn.close()
+        return _history["by_channel"].get(channel_id)
+
+
+def pick_speed(audio_path, dur, channel_id):
+    """Return (atempo factor, words/sec estimate, where the estimate came from)."""
+    if not ADAPTIVE_SPEED:
+        return AUDIO_SPEED, None, "fixed"
+    wps = channel_wps(channel_id)
+    origin = "history"
+    if wps is None:
+        start = PROBE_START_S if dur > PROBE_START_S + PROBE_S else 0
+        probe = audio_prep.decode_pcm(audio_path, start=start, duration=PROBE_S, timeout=60)
+        wps = audio_prep.estimate_wps(probe) if probe is not None else None
+        origin = "probe"
+    if wps is None:
+        return AUDIO_SPEED, None, "fallback"
+    return audio_prep.choose_speed(wps, TARGET_WPS, SPEED_MIN, SPEED_MAX,
+                                   default=AUDIO_SPEED), wps, origin
+
+
 # === Download ===
-def download_audio(video_id, tmp_dir, cookie_file=None):
-    """Download audio as mp3 at 1.2x speed, return (file_path, duration) or None.
-    
-    Pipeline: yt-dlp downloads webm → ffmpeg converts to mp3 with atempo=1.2x.
-    The 1.2x speedup saves 17% GPU time. mp3 is smaller for temp storage.
+def kill_process_group(proc):
+    import signal
+    try:
+        os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        proc.kill()
+    proc.wait()
+
+
+def record_throttle(video_id, cookie_file, client, engine, rate_bps):
+    account = _cookie_sources.get(cookie_file, "none")
+    print(f"[GPU {GPU_ID}] Throttled {video_id}: {rate_bps / 1024:.1f} KB/s "
+          f"(account={account}, client={client or 'default'}, {engine})", flush=True)
+    try:
+        conn = get_db()
+        conn.execute(
+            "INSERT INTO throttle_events (gpu, account, client, engine, rate_bps, video_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (GPU_ID, account, client or "default", engine, rate_bps, video_id))
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"[GPU {GPU_ID}] throttle_events write failed: {e}", flush=True)
+
+
+def identity_args(identity):
+    """yt-dlp args for a THROTTLE_IDENTITIES entry."""
+    client, fmt = THROTTLE_IDENTITIES[identity]
+    args = ["-f", fmt]
+    if client:
+        args += ["--extractor-args", f"youtube:player_client={client}"]
+    return args
+
+
+def resolve_stream(video_id, cookie_file=None, timeout=120, identity=0):
+    """Ask yt-dlp for the selected audio format only (no download).
+
+    Returns the info dict (url, http_headers, format_id, ext, duration, ...)
+    or raises RuntimeError with yt-dlp's error line.
+    """
+    cmd = [YTDLP, "--js-runtimes", "node"]
+    if cookie_file:
+        cmd += ["--cookies", cookie_file]
+    cmd += identity_args(identity)
+    cmd += ["-j", "--no-playlist",
+            "--socket-timeout", "30", "--no-warnings", "--no-check-certificates",
+            f"https://www.youtube.com/watch?v={video_id}"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, cwd=WORK_DIR, start_new_session=True)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(proc)
+        raise RuntimeError("resolve_timeout")
+    if proc.returncode != 0 or not stdout.strip():
+        err = [l for l in (stderr or "").splitlines() if "ERROR" in l]
+        raise RuntimeError(err[-1] if err else f"yt-dlp exit {proc.returncode}")
+    info = json.loads(stdout)
+    if not info.get("url"):
+        raise RuntimeError("no direct url for selected format")
+    return info
+
+
+def stream_expiry(info):
+    """Unix time the signed stream URL stops working (googlevideo `expire=` param)."""
+    m = re.search(r"[?&]expire=(\d+)", info.get("url") or "")
+    return int(m.group(1)) if m else time.time() + 3600
+
+
+# yt-dlp error lines that mean "don't bother downloading, ever"
+UNAVAILABLE = re.compile(
+    r"Private video|Video unavailable|has been removed|account associated with this video|"
+    r"members.only|Join this channel|This live event|Premieres in|copyright claim|"
+    r"not available in your country|confirm your age", re.IGNORECASE)
+
+
+def download_audio_ranged(video_id, tmp_dir, cookie_file=None, info=None, identity=0):
+    """Resolve with yt-dlp (unless pre-resolved), then fetch with range_downloader.
+
+    Same return as download_audio().
+    """
+    if info is None or stream_expiry(info) - time.time() < RESOLVE_MIN_TTL_S:
+        info = resolve_stream(video_id, cookie_file, identity=identity)
+    out_path = os.path.join(tmp_dir, f"{video_id}.{info.get('ext') or 'webm'}")
+    try:
+        n = range_downloader.download(
+            info["url"], out_path, headers=info.get("http_headers"),
+            connections=RANGE_CONNECTIONS, timeout=DOWNLOAD_TIMEOUT_S,
+            min_rate_bps=THROTTLE_MIN_BPS, rate_window_s=THROTTLE_WINDOW_S)
+    except Exception:
+        try:
+            os.unlink(out_path)
+        except OSError:
+            pass
+        raise
+    abr = info.get("abr")
+    fmt = (f"{info.get('format_id')}/{(info.get('acodec') or '?').split('.')[0]}/"
+           f"{int(abr) if abr else '?'}k")
+    return out_path, float(info.get("duration") or 0), {"format": fmt, "bytes": n}
+
+
+def download_audio(video_id, tmp_dir, cookie_file=None, info=None, identity=0):
+    """Fetch audio with DOWNLOAD_ENGINE, falling back to the yt-dlp subprocess.
+
+    Raises range_downloader.Throttled (no fallback) so the caller can switch identity.
+    """
+    if DOWNLOAD_ENGINE == "ranged":
+        try:
+            return download_audio_ranged(video_id, tmp_dir, cookie_file, info, identity)
+        except range_downloader.Throttled as e:
+            e.engine = "ranged"
+            raise
+        except Exception as e:
+            print(f"[GPU {GPU_ID}] Ranged download failed {video_id}: {e} — "
+                  f"falling back to yt-dlp", flush=True)
+    return download_audio_ytdlp(video_id, tmp_dir, cookie_file, identity)
+
+
+def wait_download(proc, video_id, tmp_dir, timeout):
+    """proc.communicate() plus a throughput check on the growing output file(s).
+
+    The rate clock starts at the first byte on disk, so slow resolution
+    (player JS, signatures) isn't counted as throttling.
+    """
+    out = {}
+    t = threading.Thread(target=lambda: out.update(zip(("stdout", "stderr"), proc.communicate())),
+                         daemon=True)
+    t.start()
+    monitor = range_downloader.ThroughputMonitor(THROTTLE_MIN_BPS, THROTTLE_WINDOW_S)
+    deadline = time.time() + timeout
+    while True:
+        t.join(2)
+        if not t.is_alive():
+            return out.get("stdout", "")
+        if time.time() > deadline:
+            kill_process_group(proc)
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        size = 0
+        for f in glob.glob(os.path.join(tmp_dir, f"{video_id}.*")):
+            try:
+                size += os.path.getsize(f)
+            except OSError:
+                pass
+        if size and monitor.started is None:
+            monitor.start()
+        try:
+            monitor.check(size)
+        except range_downloader.Throttled as e:
+            e.engine = "ytdlp"
+            kill_process_group(proc)
+            raise
+
+
+def download_audio_ytdlp(video_id, tmp_dir, cookie_file=None, identity=0):
+    """Download the smallest adequate audio stream as-is.
+
+    Returns (file_path, duration, meta) or None; meta has the chosen
+    format ("249/opus/50k") and bytes downloaded. No re-encode: the per-video
+    atempo + 16 kHz resample happen once, when prepare_audio() decodes to PCM.
     Uses process group kill to prevent zombie ffmpeg on timeout.
     """
     out_template = os.path.join(tmp_dir, f"{video_id}.%(ext)s")
-    out_path = os.path.join(tmp_dir, f"{video_id}.mp3")
 
     for attempt in range(MAX_DOWNLOAD_RETRIES):
+        out_path = None
         try:
             cmd = [YTDLP, "--js-runtimes", "node"]
             if cookie_file:
                 cmd += ["--cookies", cookie_file]
+            cmd += identity_args(identity)
             cmd += [
-                "-x", "--audio-format", "mp3", "--audio-quality", "5",
-                "--postprocessor-args", f"ffmpeg:-filter:a atempo={AUDIO_SPEED}",
+                "--print", "after_move:%(format_id)s\t%(acodec)s\t%(abr)s\t%(filepath)s",
+                "--no-simulate",
                 "-o", out_template, "--no-playlist",
                 "--socket-timeout", "30", "--retries", "3",
                 "--no-warnings", "--no-check-certificates",
@@ -197,18 +802,16 @@ def download_audio(video_id, tmp_dir, cookie_file=None):
             # Popen with process group so timeout kills yt-dlp + ffmpeg children
             proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                                      text=True, cwd=WORK_DIR, start_new_session=True)
-            try:
-                proc.communicate(timeout=900)
-            except subprocess.TimeoutExpired:
-                import signal
-                try:
-                    os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
-                except (OSError, ProcessLookupError):
-                    proc.kill()
-                proc.wait()
-                raise
+            stdout = wait_download(proc, video_id, tmp_dir, DOWNLOAD_TIMEOUT_S)
 
-            if not os.path.exists(out_path):
+            fmt = ""
+            for line in (stdout or "").splitlines():
+                parts = line.split("\t")
+                if len(parts) == 4:
+                    fmt_id, acodec, abr, out_path = parts
+                    abr = abr.split(".")[0] if abr not in ("NA", "None") else "?"
+                    fmt = f"{fmt_id}/{acodec.split('.')[0]}/{abr}k"
+            if not out_path or not os.path.exists(out_path):
                 matches = [f for f in glob.glob(os.path.join(tmp_dir, f"{video_id}.*"))
                            if not f.endswith(".part")]
                 out_path = matches[0] if matches else None
@@ -228,11 +831,11 @@ def download_audio(video_id, tmp_dir, cookie_file=None):
                     ["ffprobe", "-v", "quiet", "-show_entries", "format=duration",
                      "-of", "default=noprint_wrappers=1:nokey=1", out_path],
                     capture_output=True, text=True, timeout=10)
-                duration = float(probe.stdout.strip()) * AUDIO_SPEED  # original duration
+                duration = float(probe.stdout.strip())
             except Exception:
                 duration = 0
 
-            # Clean up webm/intermediate files, keep only mp3
+            # Clean up intermediate files, keep only the final audio
             for f in glob.glob(os.path.join(tmp_dir, f"{video_id}.*")):
                 if f != out_path:
                     try:
@@ -240,8 +843,15 @@ def download_audio(video_id, tmp_dir, cookie_file=None):
                     except OSError:
                         pass
 
-            return out_path, duration
+            return out_path, duration, {"format": fmt, "bytes": os.path.getsize(out_path)}
 
+        except range_downloader.Throttled:
+            for f in glob.glob(os.path.join(tmp_dir, f"{video_id}.*")):
+                try:
+                    os.unlink(f)
+                except OSError:
+                    pass
+            raise
         except Exception as e:
             for f in glob.glob(os.path.join(tmp_dir, f"{video_id}.*")):
                 try:
@@ -258,29 +868,296 @@ def download_audio(video_id, tmp_dir, cookie_file=None):
     return None
 
 
+# === Captions ===
+pending_audits = {}  # video_id -> (lang, caption text), compared once Whisper is done
+
+
+def try_captions(row, info):
+    """Complete a video from its manual caption track. Returns True if done."""
+    track = captions.pick_track(info)
+    if not track:
+        return False
+    vid = row[0]
+    lang, ext, url = track
+    dur = float(info.get("duration") or 0)
+    try:
+        segments = captions.fetch_segments(range_downloader.get_pool(), url, ext)
+    except Exception as e:
+        print(f"[GPU {GPU_ID}] Caption fetch failed {vid}: {e}", flush=True)
+        return False
+    if not captions.usable(segments, dur):
+        return False
+    transcript = captions.to_transcript(segments)
+    if random.random() < CAPTION_AUDIT_RATE:
+        pending_audits[vid] = (lang, transcript)
+        return False
+    mark_done(vid, transcript, dur, 0.0, audio_speed=1.0, segments=segments,
+              transcript_source="captions", caption_lang=lang)
+    print(f"[GPU {GPU_ID}] {vid}: {dur/60:.1f}min from '{lang}' captions ({ext}), "
+          f"no download", flush=True)
+    return True
+
+
+def record_caption_audit(vid, lang, caption_text, transcript):
+    """Store caption-vs-Whisper WER/CER (Whisper output as reference) over the
+    first AUDIT_MAX_WORDS words / AUDIT_MAX_CHARS characters."""
+    try:
+        w = asr_metrics.wer(transcript, caption_text, limit=AUDIT_MAX_WORDS)
+        c = asr_metrics.cer(transcript, caption_text, limit=AUDIT_MAX_CHARS)
+        conn = get_db()
+        conn.execute(
+            "INSERT OR REPLACE INTO caption_audits (video_id, lang, caption_text, wer, cer) "
+            "VALUES (?, ?, ?, ?, ?)", (vid, lang, caption_text, w, c))
+        conn.commit()
+        conn.close()
+        print(f"[GPU {GPU_ID}] {vid}: caption audit WER={w:.3f} CER={c:.3f}", flush=True)
+    except Exception as e:
+        print(f"[GPU {GPU_ID}] Caption audit failed {vid}: {e}", flush=True)
+
+
+# === Re-upload dedup ===
+def save_fingerprint(vid, sk, dur):
+    conn = get_db()
+    conn.execute("INSERT OR REPLACE INTO audio_fingerprints (video_id, duration, sketch) "
+                 "VALUES (?, ?, ?)", (vid, dur, fingerprint.to_blob(sk)))
+    conn.execute("DELETE FROM fingerprint_keys WHERE video_id=?", (vid,))
+    conn.executemany("INSERT INTO fingerprint_keys (key, video_id) VALUES (?, ?)",
+                     [(int(k), vid) for k in sk[:fingerprint.INDEX_KEYS, 0]])
+    conn.commit()
+    conn.close()
+
+
+def find_duplicate(vid, sk, dur):
+    """Completed video with the same audio, as (video_id, similarity), or None."""
+    keys = [int(k) for k in sk[:fingerprint.INDEX_KEYS, 0]]
+    if not keys:
+        return None
+    conn = get_db()
+    rows = conn.execute(
+        "SELECT COALESCE(v.duplicate_of, v.video_id), f.duration, f.sketch "
+        "FROM audio_fingerprints f JOIN videos v ON v.video_id = f.video_id "
+        "WHERE f.video_id IN (SELECT DISTINCT video_id FROM fingerprint_keys "
+        f"WHERE key IN ({','.join('?' * len(keys))})) "
+        "AND f.video_id != ? AND v.status = 'completed'", (*keys, vid)).fetchall()
+    conn.close()
+    best = None
+    for other, other_dur, blob in rows:
+        if other_dur and abs(dur - other_dur) > DUP_MAX_DURATION_DIFF * max(dur, other_dur):
+            continue
+        sim = fingerprint.similarity(sk, fingerprint.from_blob(blob))
+        if sim >= DUP_MIN_SIMILARITY and (best is None or sim > best[1]):
+            best = (other, sim)
+    return best
+
+
+def check_duplicate(vid, audio_path, dur):
+    """Fingerprint the download, index it, and return a match or None."""
+    try:
+        start = max(dur / 2 - FINGERPRINT_S / 2, 0)
+        pcm = audio_prep.decode_pcm(audio_path, start=start, duration=FINGERPRINT_S, timeout=120)
+        if pcm is None:
+            return None
+        sk = fingerprint.fingerprint(pcm)
+        if len(sk) == 0:
+            return None
+        match = find_duplicate(vid, sk, dur)
+        save_fingerprint(vid, sk, dur)
+        return match
+    except Exception as e:
+        print(f"[GPU {GPU_ID}] Fingerprint error {vid}: {e}", flush=True)
+        return None
+
+
+def complete_duplicate(vid, orig, dur, meta):
+    conn = get_db()
+    row = conn.execute("SELECT transcript FROM videos WHERE video_id=?", (orig,)).fetchone()
+    conn.close()
+    if not row or not row[0]:
+        return False
+    mark_done(vid, row[0], dur, 0.0, audio_speed=1.0, transcript_source="duplicate",
+              duplicate_of=orig, audio_format=meta["format"], download_bytes=meta["bytes"])
+    conn = get_db()
+    conn.execute("INSERT OR REPLACE INTO transcript_segments (video_id, n_segments, data) "
+                 "SELECT ?, n_segments, data FROM transcript_segments WHERE video_id=?", (vid, orig))
+    conn.commit()
+    conn.close()
+    return True
+
+
+# === Resolve ahead ===
+# Items: (row, info) — info is None if resolution failed transiently, in which
+# case the download thread resolves again itself.
+resolved_q = queue.Queue(maxsize=RESOLVE_AHEAD)
+
+
+def resolver(idx):
+    cookie_file = get_thread_cookie_file(f"r{idx}")
+    print(f"[GPU {GPU_ID}] Resolver thread {idx} started", flush=True)
+    while True:
+        try:
+            row = get_claimed()
+            if not row:
+                time.sleep(2)
+                continue
+            if archive is not None and archive.get(row[0]):
+                resolved_q.put((row, None))  # prefetcher takes it from the archive
+                continue
+            info = None
+            try:
+                info = resolve_stream(row[0], cookie_file)
+            except Exception as e:
+                if UNAVAILABLE.search(str(e)):
+                    mark_error(row[0], f"unavailable: {e}")
+                    continue
+                print(f"[GPU {GPU_ID}] Resolve failed {row[0]}: {e}", flush=True)
+            if (info and CAPTIONS_FIRST and row[0] not in retranscribing
+                    and try_captions(row, info)):
+                continue
+            resolved_q.put((row, info))  # blocks once RESOLVE_AHEAD are waiting
+        except Exception as e:
+            print(f"[GPU {GPU_ID}] Resolver error: {e}", flush=True)
+            time.sleep(2)
+
+
+def next_download():
+    """Next (row, info) for a download thread, or None if nothing is ready."""
+    if RESOLVER_THREADS > 0:
+        try:
+            return resolved_q.get(timeout=2)
+        except queue.Empty:
+            return None
+    row = get_claimed()
+    return (row, None) if row else None
+
+
 # === Prefetch ===
 prefetch_q = queue.Queue(maxsize=PREFETCH_DEPTH + 1)
+prefetch_audio_s = [0.0]  # audio seconds in prefetch_q (jobs hold whole-file PCM)
+prefetch_lock = threading.Lock()
 tmp_dir = os.path.join(WORK_DIR, f"tmp_gpu{GPU_ID}")
 os.makedirs(tmp_dir, exist_ok=True)
 
 
+def prepare_audio(vid, title, channel_id, audio_path, dur, meta):
+    """Pick a speed, decode to PCM and cut dead air. Falls back to the file path.
+
+    Returns a job dict for the main loop. offset_map maps compacted PCM time
+    back to the sped-up PCM timeline; trimmed_s is in original-audio seconds.
+    A str "audio" is transcribed as-is by faster-whisper, i.e. at 1.0x.
+    """
+    job = {"vid": vid, "title": title, "dur": dur, "audio": audio_path,
+           "offset_map": None, "trimmed_s": 0.0, "speed": 1.0,
+           "format": meta["format"], "bytes": meta["bytes"]}
+    try:
+        speed, wps, origin = pick_speed(audio_path, dur, channel_id)
+        pcm = audio_prep.decode_pcm(audio_path, speed=speed)
+    except Exception as e:
+        print(f"[GPU {GPU_ID}] PCM decode error {vid}: {e}", flush=True)
+        pcm = None
+    if pcm is None:
+        return job
+    job["speed"] = speed
+    if wps is not None:
+        print(f"[GPU {GPU_ID}] {vid}: {wps:.2f} words/s ({origin}) -> {speed:.2f}x", flush=True)
+
+    if TRIM_SILENCE:
+        pcm, offset_map, removed_s = audio_prep.trim_silence(
+            pcm, threshold_db=SILENCE_DB, min_silence_s=MIN_SILENCE_S)
+        job["offset_map"] = offset_map
+        job["trimmed_s"] = removed_s * speed
+    job["audio"] = pcm
+    try:
+        os.unlink(audio_path)
+    except OSError:
+        pass
+    return job
+
+
+def archive_checkout(vid):
+    """(path, duration, meta) from the archive, or None. meta["bytes"] is 0: nothing downloaded."""
+    if archive is None:
+        return None
+    try:
+        got = archive.checkout(vid, tmp_dir)
+    except Exception as e:
+        print(f"[GPU {GPU_ID}] Archive checkout failed {vid}: {e}", flush=True)
+        return None
+    if not got:
+        return None
+    path, entry = got
+    print(f"[GPU {GPU_ID}] {vid}: audio from archive ({entry['bytes'] / 1e6:.1f} MB)", flush=True)
+    return path, entry["duration"] or 0.0, {"format": entry["format"], "bytes": 0}
+
+
+def archive_put(vid, audio_path, dur, meta):
+    if archive is None or not meta["bytes"] or dur <= 0:
+        return
+    if meta["bytes"] * 8 / dur / 1000 > ARCHIVE_MAX_KBPS:
+        return
+    try:
+        conn = get_db()
+        row = conn.execute("SELECT license_risk, priority FROM videos WHERE video_id=?",
+                           (vid,)).fetchone()
+        conn.close()
+        rank = 2 if row and row[0] == "green" else 1 if row and (row[1] or 0) >= 8 else 0
+        archive.put(vid, audio_path, dur, meta["format"], rank)
+    except Exception as e:
+        print(f"[GPU {GPU_ID}] Archive put failed {vid}: {e}", flush=True)
+
+
+def prefetch_full():
+    """Queue at job or audio limit. Checked before each download, so one long
+    lecture still gets in when the queue is nearly empty."""
+    return prefetch_q.qsize() >= PREFETCH_DEPTH or prefetch_audio_s[0] >= PREFETCH_MAX_AUDIO_S
+
+
+def prefetch_put(job):
+    with prefetch_lock:
+        prefetch_audio_s[0] += job["dur"]
+    prefetch_q.put(job)
+
+
+def prefetch_get(timeout):
+    job = prefetch_q.get(timeout=timeout)
+    with prefetch_lock:
+        prefetch_audio_s[0] -= job["dur"]
+    return job
+
+
 def prefetcher(thread_idx):
     cookie_file = get_thread_cookie_file(thread_idx)
     consec_fails = 0
     print(f"[GPU {GPU_ID}] Prefetch thread {thread_idx} started", flush=True)
     while True:
         try:
-            if prefetch_q.qsize() >= PREFETCH_DEPTH:
+            if prefetch_full():
                 time.sleep(0.3)
                 continue
 
-            row = get_claimed()
-            if not row:
-                time.sleep(2)
+            item = next_download()
+            if not item:
+                if RESOLVER_THREADS == 0:
+                    time.sleep(2)
                 continue
 
-            vid, title = row
-            result = download_audio(vid, tmp_dir, cookie_file=cookie_file)
+            (vid, title, channel_id), info = item
+            result, throttled = archive_checkout(vid), False
+            for identity in range(len(THROTTLE_IDENTITIES) if result is None else 0):
+                try:
+                    result = download_audio(vid, tmp_dir, cookie_file=cookie_file,
+                                            info=info if identity == 0 else None,
+                                            identity=identity)
+                    throttled = False
+                    break
+                except range_downloader.Throttled as e:
+                    throttled = True
+                    record_throttle(vid, cookie_file, THROTTLE_IDENTITIES[identity][0],
+                                    getattr(e, "engine", "?"), e.rate_bps)
+                    cookie_file = rotate_cookie(thread_idx)
+            if throttled:
+                release_throttled(vid)
+                time.sleep(THROTTLE_PAUSE_S * random.uniform(0.5, 1.5))
+                continue
             if result is None:
                 mark_error(vid, "download_failed")
                 consec_fails += 1
@@ -292,7 +1169,7 @@ def prefetcher(thread_idx):
                 continue
 
             consec_fails = 0  # reset on success
-            audio_path, dur = result
+            audio_path, dur, meta = result
             if dur < 5:
                 mark_error(vid, f"too_short_{dur:.0f}s")
                 try:
@@ -301,76 +1178,240 @@ def prefetcher(thread_idx):
                     pass
                 continue
 
-            prefetch_q.put((vid, title, audio_path, dur))
+            if DEDUP_AUDIO and vid not in retranscribing:
+                match = check_duplicate(vid, audio_path, dur)
+                if match and complete_duplicate(vid, match[0], dur, meta):
+                    print(f"[GPU {GPU_ID}] {vid}: re-upload of {match[0]} "
+                          f"(similarity {match[1]:.2f}), transcript reused", flush=True)
+                    try:
+                        os.unlink(audio_path)
+                    except OSError:
+                        pass
+                    continue
+
+            archive_put(vid, audio_path, dur, meta)
+            prefetch_put(prepare_audio(vid, title, channel_id, audio_path, dur, meta))
             time.sleep(random.uniform(1, 3))  # rate-limit protection
         except Exception as e:
             print(f"[GPU {GPU_ID}] Prefetch error: {e}", flush=True)
 
 
+for _i in range(RESOLVER_THREADS):
+    threading.Thread(target=resolver, args=(_i,), daemon=True).start()
 for _i in range(PREFETCH_THREADS):
     threading.Thread(target=prefetcher, args=(_i,), daemon=True).start()
 
 # === Load model ===
 print(f"[GPU {GPU_ID}] Loading faster-whisper {MODEL_ID} "
-      f"(speed={AUDIO_SPEED}x, {PREFETCH_THREADS} prefetch)...", flush=True)
+      f"(speed={f'{SPEED_MIN}-{SPEED_MAX}' if ADAPTIVE_SPEED else AUDIO_SPEED}x, "
+      f"{PREFETCH_THREADS} prefetch)...", flush=True)
 
 from faster_whisper import WhisperModel
 
 t0 = time.time()
-model = WhisperModel(MODEL_ID, device="cuda", compute_type="float16")
+model = WhisperModel(MODEL_ID, device="cuda", compute_type=COMPUTE_TYPE)
 print(f"[GPU {GPU_ID}] Model loaded in {time.time()-t0:.1f}s", flush=True)
 
 with open(f"/tmp/gpu_{GPU_ID}_ready", "w") as f:
     f.write(str(os.getpid()))
 
+def cleanup_audio(job):
+    if isinstance(job["audio"], str):
+        try:
+            os.unlink(job["audio"])
+        except OSError:
+            pass
+
+
+def orig_time(job, t):
+    """Map a time in the buffer fed to Whisper back to original-audio seconds."""
+    if job["offset_map"] is not None:
+        t = float(audio_prep.to_source_time(t, job["offset_map"]))
+    return t * job["speed"]
+
+
+def transcribe(job):
+    """Transcribe one job, resuming from / writing checkpoints. Returns the transcript."""
+    vid, audio = job["vid"], job["audio"]
+    segments_out, resume_at = load_checkpoint(vid)
+    segments_out = segments_out or []
+    start_in_buf = 0.0
+
+    if isinstance(audio, np.ndarray):
+        if resume_at > 0:
+            # Checkpoint offsets are on the original timeline; find that point in the buffer
+            src_t = resume_at / job["speed"]
+            if job["offset_map"] is not None:
+                src_t = float(audio_prep.to_compacted_time(src_t, job["offset_map"]))
+            start_in_buf = min(src_t, len(audio) / audio_prep.SAMPLE_RATE)
+            audio = audio[int(start_in_buf * audio_prep.SAMPLE_RATE):]
+            print(f"[GPU {GPU_ID}] {vid}: resuming from checkpoint at "
+                  f"{resume_at/60:.1f}min ({len(segments_out)} segments)", flush=True)
+        # PCM buffers (int16, silence-trimmed) are fed directly
+        audio = audio.astype(np.float32) / 32768.0
+    else:
+        # Decode failed upstream: faster-whisper falls back to its own ffmpeg,
+        # and we can't seek into the file, so any checkpoint is discarded
+        segments_out, resume_at = [], 0.0
+
+    segments, info = model.transcribe(audio, **DECODE_PARAMS)
+    # Stop pulling segments (= stop decoding) once Whisper is stuck in a loop
+    budget = decode_guard.TimeBudgetGuard(job["budget_s"], start=job["started_at"])
+    segments = decode_guard.guard_segments(
+        segments, decode_guard.RepetitionGuard(), budget)
+
+    last_ckpt = resume_at
+    for seg in segments:
+        start = orig_time(job, start_in_buf + seg.start)
+        end = orig_time(job, start_in_buf + seg.end)
+        segments_out.append([round(start, 2), round(end, 2), seg.text])
+        if end - last_ckpt >= CHECKPOINT_EVERY_S:
+            save_checkpoint(vid, segments_out, end)
+            last_ckpt = end
+
+    job["segments"] = segments_out
+    return " ".join(s[2] for s in segments_out).strip()
+
+
+# === Metrics + hard watchdog ===
+def load_stats():
+    try:
+        with open(STATS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Counters survive worker recycling (the hard watchdog exits the process)
+stats = {"budget_hits": 0, "hard_timeouts": 0, "speed_ema": INITIAL_SPEED}
+stats.update(load_stats())
+stats["pid"] = os.getpid()
+
+
+def write_stats():
+    stats["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    tmp = STATS_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(stats, f)
+    os.replace(tmp, STATS_PATH)
+
+
+current_job = {}  # job the main thread is transcribing right now
+
+
+def hard_watchdog():
+    """Recycle the worker if a transcription overruns its budget + grace."""
+    while True:
+        time.sleep(5)
+        job = current_job.get("job")
+        if not job:
+            continue
+        overrun = time.time() - job["started_at"] - job["budget_s"]
+        if overrun > BUDGET_HARD_GRACE_S:
+            print(f"[GPU {GPU_ID}] {job['vid']}: transcription hung "
+                  f"{overrun:.0f}s past {job['budget_s']:.0f}s budget — recycling worker", flush=True)
+            try:
+                mark_error(job["vid"], "transcribe_timeout")
+                stats["budget_hits"] += 1
+                stats["hard_timeouts"] += 1
+                write_stats()
+            finally:
+                os._exit(3)
+
+
+write_stats()
+threading.Thread(target=hard_watchdog, daemon=True).start()
+
 # === Main transcription loop ===
+decode_params_json = json.dumps(
+    {**DECODE_PARAMS, "compute_type": COMPUTE_TYPE,
+     "trim_silence_db": SILENCE_DB if TRIM_SILENCE else None,
+     "min_silence_s": MIN_SILENCE_S if TRIM_SILENCE else None}, sort_keys=True)
 completed = 0
 total_audio_s = 0
 total_transcribe_s = 0
+total_trimmed_s = 0
+total_bytes = 0
 start_time = time.time()
 
 while True:
     try:
-        vid, title, audio_path, dur = prefetch_q.get(timeout=60)
+        job = prefetch_get(timeout=60)
     except queue.Empty:
         print(f"[GPU {GPU_ID}] Prefetch queue empty 60s, waiting...", flush=True)
         continue
 
+    vid, dur = job["vid"], job["dur"]
     try:
         t0 = time.time()
-        # faster-whisper reads opus/webm/m4a directly via internal ffmpeg
-        segments, info = model.transcribe(
-            audio_path, beam_size=1, vad_filter=False,
-            word_timestamps=False, condition_on_previous_text=False)
-        transcript = " ".join(s.text for s in segments).strip()
+        job["started_at"] = t0
+        job["budget_s"] = decode_guard.time_budget(
+            dur - job["trimmed_s"], stats["speed_ema"], BUDGET_SLACK, BUDGET_MIN_S)
+        current_job["job"] = job
+        transcript = transcribe(job)
         transcribe_s = time.time() - t0
+        current_job["job"] = None
 
         # Clean up audio file after transcription
-        try:
-            os.unlink(audio_path)
-        except OSError:
-            pass
+        cleanup_audio(job)
 
-        if transcript:
-            mark_done(vid, transcript, dur, transcribe_s)
+        if transcript and vid in retranscribing:
+            fields = {"audio_format": job["format"], "model_id": MODEL_ID,
+                      "decode_params": decode_params_json}
+            if job["bytes"]:
+                fields["download_bytes"] = job["bytes"]
+            if finish_retranscription(vid, transcript, dur, transcribe_s, job["trimmed_s"],
+                                      job["speed"], segments=job.get("segments"), **fields):
+                stats["retranscribed"] = stats.get("retranscribed", 0) + 1
+                write_stats()
+                print(f"[GPU {GPU_ID}] {vid}: re-transcribed with {MODEL_ID} "
+                      f"({dur/60:.1f}min in {transcribe_s:.1f}s)", flush=True)
+        elif transcript:
+            mark_done(vid, transcript, dur, transcribe_s, job["trimmed_s"], job["speed"],
+                      audio_format=job["format"], download_bytes=job["bytes"],
+                      segments=job.get("segments"), transcript_source="whisper",
+                      model_id=MODEL_ID, decode_params=decode_params_json)
+            audit = pending_audits.pop(vid, None)
+            if audit:
+                # A capped alignment still takes a second or two: keep it off the GPU thread
+                threading.Thread(target=record_caption_audit, args=(vid, *audit, transcript),
+                                 daemon=True).start()
             completed += 1
             total_audio_s += dur
             total_transcribe_s += transcribe_s
+            total_trimmed_s += job["trimmed_s"]
+            total_bytes += job["bytes"]
             speed = dur / transcribe_s if transcribe_s > 0 else 0
+            # Measured realtime factor (on audio actually decoded) feeds the next budgets
+            if transcribe_s > 1:
+                stats["speed_ema"] = 0.9 * stats["speed_ema"] + 0.1 * (dur - job["trimmed_s"]) / transcribe_s
+            stats["completed"] = stats.get("completed", 0) + 1
+            write_stats()
+            if job["trimmed_s"] >= 1:
+                print(f"[GPU {GPU_ID}] {vid}: trimmed {job['trimmed_s']:.0f}s dead air "
+                      f"({job['trimmed_s'] / max(dur, 1) * 100:.0f}%)", flush=True)
 
             if completed % 5 == 0 or completed <= 3:
                 avg_speed = total_audio_s / total_transcribe_s if total_transcribe_s > 0 else 0
                 hours_done = total_audio_s / 3600
-                qsize = prefetch_q.qsize()
+                qsize = f"{prefetch_q.qsize()}/{prefetch_audio_s[0] / 3600:.1f}h"
                 rate_per_h = completed / ((time.time() - start_time) / 3600) if time.time() > start_time else 0
+                mb_per_h = total_bytes / 1e6 / max(hours_done, 1e-9)
                 print(f"[GPU {GPU_ID}] #{completed}: {dur/60:.1f}min->{transcribe_s:.1f}s={speed:.0f}x | "
-                      f"avg={avg_speed:.0f}x | {hours_done:.1f}h | q={qsize} | {rate_per_h:.0f}/hr", flush=True)
+                      f"avg={avg_speed:.0f}x | {hours_done:.1f}h | q={qsize} | {rate_per_h:.0f}/hr | "
+                      f"trimmed={total_trimmed_s/3600:.1f}h | {mb_per_h:.0f}MB/audio-h", flush=True)
         else:
             mark_error(vid, "empty_transcript")
+    except decode_guard.RunawayDecode as e:
+        current_job["job"] = None
+        print(f"[GPU {GPU_ID}] {vid}: aborted after {time.time() - t0:.1f}s — {e}", flush=True)
+        mark_error(vid, e.code)
+        cleanup_audio(job)
+        if e.code == "transcribe_timeout":
+            stats["budget_hits"] += 1
+            write_stats()
     except Exception as e:
+        current_job["job"] = None
         print(f"[GPU {GPU_ID}] ERROR: {traceback.format_exc()}", flush=True)
         mark_error(vid, str(e))
-        try:
-            os.unlink(audio_path)
-        except (OSError, NameError):
-            pass
+        cleanup_audio(job)
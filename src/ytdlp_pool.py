@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Long-lived yt-dlp worker processes for metadata lookups.
+
+Each `yt-dlp` subprocess pays for a Python start, the yt_dlp import and its
+extractor setup before doing a single request. The pool keeps a few worker
+processes (this file with --serve) that import yt_dlp once and keep a
+`YoutubeDL` per distinct option set. A request is the same argv a caller
+would have run, sent as a JSON line over the worker's stdin; the worker
+runs it through yt-dlp's own option parser and download path with output
+captured, so -J, --dump-json and --print behave exactly as on the CLI.
+
+`run(cmd, timeout)` is a drop-in for
+`subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)`:
+it returns an object with returncode/stdout/stderr and raises
+subprocess.TimeoutExpired. `stream_json(cmd, timeout)` instead yields each
+--dump-json line as yt-dlp prints it, and on timeout just stops, so a
+listing that runs long keeps every entry enumerated so far. A worker that
+times out is killed; workers are recycled after MAX_REQUESTS. If workers can't start (yt_dlp not importable
+from YTDLP), calls fall back to a subprocess per call.
+
+    import ytdlp_pool
+    r = ytdlp_pool.run([YTDLP, url, "--dump-json", "--quiet"], timeout=30)
+"""
+import collections
+import io
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+
+YTDLP = os.path.expanduser("~/academic_transcriptions/yt-dlp")
+POOL_SIZE = int(os.environ.get("YTDLP_POOL_SIZE", "8"))
+MAX_REQUESTS = 500           # recycle a worker after this many calls (leaks, stale cookies)
+START_TIMEOUT_S = 60
+MAX_INSTANCES = 16           # cached YoutubeDL option sets per worker
+
+Completed = collections.namedtuple("Completed", "args returncode stdout stderr")
+
+
+class _Worker:
+    def __init__(self, ytdlp_path):
+        env = dict(os.environ, YTDLP_PATH=ytdlp_path)
+        self.proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve"],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        self.buf = b""
+        self.served = 0
+        hello = self.read(time.time() + START_TIMEOUT_S)
+        if not hello.get("ready"):
+            self.kill()
+            raise RuntimeError(hello.get("error", "yt-dlp worker failed to start"))
+
+    def read(self, deadline):
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self.buf:
+            left = deadline - time.time()
+            if left <= 0:
+                raise TimeoutError
+            ready, _, _ = select.select([fd], [], [], left)
+            if ready:
+                chunk = os.read(fd, 1 << 20)
+                if not chunk:
+                    raise EOFError("yt-dlp worker exited")
+                self.buf += chunk
+        line, self.buf = self.buf.split(b"\n", 1)
+        return json.loads(line)
+
+    def send(self, args, stream=False):
+        self.proc.stdin.write(json.dumps({"args": args, "stream": stream}).encode() + b"\n")
+        self.proc.stdin.flush()
+        self.served += 1
+
+    def request(self, args, timeout):
+        self.send(args)
+        return self.read(time.time() + (timeout or 1e9))
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        self.proc.kill()
+        self.proc.wait()
+
+
+class YtdlpPool:
+    def __init__(self, size=POOL_SIZE, ytdlp_path=YTDLP, max_requests=MAX_REQUESTS):
+        self.size = size
+        self.ytdlp_path = ytdlp_path
+        self.max_requests = max_requests
+        self.idle = []
+        self.live = 0
+        self.broken = None           # startup error -> subprocess fallback
+        self.cond = threading.Condition()
+
+    def _acquire(self):
+        with self.cond:
+            while not self.idle and self.live >= self.size:
+                self.cond.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.live += 1
+        try:
+            return _Worker(self.ytdlp_path)
+        except Exception:
+            self._release(None)
+            raise
+
+    def _release(self, worker):
+        with self.cond:
+            if worker is None:
+                self.live -= 1
+            else:
+                self.idle.append(worker)
+            self.cond.notify()
+
+    def _worker_or_none(self):
+        """A worker, or None once workers have proven unable to start."""
+        if self.broken:
+            return None
+        try:
+            return self._acquire()
+        except Exception as e:
+            self.broken = str(e)
+            print(f"[ytdlp_pool] workers unavailable, using a subprocess per call: {e}", flush=True)
+            return None
+
+    def _done(self, worker):
+        if worker.served >= self.max_requests:
+            worker.close()
+            self._release(None)
+        else:
+            self._release(worker)
+
+    def run(self, cmd, timeout=None):
+        """Run a yt-dlp argv (cmd[0] is the yt-dlp path) on a warm worker."""
+        worker = self._worker_or_none()
+        if worker is None:
+            return self._subprocess(cmd, timeout)
+        try:
+            resp = worker.request(cmd[1:], timeout)
+        except TimeoutError:
+            worker.kill()
+            self._release(None)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except (OSError, EOFError, ValueError) as e:
+            worker.kill()
+            self._release(None)
+            return Completed(cmd, 1, "", f"yt-dlp worker died: {e}")
+        self._done(worker)
+        return Completed(cmd, resp["returncode"], resp["stdout"], resp["stderr"])
+
+    def _subprocess(self, cmd, timeout):
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        return Completed(cmd, r.returncode, r.stdout, r.stderr)
+
+    def stream(self, cmd, timeout=None):
+        """Yield stdout lines as yt-dlp prints them.
+
+        Raises subprocess.TimeoutExpired after the last line that arrived in
+        time. Stopping iteration early kills the worker mid-listing.
+        """
+        worker = self._worker_or_none()
+        if worker is None:
+            yield from self._subprocess_stream(cmd, timeout)
+            return
+        deadline = time.time() + (timeout or 1e9)
+        finished = False
+        try:
+            try:
+                worker.send(cmd[1:], stream=True)
+            except OSError:
+                return
+            while True:
+                try:
+                    msg = worker.read(deadline)
+                except TimeoutError:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                except (OSError, EOFError, ValueError):
+                    return
+                if "line" in msg:
+                    yield msg["line"]
+                    continue
+                finished = True
+                self._done(worker)
+                yield from msg["stdout"].splitlines()
+                return
+        finally:
+            if not finished:
+                worker.kill()
+                self._release(None)
+
+    def _subprocess_stream(self, cmd, timeout):
+        deadline = time.time() + (timeout or 1e9)
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        fd, buf = proc.stdout.fileno(), b""
+        try:
+            while True:
+                left = deadline - time.time()
+                if left <= 0:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                if not select.select([fd], [], [], left)[0]:
+                    continue
+                chunk = os.read(fd, 1 << 16)
+                if not chunk:
+                    break
+                buf += chunk
+                *lines, buf = buf.split(b"\n")
+                for line in lines:
+                    yield line.decode("utf-8", "replace")
+            if buf:
+                yield buf.decode("utf-8", "replace")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+
+    def close(self):
+        with self.cond:
+            idle, self.idle = self.idle, []
+            self.live -= len(idle)
+        for worker in idle:
+            worker.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _shared(ytdlp_path):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = YtdlpPool(ytdlp_path=ytdlp_path)
+    return _pool
+
+
+def run(cmd, timeout=None):
+    """subprocess.run(cmd, capture_output=True, text=True, timeout=...) on the shared pool."""
+    return _shared(cmd[0]).run(cmd, timeout)
+
+
+def stream_json(cmd, timeout=None, stats=None):
+    """Yield each JSON line (--dump-json / --flat-playlist entry) as it is printed.
+
+    On timeout the listing stops and everything yielded so far stands.
+    If `stats` is a dict, the listing's entries, output bytes and seconds
+    are added to it when the listing ends.
+    """
+    n = size = 0
+    t0 = time.time()
+    try:
+        for line in _shared(cmd[0]).stream(cmd, timeout):
+            size += len(line) + 1
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            n += 1
+            yield entry
+    except subprocess.TimeoutExpired:
+        print(f"    yt-dlp listing timed out after {timeout}s, kept {n} entries", flush=True)
+    finally:
+        if stats is not None:
+            stats['entries'] = stats.get('entries', 0) + n
+            stats['bytes'] = stats.get('bytes', 0) + size
+            stats['seconds'] = stats.get('seconds', 0.0) + time.time() - t0
+
+
+# --- worker side ---
+
+class _LineForwarder(io.StringIO):
+    """yt-dlp stdout that sends each complete line to the parent right away."""
+
+    def __init__(self, proto):
+        super().__init__()
+        self.proto = proto
+        self.partial = ""
+
+    def write(self, s):
+        *lines, self.partial = (self.partial + s).split("\n")
+        for line in lines:
+            self.proto.write(json.dumps({"line": line}) + "\n")
+        if lines:
+            self.proto.flush()
+        return len(s)
+
+    def getvalue(self):
+        return self.partial
+
+def _serve():
+    proto = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)                    # stray prints can't corrupt the protocol
+    sys.stdout = sys.stderr
+    try:
+        import yt_dlp
+    except ImportError:
+        sys.path.insert(0, os.environ.get("YTDLP_PATH", YTDLP))   # release binary is a zipapp
+        try:
+            import yt_dlp
+        except ImportError as e:
+            proto.write(json.dumps({"error": f"cannot import yt_dlp: {e}"}) + "\n")
+            proto.flush()
+            return
+    proto.write(json.dumps({"ready": yt_dlp.version.__version__}) + "\n")
+    proto.flush()
+
+    instances = collections.OrderedDict()
+    for line in sys.stdin:
+        req = json.loads(line)
+        args = req["args"]
+        out = _LineForwarder(proto) if req.get("stream") else io.StringIO()
+        err = io.StringIO()
+        try:
+            parsed = yt_dlp.parse_options(args)
+            key = tuple(a for a in args if a not in parsed.urls)
+            ydl = instances.pop(key, None)
+            if ydl is None:
+                ydl = yt_dlp.YoutubeDL(parsed.ydl_opts)
+                if len(instances) >= MAX_INSTANCES:
+                    instances.popitem(last=False)[1].close()
+            instances[key] = ydl
+            # per-call reset of the state yt-dlp's CLI would start fresh with
+            ydl._out_files.out = out
+            ydl._out_files.error = err
+            if ydl.params.get("quiet"):
+                ydl._out_files.screen = err
+            else:
+                ydl._out_files.screen = out
+            ydl._download_retcode = 0
+            ydl._playlist_urls.clear()
+            rc = ydl.download(parsed.urls)
+        except yt_dlp.utils.DownloadError:
+            rc = 1
+        except SystemExit as e:      # optparse errors
+            rc = e.code if isinstance(e.code, int) else 2
+        except Exception as e:
+            err.write(f"{type(e).__name__}: {e}\n")
+            rc = 1
+        proto.write(json.dumps({"returncode": rc, "stdout": out.getvalue(),
+                                "stderr": err.getvalue()}) + "\n")
+        proto.flush()
+    for ydl in instances.values():
+        ydl.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--serve"]:
+        _serve()
@@ -23,8 +23,22 @@ db.commit()
 # Quick stats
 for r in db.execute('SELECT status, COUNT(*) FROM videos GROUP BY status ORDER BY COUNT(*) DESC'):
     print(f'  {r[0]}: {r[1]:,}')
+try:
+    rows = db.execute(\"SELECT account, client, COUNT(*) FROM throttle_events WHERE at > datetime('now', '-1 day') GROUP BY account, client ORDER BY COUNT(*) DESC\").fetchall()
+except sqlite3.OperationalError:
+    rows = []
+for r in rows:
+    print(f'  throttled 24h: {r[0]} / {r[1]}: {r[2]}')
 "
 
+# Per-worker metrics (budget hits = transcriptions killed by the per-video time budget)
+echo "[watchdog] Worker metrics:"
+for gpu in 0 1 2 3; do
+    if [ -f /tmp/gpu_${gpu}_stats.json ]; then
+        echo "  GPU $gpu: $(cat /tmp/gpu_${gpu}_stats.json)"
+    fi
+done
+
 # Check GPU utilization
 echo "[watchdog] GPU status:"
 nvidia-smi --query-gpu=index,utilization.gpu,memory.used --format=csv,noheader